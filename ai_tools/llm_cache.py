@@ -0,0 +1,64 @@
+import json
+import os
+import re
+
+from cache_tools.tiered_cache import TieredCache, make_key
+
+# LLM_CACHE_PATH 为空字符串时只用内存层
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))   # 秒
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+LLM_CACHE_DISK_SIZE = int(os.getenv("LLM_CACHE_DISK_SIZE", "20000"))
+
+cache = TieredCache(
+    "llm_responses",
+    path=LLM_CACHE_PATH,
+    max_entries=LLM_CACHE_SIZE,
+    max_disk_entries=LLM_CACHE_DISK_SIZE,
+    ttl=LLM_CACHE_TTL,
+)
+
+
+def normalize_payload(user_input: str) -> str:
+    """JSON 输入按 key 排序后重新序列化；普通文本去掉多余空白。"""
+    try:
+        return json.dumps(json.loads(user_input), sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return re.sub(r'\s+', ' ', user_input).strip()
+
+
+def _lookup(deployment, system_prompt, user_input, sampling):
+    key = make_key(deployment, system_prompt, normalize_payload(user_input), sampling)
+    return key, cache.get(key)
+
+
+def _store(key, content):
+    # 只缓存能被 json.loads 解析的回答，避免把坏输出固化下来
+    try:
+        json.loads(content)
+    except (TypeError, ValueError):
+        return
+    cache.set(key, content)
+
+
+def cached_completion(deployment, system_prompt, user_input, sampling, call):
+    """
+    以 (deployment, system prompt, 规范化后的用户输入, 采样参数) 为键缓存 LLM 回答。
+    call 为未命中时真正请求 LLM 的无参函数。
+    """
+    key, hit = _lookup(deployment, system_prompt, user_input, sampling)
+    if hit is not None:
+        return hit
+    content = call()
+    _store(key, content)
+    return content
+
+
+async def acached_completion(deployment, system_prompt, user_input, sampling, acall):
+    """cached_completion 的异步版本，acall 返回 awaitable。"""
+    key, hit = _lookup(deployment, system_prompt, user_input, sampling)
+    if hit is not None:
+        return hit
+    content = await acall()
+    _store(key, content)
+    return content
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+from ai_tools import llm_stub
+
+# azure | stub（stub 为本地确定性回答，无需网络）
+LLM_BACKEND = os.getenv("LLM_BACKEND", "azure").lower()
+
+PROXY_URL = os.getenv("PROXY_URL") or None   # 只从环境读取；凭据不进代码
+ENDPOINT_URL = os.getenv("AZURE_OPENAI_ENDPOINT", "https://openaichatgpt-xchina.openai.azure.com/")
+API_VERSION = "2025-01-01-preview"
+DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))          # 单次请求上限（秒）
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF = float(os.getenv("LLM_BACKOFF", "0.5"))         # 首次重试基准等待（秒）
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))        # keep-alive 连接数
+
+_client = None
+_client_lock = threading.Lock()
+_async_clients = {}   # 事件循环 -> AsyncAzureOpenAI（httpx.AsyncClient 不能跨事件循环使用）
+
+
+def model_name() -> str:
+    """缓存键里用的模型标识，区分不同后端。"""
+    return f"{LLM_BACKEND}:{DEPLOYMENT_NAME}"
+
+
+def get_client():
+    """每个 worker 一个 AzureOpenAI 客户端（懒加载），底层 httpx 连接池复用 TLS 连接。"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                from openai import AzureOpenAI
+
+                http_client = httpx.Client(
+                    proxy=PROXY_URL or None,
+                    timeout=LLM_TIMEOUT,
+                    limits=httpx.Limits(max_connections=LLM_POOL_SIZE,
+                                        max_keepalive_connections=LLM_POOL_SIZE,
+                                        keepalive_expiry=60),
+                )
+                _client = AzureOpenAI(
+                    azure_endpoint=ENDPOINT_URL,
+                    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                    api_version=API_VERSION,
+                    http_client=http_client,
+                    max_retries=0,   # 重试在 complete() 里统一处理
+                )
+    return _client
+
+
+def get_async_client():
+    """当前事件循环专用的 AsyncAzureOpenAI 客户端（懒加载）。"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+        from openai import AsyncAzureOpenAI
+
+        http_client = httpx.AsyncClient(
+            proxy=PROXY_URL or None,
+            timeout=LLM_TIMEOUT,
+            limits=httpx.Limits(max_connections=LLM_POOL_SIZE,
+                                max_keepalive_connections=LLM_POOL_SIZE,
+                                keepalive_expiry=60),
+        )
+        client = AsyncAzureOpenAI(
+            azure_endpoint=ENDPOINT_URL,
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+            api_version=API_VERSION,
+            http_client=http_client,
+            max_retries=0,
+        )
+        for stale in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[stale]
+        _async_clients[loop] = client
+    return client
+
+
+def reset_client():
+    """丢弃现有客户端（例如 fork 之后），下次调用重新创建。"""
+    global _client
+    with _client_lock:
+        _client = None
+        _async_clients.clear()
+
+
+def _retryable(exc) -> bool:
+    import openai
+    return isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError,
+                            openai.RateLimitError, openai.InternalServerError))
+
+
+def _backoff(attempt: int) -> float:
+    # 指数退避 + 抖动
+    return min(LLM_BACKOFF_MAX, LLM_BACKOFF * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def complete(role: str, system_prompt: str, user_input: str, sampling: dict, timeout: float = None) -> str:
+    """
+    发送一次 chat completion 并返回文本。
+
+    参数
+    ----
+    role          : 'process' / 'optimize' / 'check'，stub 后端据此生成回答
+    system_prompt : system 消息
+    user_input    : user 消息
+    sampling      : max_tokens / temperature / top_p …
+    timeout       : 本次调用（含重试）的总期限（秒），默认 LLM_TIMEOUT
+    """
+    if LLM_BACKEND == "stub":
+        return llm_stub.complete(role, user_input)
+
+    deadline = time.monotonic() + (timeout or LLM_TIMEOUT)
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_input},
+    ]
+    client = get_client()
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"LLM call ({role}) exceeded its deadline")
+        try:
+            completion = client.with_options(timeout=remaining).chat.completions.create(
+                model=DEPLOYMENT_NAME,
+                messages=messages,
+                stream=False,
+                **sampling
+            )
+            return completion.choices[0].message.content.strip()
+        except Exception as exc:
+            if not _retryable(exc) or attempt == LLM_MAX_RETRIES:
+                raise
+            wait = min(_backoff(attempt), deadline - time.monotonic())
+            if wait <= 0:
+                raise
+            time.sleep(wait)
+
+
+async def acomplete(role: str, system_prompt: str, user_input: str, sampling: dict, timeout: float = None) -> str:
+    """complete() 的异步版本：等待网络和退避时不阻塞事件循环。"""
+    if LLM_BACKEND == "stub":
+        return await llm_stub.acomplete(role, user_input)
+
+    deadline = time.monotonic() + (timeout or LLM_TIMEOUT)
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_input},
+    ]
+    client = get_async_client()
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"LLM call ({role}) exceeded its deadline")
+        try:
+            completion = await client.with_options(timeout=remaining).chat.completions.create(
+                model=DEPLOYMENT_NAME,
+                messages=messages,
+                stream=False,
+                **sampling
+            )
+            return completion.choices[0].message.content.strip()
+        except Exception as exc:
+            if not _retryable(exc) or attempt == LLM_MAX_RETRIES:
+                raise
+            wait = min(_backoff(attempt), deadline - time.monotonic())
+            if wait <= 0:
+                raise
+            await asyncio.sleep(wait)
@@ -0,0 +1,54 @@
+import asyncio
+import json
+import os
+import time
+
+# 模拟网络延迟（秒），用于压测；默认 0
+LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0"))
+
+STUB_ANALYSIS = {
+    "reasoning": "Stub backend: plan accepted by the local rule audit.",
+    "advantages": "",
+    "risks": "",
+}
+
+
+def _process(user_input: str) -> dict:
+    # 不改参数，交给 run_pipeline 的默认值；只识别 long term
+    try:
+        payload = json.loads(user_input)
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict) and "base_params" in payload:
+        return payload["base_params"] or {}
+    text = user_input.lower()
+    return {"long_term": any(k in text for k in ("long term", "long-term", "12-month", "one-year"))}
+
+
+def _optimize(user_input: str) -> dict:
+    # 放宽库存区间：下限减半，上限加 50%
+    ctx = json.loads(user_input)
+    return {
+        "min_inventory": int(ctx["min_inventory"] * 0.5),
+        "max_inventory": int(ctx["max_inventory"] * 1.5),
+    }
+
+
+def _check(user_input: str) -> dict:
+    return {"action": "accept", "valid": True, "violations": [], "analysis": STUB_ANALYSIS}
+
+
+_HANDLERS = {"process": _process, "optimize": _optimize, "check": _check}
+
+
+def complete(role: str, user_input: str) -> str:
+    """本地确定性回答，输出格式与对应 assistant 的 system prompt 一致。"""
+    if LLM_STUB_LATENCY:
+        time.sleep(LLM_STUB_LATENCY)
+    return json.dumps(_HANDLERS[role](user_input))
+
+
+async def acomplete(role: str, user_input: str) -> str:
+    if LLM_STUB_LATENCY:
+        await asyncio.sleep(LLM_STUB_LATENCY)
+    return json.dumps(_HANDLERS[role](user_input))
@@ -0,0 +1,279 @@
+# local_parser.py
+"""
+assistant1 的本地快速路径：常见说法用正则直接抽参数，不调用 LLM。
+
+    parse("set OEE to 0.9 and min inventory 2500")
+    → ({"OEE": 0.9, "min_inventory": 2500, "max_inventory": 9000, "CT": 105, "long_term": False}, 1.0)
+
+输出与 assistant1 相同的 JSON 字段（min_inventory / max_inventory / OEE / CT / force_zero /
+force_positive / weekN_min_consecutive_days / long_term）；用户没提到的 min_inventory / max_inventory /
+OEE / CT 与 LLM 一样填 assistant1 提示词里的初始值（DEFAULTS），其余交给 build_params 的默认值；
+force_zero / force_positive 为 {"3": None} 形式。
+天序号的上限和“没说哪一周”时的周数取自计划周数 weeks（默认与 scheduler 相同的 HORIZON_WEEKS）。
+
+置信度 = 被规则解释掉的实词 / (被解释的实词 + 没解释的实词)，客套话不参与计算；
+剩下没看懂的数字、"2.500" 这类有歧义的数字、参数名、条件词会把置信度压到阈值以下，
+未被规则吃掉的否定词（can't / won't / isn't ...）直接置 0，由调用方（assistant.assistant_input_process）
+回退到 LLM。JSON 输入（assistant1 的再调整）和一个参数都没抽到的输入一律置信度 0。
+"""
+import json
+import os
+import re
+
+HORIZON_WEEKS = int(os.getenv("HORIZON_WEEKS", "2"))   # 与 scheduler.HORIZON_WEEKS 相同
+
+# 与 assistant.SYSTEM_PROMPT 写给 LLM 的初始值一致：“减半”“增加 20%”等相对说法以此为基数，
+# 没提到的参数也填这些值，本地路径和 LLM 路径给出同样的参数
+DEFAULTS = {"min_inventory": 3000, "max_inventory": 9000, "OEE": 0.95, "CT": 105}
+
+NUM = r"(\d+(?:[.,]\d+)?)"
+WEEKDAYS = {"monday": 1, "mon": 1, "tuesday": 2, "tue": 2, "tues": 2, "wednesday": 3, "wed": 3,
+            "thursday": 4, "thu": 4, "thur": 4, "thurs": 4, "friday": 5, "fri": 5,
+            "saturday": 6, "sat": 6, "sunday": 7, "sun": 7}
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5}
+
+# 不影响参数的客套话 / 通用词
+FILLER = set("""
+please pls kindly set change update make use put keep let lets us me the a an to at of for on in with and plus
+also then is be it its we i you our my can could would should want need like plan planning production produce
+schedule generate create give show run new value values parameter parameters now just default defaults as
+okay ok hi hello thanks thank so same following next this coming week weeks weekly horizon optimize optimise
+calculate get latest customer by from
+""".split())
+# 出现在未解释部分时说明句子有我们没处理的逻辑
+RISKY = set("""
+not no dont don't except unless if but only instead without than more less reduce increase decrease raise lower
+higher cut double half halve between range keep inventory stock oee ct cycle time work working day days
+""".split())
+# 否定词：没被规则吃掉时整句的意思可能正好相反，置信度直接为 0
+NEGATION = r"\w+n't|(?:do|ca|wo|should|must|is|are|does|did|would|could)nt|not|no|never|cannot|nor|neither|none"
+# 2.500 可能是 2500（千分位）也可能是 2.5；0.950 这类以 0 开头的只能是小数
+AMBIGUOUS_NUM = r"(?<![\d.,])[1-9]\d*\.\d{3}(?![\d.,])"
+
+NOISE = [
+    r"\b(?:for\s+)?(?:the\s+)?(?:next|coming|following)\s+(?:two|2|couple\s+of)\s+weeks?\b",
+    r"\bproduction\s+plan\b",
+]
+
+LONG_TERM = r"\b(?:long[\s-]?term|12[\s-]?months?|twelve[\s-]?months?|one[\s-]?year|1[\s-]?year|yearly|annual)\b(?:\s+(?:forecast|plan|outlook|view))?"
+
+
+def _num(text):
+    """'12,000' → 12000；'0,9' / '0.9' → 0.9"""
+    if re.fullmatch(r"\d{1,3}(?:,\d{3})+", text):
+        return float(text.replace(",", ""))
+    return float(text.replace(",", "."))
+
+
+def _int_or_float(v):
+    return int(v) if float(v).is_integer() else v
+
+
+# ---------------- 天序号 ----------------
+DAY_TOKEN = (r"(?:(?:next\s+week(?:'s)?\s+|next\s+|this\s+)?(?:" + "|".join(sorted(WEEKDAYS, key=len, reverse=True))
+             + r")(?:\s+next\s+week)?|day\s*\d{1,2}|\d{1,2})")
+DAY_LIST = rf"(?:days?\s+)?{DAY_TOKEN}(?:\s*(?:,|and|&|or|to|-|through|until)\s*{DAY_TOKEN})*"
+
+
+def _days(text, max_day):
+    """'days 3-5 and 8' / 'monday and next friday' → [3, 4, 5, 8] / [1, 12]；无法识别或超出 max_day 返回 None"""
+    text = text.strip()
+    tokens = re.findall(DAY_TOKEN + r"|-|\bto\b|\bthrough\b|\buntil\b", text)
+    days, pending_range = [], False
+    for tok in tokens:
+        tok = tok.strip()
+        if tok in ("-", "to", "through", "until"):
+            pending_range = True
+            continue
+        if re.fullmatch(r"(?:day\s*)?\d{1,2}", tok):
+            d = int(re.sub(r"\D", "", tok))
+        else:
+            name = re.search("|".join(sorted(WEEKDAYS, key=len, reverse=True)), tok).group(0)
+            d = WEEKDAYS[name] + (7 if "next" in tok else 0)
+        if not 1 <= d <= max_day:
+            return None
+        if pending_range and days:
+            days.extend(range(days[-1] + 1, d + 1))
+        else:
+            days.append(d)
+        pending_range = False
+    return sorted(set(days)) or None
+
+
+# ---------------- 规则 ----------------
+def _inventory_rules(text, out, spans):
+    target = r"(?:(min(?:imum)?|lower(?:\s+bound|\s+limit)?|safety)|(max(?:imum)?|upper(?:\s+bound|\s+limit)?))?"
+    inv = r"[\s_-]*(?:inventory|stock)(?:\s+level)?(?:\s+(?:limit|bound|target))?"
+    sep = r"\s*(?:to|=|:|of|at|is|should\s+be|must\s+be|be)?\s*"
+
+    # 区间：inventory between 2000 and 6000 / inventory range 2000-6000
+    for m in re.finditer(rf"(?:inventory|stock)(?:\s+range)?\s*(?:between|from|of|to|=|:)?\s*{NUM}\s*(?:and|to|-|~)\s*{NUM}",
+                         text):
+        out["min_inventory"], out["max_inventory"] = _num(m.group(1)), _num(m.group(2))
+        spans.append(m.span())
+
+    # 绝对值：min inventory 2500 / set the maximum stock to 8000
+    for m in re.finditer(rf"{target}{inv}{sep}{NUM}(?!\s*%)", text):
+        if any(a <= m.start() < b for a, b in spans):
+            continue
+        keys = ["min_inventory"] if m.group(1) else ["max_inventory"] if m.group(2) else None
+        if keys is None:
+            continue   # 只说 inventory 2500，不知道是上限还是下限 → 交给 LLM
+        out[keys[0]] = _num(m.group(3))
+        spans.append(m.span())
+
+    # 相对值：halve / double / reduce by 20% / increase by 1000 (units)；没说上限下限时两个都改
+    def apply(keys, verb, amount=None, unit=""):
+        for key in keys:
+            base = out.get(key, DEFAULTS[key])
+            if verb.startswith("hal"):
+                out[key] = base * 0.5
+            elif verb.startswith("doub"):
+                out[key] = base * 2
+            else:
+                sign = 1 if verb.startswith(("increase", "raise")) else -1
+                out[key] = base * (1 + sign * amount / 100) if unit.startswith(("%", "percent")) else base + sign * amount
+
+    def keys_of(m):
+        return (["min_inventory"] if m.group("lo") else ["max_inventory"] if m.group("hi")
+                else ["min_inventory", "max_inventory"])
+
+    target = r"(?:(?P<lo>min(?:imum)?|lower(?:\s+bound|\s+limit)?|safety)|(?P<hi>max(?:imum)?|upper(?:\s+bound|\s+limit)?))?"
+    for m in re.finditer(r"(?P<verb>halve|half|double)\s+(?:the\s+)?" + target + inv, text):
+        apply(keys_of(m), m.group("verb"))
+        spans.append(m.span())
+    for m in re.finditer(target + inv + r"\s+(?:should\s+be\s+)?(?P<verb>halved|doubled)", text):
+        apply(keys_of(m), m.group("verb"))
+        spans.append(m.span())
+    for m in re.finditer(r"(?P<verb>reduce|decrease|lower|cut|increase|raise)\s+(?:the\s+)?" + target + inv
+                         + r"\s+by\s+(?P<amount>\d+(?:[.,]\d+)?)\s*(?P<unit>%|percent|units?|pcs|pieces)?", text):
+        apply(keys_of(m), m.group("verb"), _num(m.group("amount")), m.group("unit") or "")
+        spans.append(m.span())
+
+    for key in ("min_inventory", "max_inventory"):
+        if key in out:
+            out[key] = _int_or_float(round(out[key]))
+
+
+def _oee_ct_rules(text, out, spans):
+    sep = r"\s*(?:to|=|:|of|at|is|should\s+be|be)?\s*"
+    for m in re.finditer(rf"\boee{sep}{NUM}\s*(%|percent)?", text):
+        v = _num(m.group(1))
+        out["OEE"] = round(v / 100 if m.group(2) or v > 1 else v, 4)
+        spans.append(m.span())
+    for m in re.finditer(rf"\b(?:ct|cycle\s*time){sep}{NUM}\s*(?:s|sec|secs|seconds)?\b", text):
+        out["CT"] = _int_or_float(_num(m.group(1)))
+        spans.append(m.span())
+
+
+def _day_rules(text, out, spans, weeks):
+    neg = (r"(?:(?:do\s*not|don'?t|can'?t|cannot|won'?t|shouldn'?t|mustn'?t|isn'?t|aren'?t|no|not|never|stop|without|skip|avoid)"
+           r"\s+(?:be\s+)?(?:to\s+)?(?:work(?:ing)?|produc(?:e|ing|tion)|run(?:ning)?)"
+           r"|(?:skip|shut\s*down|close|no\s+shift|day\s+off|off)\b)")
+    pos = r"(?:(?:must|have\s+to|has\s+to|need\s+to|needs\s+to|should|please)\s+)?(?:work(?:ing)?|produc(?:e|ing|tion)|run)"
+    found = {"force_zero": [], "force_positive": []}
+
+    def take(m, key):
+        days = _days(m.group("days"), 7 * weeks)
+        if days is None:
+            return
+        found[key].extend(days)
+        spans.append(m.span())
+
+    for m in re.finditer(rf"{neg}\s+(?:on\s+|for\s+|at\s+)?(?P<days>{DAY_LIST})", text):
+        take(m, "force_zero")
+    for m in re.finditer(rf"(?P<days>{DAY_LIST})\s+(?:is\s+|are\s+|should\s+be\s+|as\s+)?(?:a\s+)?(?:off|day\s+off|holiday|shutdown|non[\s-]?working)\b", text):
+        take(m, "force_zero")
+    for m in re.finditer(rf"{pos}\s+(?:on\s+)?(?P<days>{DAY_LIST})", text):
+        if any(a <= m.start() < b for a, b in spans):
+            continue
+        take(m, "force_positive")
+
+    for key, days in found.items():
+        if days:
+            out[key] = {str(d): None for d in sorted(set(days))}
+
+
+def _continuity_rules(text, out, spans, weeks):
+    n = r"(\d|" + "|".join(NUMBER_WORDS) + r")"
+    for m in re.finditer(rf"(?:at\s+least\s+)?{n}\s+consecutive\s+(?:working\s+|production\s+)?days"
+                         rf"(?:\s+(?:in|for)\s+(?:week\s*(\d{{1,2}})|(?:the\s+)?(first|second|this|next)\s+week))?", text):
+        value = int(NUMBER_WORDS.get(m.group(1), m.group(1)))
+        week = m.group(2) or {"first": "1", "this": "1", "second": "2", "next": "2"}.get(m.group(3))
+        if week and not 1 <= int(week) <= weeks:
+            continue   # 计划范围外的周交给 LLM
+        for k in ([int(week)] if week else range(1, weeks + 1)):
+            out[f"week{k}_min_consecutive_days"] = value
+        spans.append(m.span())
+
+
+# ---------------- 置信度 ----------------
+WORD = r"[a-z']+|\d+(?:[.,]\d+)?|%"
+
+
+def _confidence(text, spans, noise):
+    """spans 为规则解释掉的片段，noise 为可以忽略的套话片段"""
+    if re.search(AMBIGUOUS_NUM, text):
+        return 0.3      # 2.500：千分位还是小数说不准
+    leftover, explained = list(text), [" "] * len(text)
+    for a, b in spans:
+        explained[a:b] = text[a:b]
+    for a, b in spans + noise:
+        leftover[a:b] = " " * (b - a)
+    consumed = [w for w in re.findall(WORD, "".join(explained)) if w not in FILLER]
+    unknown = [w for w in re.findall(WORD, "".join(leftover)) if w not in FILLER]
+    if any(re.fullmatch(NEGATION, w) for w in unknown):
+        return 0.0      # 否定词没有被规则覆盖，抽出来的参数可能正好说反了
+    if any(re.fullmatch(r"\d+(?:[.,]\d+)?|%", w) for w in unknown):
+        return 0.3      # 有没解释的数字
+    if any(w in RISKY for w in unknown):
+        return 0.5      # 条件 / 参数名没有被规则覆盖
+    if not consumed:
+        return 0.0
+    return round(len(consumed) / (len(consumed) + len(unknown)), 3)
+
+
+def _consistent(out):
+    lo, hi = out.get("min_inventory", DEFAULTS["min_inventory"]), out.get("max_inventory", DEFAULTS["max_inventory"])
+    if lo < 0 or hi <= lo:
+        return False
+    if "OEE" in out and not 0 < out["OEE"] <= 1:
+        return False
+    if "CT" in out and out["CT"] <= 0:
+        return False
+    return not (set(out.get("force_zero", {})) & set(out.get("force_positive", {})))
+
+
+def parse(user_input: str, weeks: int = None):
+    """
+    返回 (values, confidence)。values 为 assistant1 格式的 dict；confidence ∈ [0, 1]。
+    weeks 为计划周数，默认 HORIZON_WEEKS。
+    """
+    weeks = weeks or HORIZON_WEEKS
+    try:
+        json.loads(user_input)
+        return {}, 0.0   # JSON（assistant1 带违规信息的再调整）交给 LLM
+    except (TypeError, ValueError):
+        pass
+
+    text = user_input.lower().replace("’", "'").replace("“", '"').replace("”", '"')
+    text = re.sub(r"\s+", " ", text).strip()
+    out, spans = {}, []
+
+    noise = [m.span() for pattern in NOISE for m in re.finditer(pattern, text)]
+    m_long = list(re.finditer(LONG_TERM, text))
+    spans += [m.span() for m in m_long]
+
+    _inventory_rules(text, out, spans)
+    _oee_ct_rules(text, out, spans)
+    _day_rules(text, out, spans, weeks)
+    _continuity_rules(text, out, spans, weeks)
+    out["long_term"] = bool(m_long)
+
+    if out == {"long_term": False}:
+        return out, 0.0   # 一个参数都没抽到：不确定用户要什么，交给 LLM
+
+    confidence = _confidence(text, spans, noise) if _consistent(out) else 0.2
+    for key, value in DEFAULTS.items():
+        out.setdefault(key, value)
+    return out, confidence
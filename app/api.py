@@ -1,28 +1,143 @@
+import contextlib
+import json
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
 
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app import batch, jobs, metrics, warmup
+from app.scheduler import MAX_HORIZON_WEEKS, run_pipeline_async, run_pipeline_events
+from calculation_tools.shipment_planner import DelforCoverageError
+
+@contextlib.asynccontextmanager
+async def lifespan(_app):
+    warmup.warm_up()  # --preload 时 master 已做过，这里直接返回
+    jobs.start()      # 后台任务的 worker 层（单机只有一个 supervisor）
+    yield
+    jobs.stop()
 
-from app.scheduler import run_pipeline
 
 app = FastAPI(
     title="Production Planning API",
     version="0.1.0",
     docs_url="/",          
+    lifespan=lifespan,
 )
 
 class OptimizeRequest(BaseModel):
     llm_input: str
+    weeks: Optional[int] = Field(None, gt=0, le=MAX_HORIZON_WEEKS)   # 计划周数，默认 HORIZON_WEEKS
+    timings: bool = False         # 结果里附带各阶段耗时
 
 @app.post("/optimize", response_model=Dict[str, Any])
-def optimize(req: OptimizeRequest):
+async def optimize(req: OptimizeRequest):
     try:
-        return run_pipeline(req.llm_input)
+        if req.weeks is None:
+            return await run_pipeline_async(req.llm_input, timings=req.timings)
+        return await run_pipeline_async(req.llm_input, weeks=req.weeks, timings=req.timings)
+    except DelforCoverageError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
     except Exception as exc:
         logging.exception("run_pipeline 出错")
         raise HTTPException(status_code=500, detail=str(exc))
 
+class OptimizeStreamRequest(OptimizeRequest):
+    format: Literal["ndjson", "sse"] = "ndjson"
+
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _encode_event(event, fmt):
+    data = json.dumps(jsonable_encoder(event), ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+@app.post("/optimize/stream")
+async def optimize_stream(req: OptimizeStreamRequest):
+    """
+    与 /optimize 相同的流程，每轮的求解状态、中间计划与成本、审核违规、参数调整边算边推送，
+    最后一条是 event=result（内容与 /optimize 的返回相同）；出错时最后一条是 event=error。
+    format=ndjson 每行一个 JSON，format=sse 为 text/event-stream。
+    """
+    kwargs = {} if req.weeks is None else {"weeks": req.weeks}
+
+    async def body():
+        try:
+            # 客户端断开时 body 被关闭，aclosing 随即关闭流水线生成器（归还求解 session）
+            async with contextlib.aclosing(run_pipeline_events(req.llm_input, timings=req.timings, **kwargs)) as events:
+                async for event in events:
+                    yield _encode_event(event, req.format)
+        except Exception as exc:
+            logging.exception("run_pipeline 出错")
+            yield _encode_event({"event": "error", "detail": str(exc)}, req.format)
+
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[req.format],
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+class BatchItem(BaseModel):
+    material: str
+    week_start: str
+    overrides: Dict[str, Any] = {}
+    delfor: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+
+
+@app.post("/optimize/batch")
+def optimize_batch(req: BatchRequest):
+    """按完成顺序以 NDJSON 逐行返回每个 (material, week_start) 的结果"""
+    items = [item.model_dump() for item in req.items]
+
+    def lines():
+        for result in batch.iter_batch(items):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+class JobRequest(OptimizeRequest):
+    week_start: Optional[str] = None   # 默认 DEFAULT_WEEK_START
+
+
+@app.post("/jobs", status_code=202)
+def create_job(req: JobRequest):
+    """run_pipeline 入后台队列，立即返回任务 id；用 GET /jobs/{id} 轮询结果"""
+    return jobs.submit(req.model_dump())
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job, cancelled = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    if not cancelled:
+        raise HTTPException(status_code=409, detail=f"job already {job['status']}")
+    return job
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus 抓取端点：各阶段耗时直方图、attempt 数、求解状态、缓存命中率"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health", tags=["health"])
 def health():
     return {"status": "ok"}
@@ -0,0 +1,133 @@
+# batch.py
+"""
+批量计划：一次请求覆盖多个物料 × 多个 week_start。
+
+共享输入（DELFOR 解析结果、期初库存）在父进程里只加载一次，
+各条计划按 overrides 组装参数后分发到进程池并行求解，完成一条返回一条。
+批量模式不经过 LLM：overrides 直接使用 assistant1 输出的字段
+（min_inventory / max_inventory / OEE / CT / force_zero / force_positive /
+weekN_min_consecutive_days），也可以直接覆盖其它求解参数（如 defect_rate）。
+"""
+from concurrent.futures import as_completed
+from pathlib import Path
+
+from app import scheduler
+from calculation_tools import factory_calendar, optimize_production, plan_auditor, shipment_planner, solver_backends
+
+DEFAULT_DELFOR = 'DELFOR 6.27 Gen2.0.xlsx'
+DATA_DIR = 'data'
+
+
+def load_initial_inventory(materials):
+    """各物料期初库存：一次批量查询（DB_BACKEND 未配置时为 scheduler.INITIAL_INVENTORY）。"""
+    return scheduler.load_initial_inventory(materials)
+
+
+def delfor_path(name=None):
+    """DATA_DIR 下的 DELFOR 文件；name 只能是不带目录的文件名（客户端传入，不能跳出 DATA_DIR）"""
+    name = name or DEFAULT_DELFOR
+    if name in ('.', '..') or Path(name).name != name or '\\' in name:
+        raise ValueError(f"invalid delfor file name: {name!r}")
+    return Path(DATA_DIR) / name
+
+
+def build_batch_params(items):
+    """
+    参数
+    ----
+    items : [{'material': str, 'week_start': 'YYYY-MM-DD', 'overrides': dict, 'delfor': 文件名(可选)}, ...]
+
+    返回
+    ----
+    与 items 同序的 [(求解参数, None) | (None, 异常), ...]：某一条的 DELFOR / 物料 / 参数有问题
+    只影响这一条，其它条照常求解
+    """
+    inventory = load_initial_inventory({item['material'] for item in items})
+
+    # 每个 DELFOR 文件只解析一次（load_delfor 自带缓存），每个 (文件, week_start) 只算一次发货量；
+    # 失败也按 key 记下，同一个坏文件不重复尝试
+    deliveries = {}
+
+    def delivery(key):
+        if key not in deliveries:
+            try:
+                plan = shipment_planner.load_delfor(delfor_path(key[0]))['plan']
+                deliveries[key] = shipment_planner.delivery_for_horizon(plan, key[1], weeks=scheduler.HORIZON_WEEKS)
+            except Exception as exc:
+                deliveries[key] = exc
+        if isinstance(deliveries[key], Exception):
+            raise deliveries[key]
+        return deliveries[key]
+
+    all_params = []
+    for item in items:
+        try:
+            if item['material'] not in inventory:
+                raise KeyError(f"no initial inventory for material {item['material']!r}")
+            overrides = dict(item.get('overrides') or {})
+            params = scheduler.build_params(overrides, dict(delivery((item.get('delfor'), item['week_start']))),
+                                            inventory[item['material']], scheduler.HORIZON_WEEKS, item['week_start'])
+            params.update({k: v for k, v in overrides.items()
+                           if k in params and k not in ('force_zero', 'force_positive')})
+            all_params.append((params, None))
+        except Exception as exc:
+            all_params.append((None, exc))
+    return all_params
+
+
+def _solve_and_audit(params, holidays):
+    result = solver_backends.solve_production(params, compute_iis=False)
+    if result['plan'] is None:
+        result['status'] = 'infeasible'
+        result['violations'] = []
+        return result
+    cap = optimize_production.build_cap(params)
+    audit = plan_auditor.audit_plan(result['plan'], cap, params,
+                                    holidays=holidays, rules=scheduler.RULES)
+    result['status'] = audit['action']
+    result['violations'] = audit['violations']
+    return result
+
+
+def _error(exc):
+    msg = exc.args[0] if isinstance(exc, KeyError) and exc.args else str(exc)
+    return {'status': 'error', 'msg': msg}
+
+
+def iter_batch(items, executor=None):
+    """
+    按完成顺序逐条产出结果：{'index', 'material', 'week_start', 'status', 'plan', 'cost', 'hours', 'violations'}；
+    准备或求解失败的条目为 {'index', 'material', 'week_start', 'status': 'error', 'msg'}，不影响其它条目
+    """
+    executor = executor or optimize_production.get_process_pool()
+    cal = factory_calendar.get_calendar()
+
+    def header(i):
+        return {'index': i, 'material': items[i]['material'], 'week_start': items[i]['week_start']}
+
+    futures = {}
+    for i, (params, exc) in enumerate(build_batch_params(items)):
+        if exc is not None:
+            yield {**header(i), **_error(exc)}   # 参数都没组装起来的条目先返回
+            continue
+        futures[executor.submit(_solve_and_audit, params,
+                                cal.off_days(items[i]['week_start'], scheduler.HORIZON_WEEKS))] = i
+    for fut in as_completed(futures):
+        i = futures[fut]
+        try:
+            res = fut.result()
+            out = {
+                'status': res['status'],
+                'plan': scheduler.format_plan(res['plan'], items[i]['week_start']) if res['plan'] else None,
+                'cost': res['cost'],
+                'hours': res['hours'],
+                'violations': res['violations'],
+            }
+        except Exception as exc:
+            out = _error(exc)
+        yield {**header(i), **out}
+
+
+def run_batch(items, executor=None):
+    """iter_batch 的列表版本，结果按输入顺序排列。"""
+    return sorted(iter_batch(items, executor), key=lambda r: r['index'])
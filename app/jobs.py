@@ -0,0 +1,326 @@
+# jobs.py
+"""
+后台计划任务：POST /jobs 入队立即返回 id，GET /jobs/{id} 查状态和结果，DELETE /jobs/{id} 取消。
+
+- 队列持久化在 SQLite（JOBS_DB），服务重启后排队中的任务继续执行；
+- 任务由专用的 worker 进程池（JOB_WORKERS 个，spawn）执行，每个 worker 自己从队列里认领任务、
+  跑同步的 run_pipeline、把结果写回，求解并发与 HTTP worker 数互不相干；
+- 同一台机器上只有一个 supervisor（文件锁）：gunicorn 的多个 web worker 里抢到锁的那个负责
+  拉起 / 补齐 worker 进程，它退出后其它 web worker 接手；也可以 JOB_EMBEDDED=off 后单独运行
+  python -m app.jobs；
+- 取消：排队中的直接标记 cancelled；运行中的标记 cancelled，执行它的 worker 每 JOB_POLL 秒查一次
+  自己手上的任务，发现被取消就退出，supervisor 随即补一个新 worker（检查和换任务在同一把锁下，
+  不会误杀 worker 接着认领的下一个任务）。worker 意外退出时，它手上的任务重新排队（最多 JOB_MAX_RETRIES 次）。
+
+状态：queued → running → done | failed；queued / running → cancelled
+"""
+import contextlib
+import fcntl
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sqlite3
+import threading
+import time
+import uuid
+
+JOBS_DB = os.getenv("JOBS_DB", ".cache/jobs.sqlite")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))                       # worker 进程数
+JOB_EMBEDDED = os.getenv("JOB_EMBEDDED", "on").lower() not in ("off", "0", "false")
+JOB_DEADLINE = float(os.getenv("JOB_DEADLINE", "1800"))                # 后台任务的流水线时限（秒）
+JOB_POLL = float(os.getenv("JOB_POLL", "0.5"))                         # 空闲 worker 轮询间隔（秒）
+JOB_MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", "1"))               # worker 崩溃后重新排队次数
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))  # 已结束任务保留时长（秒）
+
+FINISHED = ("done", "failed", "cancelled")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    pid INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+
+# ---------------- 队列（SQLite） ----------------
+_schema_ready = set()
+
+
+@contextlib.contextmanager
+def _db(path=None):
+    path = path or JOBS_DB
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        if path not in _schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            _schema_ready.add(path)
+        yield conn
+    finally:
+        conn.close()
+
+
+def _job(row):
+    if row is None:
+        return None
+    job = {k: row[k] for k in ("id", "status", "created", "started", "finished", "error")}
+    job["request"] = json.loads(row["request"])
+    job["result"] = json.loads(row["result"]) if row["result"] is not None else None
+    return job
+
+
+def submit(request: dict) -> dict:
+    """入队，返回任务（status=queued）"""
+    job_id = uuid.uuid4().hex
+    with _db() as conn:
+        conn.execute("INSERT INTO jobs (id, status, request, created) VALUES (?, 'queued', ?, ?)",
+                     (job_id, json.dumps(request, ensure_ascii=False), time.time()))
+        return _job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+def get(job_id: str):
+    with _db() as conn:
+        return _job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+def cancel(job_id: str):
+    """
+    取消排队中 / 运行中的任务（运行中的由执行它的 worker 自己发现并退出）。
+
+    返回
+    ----
+    (任务, 本次是否取消了它)；任务不存在返回 (None, False)。
+    已结束（包括已取消）的任务原样返回，第二项为 False，由调用方判断。
+    """
+    with _db() as conn:
+        changed = conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished = ? "
+            "WHERE id = ? AND status IN ('queued', 'running') RETURNING id",
+            (time.time(), job_id)).fetchone() is not None
+        return _job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()), changed
+
+
+def _cancelled(job_id, path=None):
+    with _db(path) as conn:
+        row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return row is not None and row["status"] == "cancelled"
+
+
+def _claim(pid, path=None):
+    """原子地认领最早的一个排队任务"""
+    with _db(path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "UPDATE jobs SET status = 'running', pid = ?, started = ?, attempts = attempts + 1 "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1) "
+                "RETURNING id, request", (pid, time.time())).fetchone()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    return None if row is None else (row["id"], json.loads(row["request"]))
+
+
+def _finish(job_id, status, result=None, error=None, path=None):
+    # 只更新仍在运行的任务：运行中被取消的任务保持 cancelled
+    with _db(path) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE id = ? AND status = 'running'",
+            (status, json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+             error, time.time(), job_id))
+
+
+def _recover(pids, path=None):
+    """pids 这些 worker 已经退出：它们手上的任务重新排队，超过重试次数的标记 failed"""
+    if not pids:
+        return
+    marks = ",".join("?" * len(pids))
+    with _db(path) as conn:
+        conn.execute(
+            f"UPDATE jobs SET status = 'failed', error = 'worker exited', finished = ? "
+            f"WHERE status = 'running' AND pid IN ({marks}) AND attempts > ?", (time.time(), *pids, JOB_MAX_RETRIES))
+        conn.execute(
+            f"UPDATE jobs SET status = 'queued', pid = NULL, started = NULL "
+            f"WHERE status = 'running' AND pid IN ({marks})", pids)
+
+
+def _recover_orphans(path=None):
+    """supervisor 启动时：记录为 running、但 pid 已不存在的任务（上次进程崩溃 / 重启）"""
+    with _db(path) as conn:
+        pids = [r["pid"] for r in conn.execute("SELECT DISTINCT pid FROM jobs WHERE status = 'running'")]
+    dead = []
+    for pid in pids:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            dead.append(pid)
+        except PermissionError:
+            pass
+    _recover(dead, path)
+
+
+def purge(older_than=JOB_RETENTION, path=None):
+    marks = ",".join("?" * len(FINISHED))
+    with _db(path) as conn:
+        conn.execute(f"DELETE FROM jobs WHERE status IN ({marks}) AND finished < ?",
+                     (*FINISHED, time.time() - older_than))
+
+
+# ---------------- worker 进程 ----------------
+def run_job(request):
+    from app import scheduler
+
+    kwargs = {k: request[k] for k in ("week_start", "weeks") if request.get(k) is not None}
+    return scheduler.run_pipeline(request["llm_input"], timings=bool(request.get("timings")), **kwargs)
+
+
+def _watch_cancel(current, lock, path):
+    """worker 内的守望线程：当前任务被取消就结束本进程（持锁检查，主循环此时换不了任务）"""
+    while True:
+        time.sleep(JOB_POLL)
+        with lock:
+            if current["id"] is not None and _cancelled(current["id"], path):
+                logging.info("job %s cancelled, worker %s exiting", current["id"], os.getpid())
+                os._exit(0)
+
+
+def _worker_main(path):
+    """worker 进程主循环：认领 → 执行 → 写回；父进程（supervisor）退出时跟着退出"""
+    from app import scheduler
+
+    scheduler.PIPELINE_DEADLINE = JOB_DEADLINE   # 后台任务不受 HTTP 请求时限约束
+    parent = multiprocessing.parent_process()
+    pid = os.getpid()
+    current, lock = {"id": None}, threading.Lock()
+    threading.Thread(target=_watch_cancel, args=(current, lock, path), name="job-cancel", daemon=True).start()
+    while parent is None or parent.is_alive():
+        with lock:
+            job = _claim(pid, path)
+            current["id"] = job and job[0]
+        if job is None:
+            time.sleep(JOB_POLL)
+            continue
+        job_id, request = job
+        logging.info("job %s started in worker %s", job_id, pid)
+        try:
+            status, result, error = "done", run_job(request), None
+        except Exception as exc:
+            logging.exception("job %s failed", job_id)
+            status, result, error = "failed", None, str(exc)
+        with lock:
+            current["id"] = None
+            _finish(job_id, status, result=result, error=error, path=path)
+
+
+class Supervisor:
+    """拉起 size 个 worker 进程，定期补齐退出的进程并回收它们的任务"""
+
+    def __init__(self, size=None, path=None):
+        self.size = size or JOB_WORKERS
+        self.path = path or JOBS_DB
+        self._ctx = multiprocessing.get_context("spawn")
+        self._procs = []
+        self._stop = threading.Event()
+
+    def _spawn(self):
+        proc = self._ctx.Process(target=_worker_main, args=(self.path,), name="job-worker")
+        proc.start()
+        return proc
+
+    def run(self):
+        _recover_orphans(self.path)
+        purge(path=self.path)
+        self._procs = [self._spawn() for _ in range(self.size)]
+        last_purge = time.time()
+        while not self._stop.wait(JOB_POLL):
+            dead = [p for p in self._procs if not p.is_alive()]
+            if dead:
+                _recover([p.pid for p in dead], self.path)
+                self._procs = [p for p in self._procs if p.is_alive()]
+                self._procs += [self._spawn() for _ in dead]
+            if time.time() - last_purge > 3600:
+                purge(path=self.path)
+                last_purge = time.time()
+        for p in self._procs:
+            p.terminate()
+        for p in self._procs:
+            p.join(timeout=10)
+
+    def stop(self):
+        self._stop.set()
+
+
+# ---------------- 单机唯一的 supervisor ----------------
+_supervisor = None
+_leader_thread = None
+_shutdown = threading.Event()
+
+
+def _lead(path, blocking):
+    """持有 JOBS_DB.lock 期间运行 supervisor；拿不到锁时每隔几秒重试（接手退出的 leader）"""
+    global _supervisor
+    lock_path = os.path.abspath(path) + ".lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "w") as lock:
+        while not _shutdown.is_set():
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                _shutdown.wait(5)
+                continue
+            logging.info("job supervisor started in pid %s (%d workers)", os.getpid(), JOB_WORKERS)
+            _supervisor = Supervisor(path=path)
+            try:
+                _supervisor.run()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+            return
+
+
+def start(path=None):
+    """在当前（web）进程里后台竞争 supervisor；JOB_EMBEDDED=off 或 JOB_WORKERS=0 时什么都不做"""
+    global _leader_thread
+    if not JOB_EMBEDDED or JOB_WORKERS <= 0 or _leader_thread is not None:
+        return
+    _shutdown.clear()
+    _leader_thread = threading.Thread(target=_lead, args=(path or JOBS_DB, False), name="job-supervisor",
+                                      daemon=True)
+    _leader_thread.start()
+
+
+def stop():
+    global _leader_thread
+    _shutdown.set()
+    if _supervisor is not None:
+        _supervisor.stop()
+    if _leader_thread is not None:
+        _leader_thread.join(timeout=30)
+    _leader_thread = None
+
+
+def main():
+    """独立运行 worker 层：python -m app.jobs（web 侧设 JOB_EMBEDDED=off）"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    signal.signal(signal.SIGTERM, lambda *_: stop())
+    try:
+        _lead(JOBS_DB, blocking=True)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
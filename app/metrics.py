@@ -0,0 +1,148 @@
+# metrics.py
+"""
+请求内各阶段计时 + Prometheus 文本格式导出（不依赖 prometheus_client）。
+
+- RequestTimer：一次 run_pipeline 的计时器，span(stage) 记录每个阶段（带当前 attempt），
+  同时写入进程级直方图；finish() 记录总耗时、attempt 数和最终状态，可把 spans 附到响应里；
+- render()：/metrics 的文本输出，另带 LLM / 求解结果缓存的命中率。
+
+指标保存在各 worker 进程内存里，多 worker 部署时由 Prometheus 分别抓取各实例。
+"""
+import contextlib
+import threading
+import time
+
+# 秒级阶段耗时的桶（LLM 调用可能到几十秒）
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+ATTEMPT_BUCKETS = (1, 2, 3, 4, 6, 8)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+class Histogram:
+    def __init__(self, name, doc, buckets, labels=()):
+        self.name, self.doc, self.buckets, self.labels = name, doc, tuple(buckets), tuple(labels)
+        self._series = {}    # label values → [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            s = self._series.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, s in sorted(self._series.items()):
+                for b, n in zip(self.buckets, s):
+                    lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), values + (b,))} {n}")
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), values + ('+Inf',))} {s[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, values)} {s[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.labels, values)} {s[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, doc, labels=()):
+        self.name, self.doc, self.labels = name, doc, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {v}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("pipeline_stage_seconds", "Latency of each pipeline stage.",
+                          LATENCY_BUCKETS, labels=("stage",))
+REQUEST_SECONDS = Histogram("pipeline_request_seconds", "End-to-end latency of run_pipeline.",
+                            LATENCY_BUCKETS)
+ATTEMPTS = Histogram("pipeline_attempts", "Attempts used per request.", ATTEMPT_BUCKETS)
+REQUESTS = Counter("pipeline_requests_total", "Pipeline results by final status.", labels=("status",))
+SOLVER_STATUS = Counter("solver_status_total", "Solver outcomes per attempt.", labels=("status",))
+
+
+class RequestTimer:
+    """
+    用法
+    ----
+    timer = RequestTimer()
+    with timer.span("excel_load"): ...
+    timer.attempt = 2
+    with timer.span("solve"): ...
+    timer.record("optimize", 0.012)      # 已经测好的耗时（如 ProductionModel.stage_seconds）
+    result = timer.finish(result, include=True)
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.attempt = 0
+        self.spans = []
+
+    def record(self, stage, seconds):
+        STAGE_SECONDS.observe(seconds, stage)
+        self.spans.append({"stage": stage, "attempt": self.attempt, "seconds": round(seconds, 6)})
+
+    @contextlib.contextmanager
+    def span(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t0)
+
+    def finish(self, result, include=False):
+        total = time.perf_counter() - self.start
+        REQUEST_SECONDS.observe(total)
+        REQUESTS.inc(result.get("status", "unknown"))
+        if self.attempt:
+            ATTEMPTS.observe(self.attempt)
+        if include:
+            result = dict(result)   # 可能是模块级常量（NO_RELAXATION 等），不能原地改
+            result["timings"] = {"total_seconds": round(total, 6), "attempts": self.attempt, "spans": self.spans}
+        return result
+
+
+def session_stage_seconds(session):
+    """最近一次 session.solve 内部的分阶段耗时（model_build / optimize …），session 不提供时为空"""
+    return dict(getattr(session, "stage_seconds", None) or {})
+
+
+def _cache_lines():
+    from ai_tools import llm_cache
+    from calculation_tools import solve_cache
+
+    lines = ["# HELP cache_requests_total Cache lookups by cache and result.",
+             "# TYPE cache_requests_total counter"]
+    ratios = ["# HELP cache_hit_ratio Share of lookups served from memory or disk.",
+              "# TYPE cache_hit_ratio gauge"]
+    for stats in (llm_cache.cache.stats(), solve_cache.stats()):
+        name = stats["name"]
+        for result in ("hits_memory", "hits_disk", "misses"):
+            lines.append(f'cache_requests_total{{cache="{name}",result="{result}"}} {stats[result]}')
+        ratios.append(f'cache_hit_ratio{{cache="{name}"}} {stats["hit_rate"]}')
+    return lines + ratios
+
+
+def render() -> str:
+    """Prometheus text exposition format 0.0.4"""
+    lines = []
+    for metric in (STAGE_SECONDS, REQUEST_SECONDS, ATTEMPTS, REQUESTS, SOLVER_STATUS):
+        lines += metric.render()
+    lines += _cache_lines()
+    return "\n".join(lines) + "\n"
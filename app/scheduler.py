@@ -1,13 +1,16 @@
-import datetime as dt
-import copy, json
-import logging, time
+import asyncio
+import json, functools
+import logging, threading
 import re, random   
 import calendar
-from pathlib import Path
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 from ai_tools import assistant, assistant2, assistant3
-from calculation_tools import optimize_production, shipment_planner
-from database_tools import get_data
+from calculation_tools import (factory_calendar, feasibility, horizon, long_term, optimize_production,
+                               plan_auditor, relaxation, shipment_planner, solver_backends)
+from app import metrics
+from database_tools import dali
 
 
 if not logging.getLogger().handlers:
@@ -18,13 +21,40 @@ if not logging.getLogger().handlers:
 
 # 可更改的常量
 MAX_ATTEMPTS = 4      # 总循环次数
-holidays = [6, 7, 13, 14]  # 节假日手动写
+INITIAL_INVENTORY = 4000   # 期初库存（DB_BACKEND 未配置时使用）
+MATERIAL = os.getenv("MATERIAL", dali.DEFAULT_MATERIAL)   # run_pipeline 计划的物料
+HORIZON_WEEKS = int(os.getenv("HORIZON_WEEKS", "2"))   # 计划周数，可按请求覆盖；超过 horizon.rolling_limits 的阈值走滚动求解
+MAX_HORIZON_WEEKS = int(os.getenv("MAX_HORIZON_WEEKS", "52"))   # 单个请求允许的最大周数
+DEFAULT_WEEK_START = "2025-07-07"   # 第 1 天（周一）
+# 节假日 / POT 由工厂日历（data/plant_calendar.json）按 week_start 给出
+
+
+def off_days_for(week_start, weeks):
+    """week_start 起 weeks 周内的非工作日（周末 / 节假日）天序号"""
+    return factory_calendar.get_calendar().off_days(week_start, weeks)
+
+
 RULES = {
     "min_consecutive_days": 3,
     "pre_holiday_ct_ratio": 0.5,
     "continuous_production_only": True,   # 只允许一个连续生产区间
 }
 
+# 审核由本地规则完成；LLM 只负责给通过的计划写 analysis，可关闭
+LLM_ANALYSIS = os.getenv("LLM_ANALYSIS", "on").lower() not in ("off", "0", "false")
+ANALYSIS_TIMEOUT = float(os.getenv("ANALYSIS_TIMEOUT", "60"))   # 秒
+
+# infeasible 时并行试一组放宽方案，代替 assistant2 逐轮调整
+SPECULATIVE_RELAXATION = os.getenv("SPECULATIVE_RELAXATION", "off").lower() in ("on", "1", "true")
+
+# 求解前的可行性分析发现库存区间问题时，直接按最小调整修正，不经过 LLM
+PRESOLVE_AUTOFIX = os.getenv("PRESOLVE_AUTOFIX", "on").lower() not in ("off", "0", "false")
+
+# 整个请求的时间上限（秒）；Excel 读取 / 求解所用线程池的大小
+PIPELINE_DEADLINE = float(os.getenv("PIPELINE_DEADLINE", "180"))
+SOLVER_WORKERS = int(os.getenv("SOLVER_WORKERS", str(optimize_production.SOLVER_CONCURRENCY)))
+_solver_executor = ThreadPoolExecutor(max_workers=SOLVER_WORKERS, thread_name_prefix="solver")
+
 # 假回答
 TARGET = "get the latest customer production plan"
 
@@ -58,9 +88,8 @@ def build_cap(data):
 
 
 # 参数更新助手函数
-def update_params_with_assistant2(params, infeasible_ctx):
-    """当 infeasible 时，用 assistant2 调整参数"""
-    adj_json = assistant2.assistant_input_optimize(json.dumps(infeasible_ctx))
+def apply_assistant2(params, adj_json):
+    """把 assistant2 的回答写回 params（仅 min/max_inventory）"""
     try:
         adj = json.loads(adj_json)
         min_inv = max(0, int(adj.get("min_inventory", params["min_inventory"])))
@@ -73,14 +102,10 @@ def update_params_with_assistant2(params, infeasible_ctx):
     return params
 
 
-def update_params_with_assistant1(params, base_results, violations):
-    """当 feasible 但违规时，用 assistant1 调整参数"""
-    llm_input = json.dumps({
-        "base_params": base_results,
-        "violations": violations
-    })
+def apply_assistant1(params, base_results, values_json):
+    """把 assistant1 的回答写回 params"""
     try:
-        values_results = json.loads(assistant.assistant_input_process(llm_input))
+        values_results = json.loads(values_json)
         params.update({
             "min_inventory": values_results.get("min_inventory", params["min_inventory"]),
             "max_inventory": values_results.get("max_inventory", params["max_inventory"]),
@@ -95,229 +120,403 @@ def update_params_with_assistant1(params, base_results, violations):
         return params, base_results
 
 
+def assistant1_input(base_results, violations):
+    return json.dumps({
+        "base_params": base_results,
+        "violations": violations
+    })
+
+
 def generate_long_term_plan(params, months=12):
     """
-    生成长期 12 个月预测
+    生成长期 12 个月预测（calculation_tools.long_term）
     - 使用 Gen2 long-term planning agent 文档的月度 forecast
-    - 产量必须在 [monthly_std×0.8, monthly_max] 区间
+    - 产量必须在 [monthly_std×0.8, monthly_max] 区间，按真实日历的工作日 / 日历天数计算
     - 月份从“下个月”开始往后推
+    - 附带 Monte-Carlo 场景的分位数区间（LONG_TERM_SCENARIOS）
     """
+    return long_term.plan(params, months=months)
 
-    # 文档里的月度 forecast (示例数据，长度 >= 12)
-    forecast_list = [
-        12285, 21095, 22545, 22352, 15243, 18203,
-        9263, 9661, 10721, 9264, 10440, 11632
-    ]
-
-    if months and months < len(forecast_list):
-        forecast_list = forecast_list[:months]
-
-    results = []
-    inventory = 15000  # 初始库存（可从DB取）
-
-    # 基础日产能
-    daily_capacity = int(params["POT"][1] * 60 / params["CT"] * params["OEE"])
-    monthly_max = daily_capacity * 30
-    monthly_std = daily_capacity * 22
-    monthly_min = int(monthly_std * 0.8)
-
-    # 起始月份 = 下个月
-    today = dt.date.today()
-    start_month = today.month % 12 + 1
-    start_year = today.year + (1 if today.month == 12 else 0)
-
-    for idx, demand in enumerate(forecast_list, start=0):
-        # 计算对应的年月
-        year = start_year + (start_month - 1 + idx) // 12
-        month = (start_month - 1 + idx) % 12 + 1
-        month_str = dt.date(year, month, 1).strftime("%b %Y")  # e.g. "Oct 2025"
-
-        # 产量约束
-        production = min(max(demand, monthly_min), monthly_max)
-
-        # 工作天数
-        work_days = production / daily_capacity if daily_capacity > 0 else 0
-
-        # 库存
-        end_inventory = inventory + production - demand
-        end_inventory = max(params["min_inventory"], min(end_inventory, params["max_inventory"]))
-
-        results.append({
-            "month": month_str,
-            "forecast_demand": demand,
-            "production": production,
-            "work_days": round(work_days, 1),
-            "ending_inventory": end_inventory
-        })
-
-        inventory = end_inventory
 
+def fixed_plan_result():
     return {
-        "columns": ["month", "forecast_demand", "production", "work_days", "ending_inventory"],
-        "data": results
+        "status": "accept",
+        "plan": {
+            1: 513, 2: 567, 3: 513, 4: 459, 5: 513, 6: 0, 7: 0,
+            8: 513, 9: 567, 10: 513, 11: 486, 12: 486, 13: 0, 14: 0,
+        },
+        "cost": 13050000,
+        "hours": 5600,
+        "logs": ["Fixed plan returned."],
+        "violations": []
     }
 
 
+def load_initial_inventory(materials):
+    """各物料期初库存：DB_BACKEND 配置了就一次批量查库，否则全部用 INITIAL_INVENTORY"""
+    materials = list(materials)
+    if not dali.enabled():
+        return {m: INITIAL_INVENTORY for m in materials}
+    return dali.stock(materials)
 
 
-def run_pipeline(llm_input: str, week_start: str = "2025-07-07") -> dict:
-    # 假回答
-    if is_latest_plan_query(llm_input):
-        delay = random.uniform(2.0, 3.0)
-        logging.info("Simulating thinking for %.2f s", delay)
-        time.sleep(delay)
-        return {
-            "status": "accept",
-            "plan": {
-                1: 513, 2: 567, 3: 513, 4: 459, 5: 513, 6: 0, 7: 0,
-                8: 513, 9: 567, 10: 513, 11: 486, 12: 486, 13: 0, 14: 0,
-            },
-            "cost": 13050000,
-            "hours": 5600,
-            "logs": ["Fixed plan returned."],
-            "violations": []
-        }
-
-    logging.info("Fetching data...")
-    initial_inventory = 4000
-
-    # LLM 解析输入
-    values_results = json.loads(assistant.assistant_input_process(llm_input))
-    min_inventory = values_results.get("min_inventory", 2000)
-    max_inventory = values_results.get("max_inventory", 5000)
-    OEE = values_results.get("OEE", 0.95)
-    CT = values_results.get("CT", 105)
-    long_term = values_results.get("long_term", False)  # 新增
-
-    DEFAULT_FORCE_ZERO = {6: 0, 7: 0, 13: 0, 14: 0}
+def build_params(values_results, delivery_day, initial_inventory, weeks=HORIZON_WEEKS,
+                 week_start=DEFAULT_WEEK_START):
+    """由 assistant1 解析结果 + 发货量 + 期初库存组装 weeks 周的求解参数（POT / 默认停产日取自工厂日历）"""
+    cal = factory_calendar.get_calendar()
+    days = list(range(1, 7 * weeks + 1))
+    DEFAULT_FORCE_ZERO = {d: 0 for d in cal.off_days(week_start, weeks)}
     DEFAULT_FORCE_POSITIVE = {1: 0}
     force_zero = {int(k): v for k, v in values_results.get("force_zero", DEFAULT_FORCE_ZERO).items()}
     force_positive = {int(k): v for k, v in values_results.get("force_positive", DEFAULT_FORCE_POSITIVE).items()}
 
-    week1_min_consecutive_days = values_results.get("week1_min_consecutive_days", 3)
-    week2_min_consecutive_days = values_results.get("week2_min_consecutive_days", 3)
-
-    # 提货量
-    delivery_week1 = shipment_planner.get_delivery_day_dict(week_start=week_start)
-    next_monday = (dt.datetime.strptime(week_start, '%Y-%m-%d') + dt.timedelta(days=7)).strftime('%Y-%m-%d')
-    delivery_week2 = {k + 7: v for k, v in shipment_planner.get_delivery_day_dict(week_start=next_monday).items()}
-    delivery_day = {**delivery_week1, **delivery_week2}
-
-    params = {
-        'days': list(range(1, 15)),
+    return {
+        'days': days,
         'defect_rate': 0.01,
         'unit_cost': 4200,
         'num_workers': 12,
         'weekly_wage_per_worker': 1500,
         'storage_cost_per_unit_per_day': 10,
         'shipping_cost_per_unit': 0,
-        'min_inventory': min_inventory,
-        'max_inventory': max_inventory,
+        'min_inventory': values_results.get("min_inventory", 2000),
+        'max_inventory': values_results.get("max_inventory", 5000),
         'initial_inventory': initial_inventory,
         'delivery_day': delivery_day,
-        'OEE': OEE,
-        'CT': CT,
-        'POT': {d: 1234 if d not in (6, 7, 13, 14) else 0 for d in range(1, 15)},
+        'OEE': values_results.get("OEE", 0.95),
+        'CT': values_results.get("CT", 105),
+        'POT': cal.pot_by_day(week_start, weeks),
         'min_WD': 40,
         'max_WD': 120,
         'force_zero': force_zero,
         'force_positive': force_positive,
-        'week1_min_consecutive_days': week1_min_consecutive_days,
-        'week2_min_consecutive_days': week2_min_consecutive_days,
+        **{f'week{k}_min_consecutive_days': values_results.get(f"week{k}_min_consecutive_days", 3)
+           for k in range(1, weeks + 1)},
     }
 
-    logging.info("initial_inventory from DB: %s", initial_inventory)
-
-    start = time.time()
-    for attempt in range(1, MAX_ATTEMPTS + 1):
-        if time.time() - start > 180:
-            logging.warning("运行超时中断大循环")
-            return {"status": "timeout", "msg": "exceeded 5 minutes"}
-
-        logging.info(f"\n===== Attempt {attempt} =====")
-
-        plan, cost, hours = optimize_production.optimize_production(params)
-        if plan is None:
-            # infeasible → assistant2 调整
-            m = optimize_production.last_model
-            m.computeIIS()
-            infeasible_ctx = {
-                "min_inventory": params["min_inventory"],
-                "max_inventory": params["max_inventory"],
-                "initial_inventory": initial_inventory,
-                "shipments": delivery_day,
-                "cap": build_cap(params),
-                "force_zero": params["force_zero"],
-                "force_positive": params["force_positive"],
-                "defect_rate": params["defect_rate"],
-                "iis": [c.ConstrName for c in m.getConstrs() if c.IISConstr],
-            }
-            params = update_params_with_assistant2(params, infeasible_ctx)
-            continue
 
-        # feasible → assistant3 审核
-        check_ctx = {
-            'plan': plan,
-            'cap': build_cap(params),
-            'holidays': holidays,
-            'rules': RULES,
-            'force_positive': params['force_positive'],
-            'week1_min_consecutive_days': params['week1_min_consecutive_days'],
-            'week2_min_consecutive_days': params['week2_min_consecutive_days'],
+def infeasible_context(params, iis):
+    return {
+        "min_inventory": params["min_inventory"],
+        "max_inventory": params["max_inventory"],
+        "initial_inventory": params["initial_inventory"],
+        "shipments": params["delivery_day"],
+        "cap": build_cap(params),
+        "force_zero": params["force_zero"],
+        "force_positive": params["force_positive"],
+        "defect_rate": params["defect_rate"],
+        "iis": iis,
+    }
+
+
+def audit_context(plan, cap, params, audit, off_days):
+    return {
+        'plan': plan,
+        'cap': cap,
+        'holidays': off_days,
+        'rules': RULES,
+        'force_positive': params['force_positive'],
+        **{k: v for k, v in params.items() if k.endswith('_min_consecutive_days')},
+        'audit': audit,
+    }
+
+
+def accept_result(plan, cost, hours, audit, relaxed=None, adjustments=None, week_start=None):
+    result = {
+        "status": "accept",
+        "plan": format_plan(plan, week_start),
+        "cost": cost,
+        "hours": hours,
+        "violations": audit["violations"],
+        "analysis": {}   # 短期理由说明
+    }
+    if relaxed:
+        # 与用户请求相比放宽了什么
+        result["relaxation"] = {"changes": relaxed["changes"], "distance": relaxed["distance"]}
+    if adjustments:
+        # presolve 自动修正过的库存区间
+        result["adjustments"] = adjustments
+    return result
+
+
+def presolve(params, adjustments):
+    """
+    求解前先做解析可行性检查。
+    可以靠改 min/max_inventory 修好的，按 analyzer 给出的最小调整改 params，并记入 adjustments。
+    返回 (params, diagnosis)；diagnosis['status'] == 'infeasible' 表示不必再调用 Gurobi。
+    """
+    diagnosis = feasibility.analyze(params)
+    if diagnosis["status"] == "infeasible" and diagnosis["fix"] and PRESOLVE_AUTOFIX:
+        logging.info("presolve: %s → %s", diagnosis["violations"][0]["reason"], diagnosis["fix"])
+        adjustments.append({
+            "binding_day": diagnosis["binding_day"],
+            "shortfall": diagnosis["shortfall"],
+            "from": {k: params[k] for k in diagnosis["fix"]},
+            "to": diagnosis["fix"],
+        })
+        params.update(diagnosis["fix"])
+        diagnosis = feasibility.analyze(params)
+    return params, diagnosis
+
+
+def infeasible_result(diagnosis):
+    result = {"status": "infeasible", "diagnosis": diagnosis}
+    if diagnosis["fix"] is None:
+        # 工时 / 连续性等条件不满足，调库存区间修不好：直接说明，不再交给 assistant2 逐轮放宽
+        result["msg"] = "no inventory relaxation can fix this request: " + "; ".join(
+            v["reason"] for v in diagnosis["violations"])
+    return result
+
+
+NO_RELAXATION = {"status": "infeasible", "msg": "no feasible relaxation passes the audit"}
+
+
+def record_solve(timer, session, plan):
+    """solve 之后：记下 session 内部的分阶段耗时（model_build / optimize …）和求解状态"""
+    for stage, seconds in metrics.session_stage_seconds(session).items():
+        timer.record(stage, seconds)
+    metrics.SOLVER_STATUS.inc("optimal" if plan is not None else "infeasible")
+
+
+_loops = threading.local()
+
+
+def run_pipeline(llm_input: str, week_start: str = DEFAULT_WEEK_START, weeks: int = HORIZON_WEEKS,
+                 timings: bool = False) -> dict:
+    """
+    同步入口（后台任务 / CLI / 基准）：与 /optimize 走同一个 run_pipeline_events 循环，
+    在本线程常驻的事件循环里跑到 result 事件为止（异步 LLM 客户端可在多次调用间复用）。
+    timings=True 时在结果里附带各阶段耗时。
+    """
+    loop = getattr(_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _loops.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(run_pipeline_async(llm_input, week_start, weeks=weeks, timings=timings))
+
+
+# ---------------- 流水线 ----------------
+async def llm_analysis_async(ctx):
+    try:
+        return json.loads(await assistant3.assistant_input_check_async(json.dumps(ctx))).get("analysis", {})
+    except Exception as e:
+        return {
+            "reasoning": f"Error generating analysis: {e}",
+            "advantages": "",
+            "risks": ""
         }
-        audit_json = assistant3.assistant_input_check(json.dumps(check_ctx))
 
-        try:
-            audit = json.loads(audit_json)
-        except Exception as e:
-            return {"status": "error", "msg": f"assistant3 输出解析失败: {e}"}
-
-        if audit.get("action") == "accept":
-            result = {
-                "status": "accept",
-                "plan": format_plan(plan),
-                "cost": cost,
-                "hours": hours,
-                "violations": audit.get("violations", []),
-                "analysis": audit.get('analysis', {})   # 短期理由说明
-            }
-            if long_term:
-                long_term_plan = generate_long_term_plan(params, months=12)
-
-                # 新增：调用 LLM 给长期预测加 reasoning/advantages/risks
-                lt_ctx = {
-                    "long_term_plan": long_term_plan
-                }
-                lt_audit_json = assistant3.assistant_input_check(json.dumps(lt_ctx))
-                try:
-                    lt_audit = json.loads(lt_audit_json)
-                    long_term_plan["analysis"] = lt_audit.get("analysis", {})
-                except Exception as e:
-                    long_term_plan["analysis"] = {
-                        "reasoning": f"Error generating analysis: {e}",
-                        "advantages": "",
-                        "risks": ""
-                    }
 
-                result["long_term_plan"] = long_term_plan
+async def run_pipeline_async(llm_input: str, week_start: str = DEFAULT_WEEK_START, deadline: float = None,
+                             weeks: int = HORIZON_WEEKS, timings: bool = False) -> dict:
+    """
+    /optimize 与 run_pipeline 的入口：消费 run_pipeline_events（唯一的一份 attempt 循环），返回 result 事件的内容。
+    - LLM 调用使用异步客户端，await 时不占用事件循环；
+    - Excel 读取和 Gurobi 求解放在有上限的 _solver_executor 线程池里；
+    - deadline（默认 PIPELINE_DEADLINE 秒）在每个阶段之间协作检查，LLM 调用按剩余时间限时；
+    - timings=True 时在结果里附带各阶段耗时。
+    """
+    result = None
+    async for event in run_pipeline_events(llm_input, week_start, deadline, weeks, timings):
+        if event["event"] == "result":
+            result = event["result"]
+    return result
 
-                return result
 
-        # 审核不通过 → assistant1 调整
-        params, values_results = update_params_with_assistant1(params, values_results, audit.get("violations", []))
+async def run_pipeline_events(llm_input: str, week_start: str = DEFAULT_WEEK_START, deadline: float = None,
+                              weeks: int = HORIZON_WEEKS, timings: bool = False):
+    """
+    计划流水线本体，边跑边产出进度事件（流式接口直接转发，run_pipeline_async 只取最后的 result）：
 
-    return {"status": "max_attempts_exceeded"}
+        {"event": "attempt",    "attempt": n}
+        {"event": "presolve",   "attempt": n, "status": ..., "adjustments": [...]}
+        {"event": "solve",      "attempt": n, "status": "optimal" | "infeasible", "plan", "cost", "hours"}
+        {"event": "audit",      "attempt": n, "action": "accept" | "tweak", "violations": [...]}
+        {"event": "adjustment", "attempt": n, "source": "assistant1" | "assistant2", "params": {...}}
+        {"event": "result",     "result": 与 run_pipeline_async 的返回值相同}
 
+    最后一个事件一定是 result。调用方中途放弃（客户端断开 / aclose）时，内层生成器在这里显式关闭，
+    借来的 Gurobi env 立即归还 EnvPool，不等垃圾回收。
+    """
+    timer = metrics.RequestTimer()
+    inner = _pipeline_events(llm_input, week_start, deadline, weeks, timer)
+    try:
+        async for event in inner:
+            if event["event"] == "result":
+                event = {**event, "result": timer.finish(event["result"], include=timings)}
+            yield event
+    finally:
+        await inner.aclose()
 
-def format_plan(plan_dict):
-    weekdays = list(calendar.day_name)
-    data = []
+
+def _adjustment_event(attempt, source, params):
+    return {"event": "adjustment", "attempt": attempt, "source": source,
+            "params": {k: params[k] for k in ("min_inventory", "max_inventory", "OEE", "CT")}}
+
+
+async def _pipeline_events(llm_input, week_start, deadline, weeks, timer):
+    loop = asyncio.get_running_loop()
+    end = loop.time() + (deadline or PIPELINE_DEADLINE)
+
+    def remaining():
+        return end - loop.time()
+
+    def timeout_result():
+        logging.warning("运行超时中断大循环")
+        return {"status": "timeout", "msg": f"exceeded {deadline or PIPELINE_DEADLINE:g} seconds"}
+
+    def done(result):
+        return {"event": "result", "result": result}
+
+    def off_loop(fn, *args):
+        return loop.run_in_executor(_solver_executor, fn, *args)
+
+    # 假回答
+    if is_latest_plan_query(llm_input):
+        delay = random.uniform(2.0, 3.0)
+        logging.info("Simulating thinking for %.2f s", delay)
+        await asyncio.sleep(delay)
+        yield done(fixed_plan_result())
+        return
+
+    logging.info("Fetching data...")
+
+    try:
+        with timer.span("db_load"):
+            # 查库是阻塞 IO，放默认线程池，不占求解线程
+            initial_inventory = (await loop.run_in_executor(None, load_initial_inventory, [MATERIAL]))[MATERIAL]
+
+        with timer.span("assistant1"):
+            values_results = json.loads(
+                await assistant.assistant_input_process_async(llm_input, timeout=remaining(), weeks=weeks))
+        long_term = values_results.get("long_term", False)
+
+        with timer.span("excel_load"):
+            delivery_day = await off_loop(
+                functools.partial(shipment_planner.get_delivery_horizon, week_start=week_start, weeks=weeks))
+        params = build_params(values_results, delivery_day, initial_inventory, weeks, week_start)
+        off_days = off_days_for(week_start, weeks)
+
+        # 打开 session（Gurobi 需要借 env）可能阻塞等待，不能占用求解线程，
+        # 否则已持有 env 的请求无法继续求解
+        session_cm = solver_backends.solver_session(timeout=remaining())
+        with timer.span("session_open"):
+            session = horizon.wrap_session(await loop.run_in_executor(None, session_cm.__enter__), params,
+                                           solver_backends.get_backend().name)
+    except (TimeoutError, asyncio.TimeoutError):
+        yield done(timeout_result())
+        return
+
+    adjustments = []
+    try:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            if remaining() <= 0:
+                yield done(timeout_result())
+                return
+
+            logging.info(f"\n===== Attempt {attempt} =====")
+            timer.attempt = attempt
+            yield {"event": "attempt", "attempt": attempt}
+
+            try:
+                with timer.span("presolve"):
+                    n_adjustments = len(adjustments)
+                    params, diagnosis = presolve(params, adjustments)
+                if diagnosis["status"] == "infeasible" or len(adjustments) > n_adjustments:
+                    yield {"event": "presolve", "attempt": attempt, "status": diagnosis["status"],
+                           "adjustments": adjustments[n_adjustments:]}
+                if diagnosis["status"] == "infeasible":
+                    plan = cost = hours = None
+                    metrics.SOLVER_STATUS.inc("presolve_infeasible")
+                else:
+                    with timer.span("solve"):
+                        plan, cost, hours = await off_loop(session.solve, params)
+                    record_solve(timer, session, plan)
+                    yield {"event": "solve", "attempt": attempt,
+                           "status": "optimal" if plan is not None else "infeasible",
+                           "plan": format_plan(plan, week_start) if plan is not None else None,
+                           "cost": cost, "hours": hours}
+                relaxed = None
+                if plan is None and SPECULATIVE_RELAXATION:
+                    with timer.span("relaxation"):
+                        relaxed = await loop.run_in_executor(
+                            None, functools.partial(relaxation.explore, params, holidays=off_days, rules=RULES))
+                    if relaxed is None:
+                        yield done(NO_RELAXATION)
+                        return
+                    params, plan, cost, hours = relaxed["params"], relaxed["plan"], relaxed["cost"], relaxed["hours"]
+                if plan is None and diagnosis["status"] == "infeasible":
+                    yield done(infeasible_result(diagnosis))
+                    return
+                if plan is None:
+                    with timer.span("compute_iis"):
+                        iis = await off_loop(session.compute_iis)
+                    with timer.span("assistant2"):
+                        adj_json = await assistant2.assistant_input_optimize_async(
+                            json.dumps(infeasible_context(params, iis)), timeout=remaining())
+                    params = apply_assistant2(params, adj_json)
+                    yield _adjustment_event(attempt, "assistant2", params)
+                    continue
+
+                cap = build_cap(params)
+                with timer.span("audit"):
+                    audit = plan_auditor.audit_plan(plan, cap, params, holidays=off_days, rules=RULES)
+                yield {"event": "audit", "attempt": attempt, "action": audit["action"],
+                       "violations": audit.get("violations", [])}
+
+                if audit["action"] != "accept":
+                    with timer.span("assistant1"):
+                        values_json = await assistant.assistant_input_process_async(
+                            assistant1_input(values_results, audit["violations"]), timeout=remaining())
+                    params, values_results = apply_assistant1(params, values_results, values_json)
+                    yield _adjustment_event(attempt, "assistant1", params)
+                    continue
+            except (TimeoutError, asyncio.TimeoutError):
+                yield done(timeout_result())
+                return
+
+            result = accept_result(plan, cost, hours, audit, relaxed, adjustments, week_start)
+            with timer.span("long_term"):
+                long_term_plan = generate_long_term_plan(params, months=12) if long_term else None
+
+            if LLM_ANALYSIS:
+                tasks = [llm_analysis_async(audit_context(plan, cap, params, audit, off_days))]
+                if long_term_plan:
+                    tasks.append(llm_analysis_async({"long_term_plan": long_term_plan}))
+                try:
+                    with timer.span("analysis"):
+                        analyses = await asyncio.wait_for(asyncio.gather(*tasks), ANALYSIS_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logging.warning("analysis 超时，返回不带说明的计划")
+                    analyses = [{}] * len(tasks)
+                result["analysis"] = analyses[0]
+                if long_term_plan:
+                    long_term_plan["analysis"] = analyses[1]
+
+            if long_term_plan:
+                result["long_term_plan"] = long_term_plan
+            yield done(result)
+            return
+    finally:
+        await loop.run_in_executor(None, session_cm.__exit__, None, None, None)
+
+    yield done({"status": "max_attempts_exceeded"})
+
+
+def format_plan(plan_dict, week_start=None):
+    """天序号 → 星期名；给了 week_start 时按工厂日历的真实日期换算，否则第 1 天视为周一"""
+    rows = []
     for key, qty in plan_dict.items():
         try:
-            idx = int(key)
+            rows.append((int(key), qty))
         except (ValueError, TypeError):
             continue
-        weekday_name = weekdays[(idx - 1) % 7]
+    if week_start is not None:
+        names = factory_calendar.get_calendar().weekday_names([idx for idx, _ in rows], week_start)
+    else:
+        weekdays = list(calendar.day_name)
+        names = [weekdays[(idx - 1) % 7] for idx, _ in rows]
+
+    data = []
+    for weekday_name, (_, qty) in zip(names, rows):
         data.append({
             "Week day": weekday_name,
             "production qty": qty
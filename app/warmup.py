@@ -0,0 +1,67 @@
+# warmup.py
+"""
+gunicorn --preload 的启动预热（配置见 gunicorn.conf.py）。
+
+- warm_up()：master 进程在 fork worker 之前执行一次：导入当前求解后端的库（gurobipy / scipy）和 pandas，
+  构建工厂日历，解析默认 DELFOR。worker 以写时复制的方式继承这些结果，第一个请求不再付冷启动开销；
+- after_fork()：每个 worker 在 fork 之后执行：丢弃不能跨进程沿用的状态（LLM 客户端、数据库连接池、
+  缓存的 SQLite 连接、Gurobi env 池 / 进程池），再为本进程预先创建 WARMUP_ENVS 个 Gurobi 环境。
+
+Gurobi 环境（license、求解线程）不能被 fork 出来的子进程沿用，所以 master 里只导入 gurobipy、不创建环境。
+不用 --preload 时（uvicorn / 单进程），app.api 的 lifespan 里同样调用 warm_up，只是每个 worker 各做一遍。
+"""
+import logging
+import os
+import time
+from pathlib import Path
+
+from ai_tools import llm_cache, llm_client
+from app import batch
+from calculation_tools import factory_calendar, optimize_production, shipment_planner, solve_cache, solver_backends
+from database_tools import dali
+
+WARMUP = os.getenv("WARMUP", "on").lower() not in ("off", "0", "false")
+WARMUP_ENVS = int(os.getenv("WARMUP_ENVS", "1"))   # 每个 worker fork 后预先创建的 Gurobi 环境数
+
+_warmed = False
+
+
+def _import_backend(name):
+    if name == "gurobi":
+        optimize_production._gurobi()
+    elif name == "highs":
+        import scipy.optimize  # noqa: F401
+
+
+def warm_up(delfor=None, data_dir=None):
+    """导入重模块、构建日历、解析默认 DELFOR；同一进程只做一次，WARMUP=off 时跳过"""
+    global _warmed
+    if not WARMUP or _warmed:
+        return
+    t0 = time.perf_counter()
+    import pandas  # noqa: F401
+
+    _import_backend(solver_backends.SOLVER_BACKEND)
+    factory_calendar.get_calendar()
+    src = Path(data_dir or batch.DATA_DIR) / (delfor or batch.DEFAULT_DELFOR)
+    try:
+        shipment_planner.load_delfor(src)
+    except FileNotFoundError:
+        logging.warning("warm-up: %s not found, DELFOR will be parsed on the first request", src)
+    _warmed = True
+    logging.info("warm-up done in %.2f s (pid %s)", time.perf_counter() - t0, os.getpid())
+
+
+def after_fork():
+    """worker 进程 fork 之后：重置继承来的客户端 / 连接 / 求解器池，再预建本进程的 Gurobi 环境"""
+    llm_client.reset_client()
+    dali.reset_pool()
+    llm_cache.cache.reset_connection()
+    solve_cache.cache.reset_connection()
+    optimize_production.reset_pools()
+    if WARMUP and WARMUP_ENVS > 0 and solver_backends.SOLVER_BACKEND == "gurobi":
+        try:
+            optimize_production.get_env_pool().warm_up(WARMUP_ENVS)
+        except Exception:
+            # 没有 license 等问题留给第一次求解时按原来的方式报错
+            logging.exception("warm-up: creating Gurobi environments failed")
@@ -0,0 +1,217 @@
+# bench_pipeline.py
+"""
+计划流水线的可复现基准（合成 DELFOR + 本地 stub 助手，不连 Azure / 数据库）。
+
+    python -m benchmarks.bench_pipeline                       # 全部
+    python -m benchmarks.bench_pipeline --only shipments,pipeline --repeat 5
+    python -m benchmarks.compare benchmarks/results/pipeline-<旧>.json benchmarks/results/pipeline-<新>.json
+
+- shipments : compute_shipments 随 DELFOR 行数的伸缩（--sizes）；
+- delfor    : load_delfor 冷读（解析 xlsx）与命中缓存的耗时；
+- solver    : 各后端 model_build / optimize 分阶段耗时，新模型（cold）与同一 session 增量修改（warm）；
+- pipeline  : run_pipeline 端到端延迟与各阶段耗时，按 attempt 数（审核前 k-1 次强制 tweak）分别统计。
+
+LLM / 求解结果缓存只用内存层并在每次运行前清空，结果写到 benchmarks/results/pipeline-<git sha>.json，
+同一台机器上不同提交的结果可以直接对比。
+"""
+import os
+
+# 必须在导入 app / ai_tools 之前：stub 助手，缓存不落盘
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ["LLM_CACHE_PATH"] = ""
+os.environ["SOLVE_CACHE_PATH"] = ""
+
+import argparse
+import contextlib
+import datetime as dt
+import functools
+import io
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from unittest import mock
+
+from ai_tools import llm_cache, llm_stub
+from app import scheduler
+from benchmarks import synthetic
+from benchmarks.bench_solvers import base_params, random_params, summarize
+from calculation_tools import plan_auditor, shipment_planner, solve_cache, solver_backends
+
+SECTIONS = ('shipments', 'delfor', 'solver', 'pipeline')
+PIPELINE_INPUT = "Plan production for the next two weeks with the default inventory range."
+
+
+def git_revision():
+    try:
+        sha = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True).stdout.strip())
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def clear_caches():
+    llm_cache.cache.clear()
+    solve_cache.cache.clear()
+    shipment_planner.clear_delfor_cache()
+
+
+# ---------------- shipments ----------------
+def bench_shipments(sizes, repeat, seed):
+    report = {}
+    for n in sizes:
+        daily = synthetic.daily_rows(synthetic.make_delfor(n, seed=seed))
+        shipment_planner.compute_shipments(daily)   # 预热
+        report[str(n)] = summarize([timed(shipment_planner.compute_shipments, daily) for _ in range(repeat)])
+        report[str(n)]['daily_rows'] = len(daily)
+    return report
+
+
+# ---------------- delfor ----------------
+def bench_delfor(sizes, repeat, seed, workdir):
+    report = {}
+    for n in sizes:
+        path = synthetic.write_delfor(Path(workdir) / f'delfor_{n}.xlsx', n, seed=seed)
+        cold, warm = [], []
+        for _ in range(repeat):
+            shipment_planner.clear_delfor_cache()
+            cold.append(timed(shipment_planner.load_delfor, path))
+            warm.append(timed(shipment_planner.load_delfor, path))
+        report[str(n)] = {'cold': summarize(cold), 'warm': summarize(warm)}
+    return report
+
+
+# ---------------- solver ----------------
+def bench_solver(backends, cases, seed):
+    rng = random.Random(seed)
+    all_params = [random_params(rng) for _ in range(cases)]
+    report = {}
+    for name in backends:
+        stages = defaultdict(list)   # 'cold.model_build' → [秒, ...]
+        with contextlib.redirect_stdout(io.StringIO()):
+            solver_backends.solve(base_params(), name, cache=False)   # 预热（license / import）
+            for params in all_params:
+                with solver_backends.solver_session(name, cache=False) as session:
+                    for phase, p in (('cold', params), ('warm', {**params, 'min_inventory': params['min_inventory'] + 100})):
+                        session.solve(p)
+                        for stage, seconds in (getattr(session, 'stage_seconds', None) or {}).items():
+                            stages[f'{phase}.{stage}'].append(seconds)
+        report[name] = {k: summarize(v) for k, v in sorted(stages.items())}
+    return report
+
+
+# ---------------- pipeline ----------------
+def forced_audit(attempts):
+    """真实审核，但前 attempts-1 次改判为 tweak，使流水线至少跑 attempts 轮；之后按真实结论"""
+    real = plan_auditor.audit_plan
+    calls = {'n': 0}
+
+    def audit(*args, **kwargs):
+        calls['n'] += 1
+        result = real(*args, **kwargs)
+        if calls['n'] < attempts:
+            return {**result, 'action': 'tweak', 'valid': False,
+                    'violations': result['violations'] or [{'day': 1, 'reason': 'benchmark'}]}
+        return result
+    return audit
+
+
+def bench_pipeline(max_attempts, repeat, seed, workdir, rows):
+    path = synthetic.write_delfor(Path(workdir) / 'delfor_pipeline.xlsx', rows, seed=seed)
+    delivery = functools.partial(shipment_planner.get_delivery_horizon, path.name, str(path.parent))
+    report = {}
+    with mock.patch.object(shipment_planner, 'get_delivery_horizon', delivery):
+        for k in range(1, max_attempts + 1):
+            totals, statuses, stages = [], defaultdict(int), defaultdict(list)
+            for _ in range(repeat):
+                clear_caches()
+                with mock.patch.object(plan_auditor, 'audit_plan', forced_audit(k)), \
+                        contextlib.redirect_stdout(io.StringIO()):
+                    result = scheduler.run_pipeline(PIPELINE_INPUT, timings=True)
+                timings = result.get('timings', {})
+                totals.append(timings.get('total_seconds', 0.0))
+                statuses[result.get('status', 'unknown')] += 1
+                per_stage = defaultdict(float)
+                for span in timings.get('spans', []):
+                    per_stage[span['stage']] += span['seconds']
+                for stage, seconds in per_stage.items():
+                    stages[stage].append(seconds)
+            report[str(k)] = {
+                'total': summarize(totals),
+                'status': dict(statuses),
+                'stages': {s: summarize(v) for s, v in sorted(stages.items())},
+            }
+    return report
+
+
+def run(args):
+    sections = args.only.split(',') if args.only else SECTIONS
+    llm_stub.LLM_STUB_LATENCY = args.llm_latency
+    report = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        if 'shipments' in sections:
+            report['shipments'] = bench_shipments(args.sizes, args.repeat, args.seed)
+        if 'delfor' in sections:
+            report['delfor'] = bench_delfor(args.xlsx_sizes, args.repeat, args.seed, workdir)
+        if 'solver' in sections:
+            report['solver'] = bench_solver(args.backends.split(','), args.cases, args.seed)
+        if 'pipeline' in sections:
+            report['pipeline'] = bench_pipeline(args.attempts, args.repeat, args.seed, workdir, args.pipeline_rows)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', default=None, help='逗号分隔：' + ','.join(SECTIONS))
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',')], default=[1000, 10000, 100000, 1000000],
+                        help='compute_shipments 的 DELFOR 行数')
+    parser.add_argument('--xlsx-sizes', type=lambda s: [int(x) for x in s.split(',')], default=[57, 1000, 10000],
+                        help='load_delfor 的 xlsx 行数')
+    parser.add_argument('--pipeline-rows', type=int, default=200, help='run_pipeline 用的 DELFOR 行数')
+    parser.add_argument('--backends', default=','.join(solver_backends.BACKENDS))
+    parser.add_argument('--cases', type=int, default=20)
+    parser.add_argument('--attempts', type=int, default=scheduler.MAX_ATTEMPTS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='stub 助手每次调用的模拟延迟（秒）')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='JSON 输出路径，默认 benchmarks/results/pipeline-<git sha>.json')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)   # 流水线每轮的 INFO 日志会淹没计时输出
+
+    sha, dirty = git_revision()
+    report = {
+        'meta': {
+            'revision': sha,
+            'dirty': dirty,
+            'timestamp': dt.datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {k: v for k, v in vars(args).items() if k != 'out'},
+        },
+        **run(args),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    out = Path(args.out or f'benchmarks/results/pipeline-{sha}{"-dirty" if dirty else ""}.json')
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(text)
+
+
+if __name__ == '__main__':
+    main()
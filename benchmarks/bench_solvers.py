@@ -0,0 +1,120 @@
+# bench_solvers.py
+"""
+各求解后端的延迟对比。
+
+    python -m benchmarks.bench_solvers --cases 50 --out benchmarks/results/solvers.json
+
+对同一组随机参数（库存区间、OEE/CT、force_zero/force_positive、连续天数）分别求解，
+记录每个后端的 p50/p95/mean 延迟、可行数，以及与第一个后端的目标值是否一致。
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+
+from calculation_tools import solver_backends
+
+DELIVERY = {2: 1026, 5: 1566, 9: 1566, 12: 1566}
+
+
+def base_params():
+    return {
+        'days': list(range(1, 15)),
+        'defect_rate': 0.01,
+        'unit_cost': 4200,
+        'num_workers': 12,
+        'weekly_wage_per_worker': 1500,
+        'storage_cost_per_unit_per_day': 10,
+        'shipping_cost_per_unit': 0,
+        'min_inventory': 2000,
+        'max_inventory': 5000,
+        'initial_inventory': 4000,
+        'delivery_day': dict(DELIVERY),
+        'OEE': 0.95,
+        'CT': 105,
+        'POT': {d: 1234 if d not in (6, 7, 13, 14) else 0 for d in range(1, 15)},
+        'min_WD': 40,
+        'max_WD': 120,
+        'force_zero': {6: 0, 7: 0, 13: 0, 14: 0},
+        'force_positive': {1: 0},
+        'week1_min_consecutive_days': 3,
+        'week2_min_consecutive_days': 3,
+    }
+
+
+def random_params(rng):
+    p = base_params()
+    p['min_inventory'] = rng.choice([0, 500, 1000, 2000, 3000])
+    p['max_inventory'] = p['min_inventory'] + rng.choice([500, 1500, 3000, 6000])
+    p['OEE'] = rng.choice([0.7, 0.85, 0.95])
+    p['CT'] = rng.choice([90, 105, 130])
+    p['force_zero'].update({d: 0 for d in rng.sample(range(1, 13), rng.randint(0, 3))})
+    p['force_positive'] = {d: 0 for d in rng.sample(range(1, 13), rng.randint(0, 3))}
+    p['week1_min_consecutive_days'] = rng.choice([0, 2, 3, 4])
+    p['week2_min_consecutive_days'] = rng.choice([0, 2, 3])
+    return p
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def summarize(latencies):
+    return {
+        'n': len(latencies),
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def run(backends, cases, seed=0):
+    rng = random.Random(seed)
+    all_params = [random_params(rng) for _ in range(cases)]
+    report, reference = {}, None
+
+    for name in backends:
+        latencies, costs = [], []
+        with contextlib.redirect_stdout(io.StringIO()):
+            solver_backends.solve(base_params(), name, cache=False)      # 预热（license / import）
+            for params in all_params:
+                t0 = time.perf_counter()
+                _, cost, _ = solver_backends.solve(params, name, cache=False)   # 测真实求解，不走结果缓存
+                latencies.append(time.perf_counter() - t0)
+                costs.append(cost)
+
+        entry = {'solve': summarize(latencies), 'feasible': sum(c is not None for c in costs)}
+        if reference is None:
+            reference = costs
+        else:
+            entry['agrees_with_' + backends[0]] = all(
+                (a is None) == (b is None) and (a is None or abs(a - b) <= 1e-4 * abs(a))
+                for a, b in zip(reference, costs))
+        report[name] = entry
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', default=','.join(solver_backends.BACKENDS))
+    parser.add_argument('--cases', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='JSON 输出路径')
+    args = parser.parse_args()
+
+    report = run(args.backends.split(','), args.cases, args.seed)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# compare.py
+"""
+对比两次基准结果（bench_pipeline / bench_solvers 输出的 JSON）。
+
+    python -m benchmarks.compare old.json new.json --threshold 1.10
+
+逐项列出所有 *_ms 指标的 旧 / 新 / 比值；比值超过 threshold 的标为回退，存在回退时退出码为 1。
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def flatten(report, prefix=''):
+    """{'pipeline': {'1': {'total': {'p50_ms': 3.2}}}} → {'pipeline.1.total.p50_ms': 3.2}"""
+    out = {}
+    for key, value in report.items():
+        if key == 'meta':
+            continue
+        path = f'{prefix}.{key}' if prefix else str(key)
+        if isinstance(value, dict):
+            out.update(flatten(value, path))
+        elif key.endswith('_ms') and isinstance(value, (int, float)):
+            out[path] = float(value)
+    return out
+
+
+def compare(old, new, threshold=1.10):
+    """返回 [(指标, 旧, 新, 比值, 是否回退), ...]，只比较两边都有的指标"""
+    a, b = flatten(old), flatten(new)
+    rows = []
+    for key in sorted(a.keys() & b.keys()):
+        ratio = b[key] / a[key] if a[key] > 0 else float('inf') if b[key] > 0 else 1.0
+        rows.append((key, a[key], b[key], ratio, ratio > threshold))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=1.10, help='新 / 旧 超过该比值视为回退')
+    parser.add_argument('--metric', default='p50_ms', help='只看以此结尾的指标，空字符串表示全部')
+    args = parser.parse_args()
+
+    old, new = (json.loads(Path(p).read_text()) for p in (args.old, args.new))
+    print(f"old: {old.get('meta', {}).get('revision', args.old)}  new: {new.get('meta', {}).get('revision', args.new)}")
+    rows = [r for r in compare(old, new, args.threshold) if r[0].endswith(args.metric)]
+    width = max((len(r[0]) for r in rows), default=10)
+    for key, a, b, ratio, regressed in rows:
+        print(f"{key:<{width}}  {a:>10.3f}  {b:>10.3f}  {ratio:>6.2f}x{'  REGRESSION' if regressed else ''}")
+    sys.exit(1 if any(r[4] for r in rows) else 0)
+
+
+if __name__ == '__main__':
+    main()
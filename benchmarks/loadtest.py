@@ -0,0 +1,227 @@
+# loadtest.py
+"""
+FastAPI 服务的本地压测：用 stub 助手启动 app.api:app，按不同 worker 数打混合流量，
+输出吞吐、延迟分位数和错误率，用来确定 start.sh 的 WORK_COUNT。
+
+    python -m benchmarks.loadtest --workers 1,2,4 --concurrency 16 --duration 60
+    python -m benchmarks.loadtest --workers 2 --mix plan=1 --llm-latency 1.5 --out benchmarks/results/load.json
+
+流量类型（--mix 按权重抽样，seed 固定）：
+- fixed      : "get the latest customer production plan"，固定回答（服务端 sleep 2~3 秒）；
+- plan       : 默认参数的正常请求（求解 + 审核 + 若干轮 assistant1）；
+- relax      : 库存区间过高 → presolve 按最小调整放宽 min_inventory（PRESOLVE_AUTOFIX，默认开）后求解，
+               一轮即 accept，结果带 adjustments；不经过 assistant2（关掉 autofix 时 presolve 直接判无解，也到不了）；
+- infeasible : OEE 过低，presolve 直接判定无解；
+- health     : /health，用来观察事件循环是否被求解阻塞。
+
+服务端命令与 start.sh 相同（gunicorn -c gunicorn.conf.py，--preload 预热）；没装 gunicorn 时退回 uvicorn --workers。
+"""
+import argparse
+import asyncio
+import datetime as dt
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+
+from benchmarks.bench_solvers import summarize
+
+FIXED_QUERY = "get the latest customer production plan"
+REQUESTS = {
+    'fixed': ('POST', '/optimize', {"llm_input": FIXED_QUERY}),
+    'plan': ('POST', '/optimize', {"llm_input": "Plan production for the next two weeks."}),
+    'relax': ('POST', '/optimize', {"llm_input": json.dumps({"base_params": {"min_inventory": 9000,
+                                                                             "max_inventory": 9500}})}),
+    'infeasible': ('POST', '/optimize', {"llm_input": json.dumps({"base_params": {"OEE": 0.2}})}),
+    'health': ('GET', '/health', None),
+}
+DEFAULT_MIX = "fixed=1,plan=4,relax=2,infeasible=2,health=1"
+WORKER_TIMEOUT = 600   # 与 gunicorn.conf.py 的 timeout 一致
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in REQUESTS:
+            raise SystemExit(f"unknown request kind: {kind}（可选 {', '.join(REQUESTS)}）")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def server_command(workers, port):
+    if shutil.which('gunicorn'):
+        return 'gunicorn', ['gunicorn', '-c', 'gunicorn.conf.py', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+                            'app.api:app']
+    return 'uvicorn', [sys.executable, '-m', 'uvicorn', 'app.api:app', '--host', '127.0.0.1',
+                       '--port', str(port), '--workers', str(workers), '--log-level', 'warning']
+
+
+def server_env(args):
+    env = dict(os.environ, LLM_BACKEND='stub', LLM_STUB_LATENCY=str(args.llm_latency), LLM_CACHE_PATH='')
+    if not args.keep_cache:
+        # 同样的请求反复打，结果缓存会让求解直接命中，压测里默认关掉
+        env.update(SOLVE_CACHE='off', LLM_CACHE_SIZE='0')
+    return env
+
+
+async def wait_ready(base_url, proc, timeout=120):
+    end = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < end:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {proc.returncode}")
+            try:
+                if (await client.get('/health', timeout=2)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"server not ready after {timeout} s")
+
+
+def stop_server(proc):
+    if proc.poll() is None:
+        os.killpg(proc.pid, signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+
+
+async def load(base_url, mix, concurrency, duration, total, request_timeout, seed):
+    """concurrency 个并发客户端，跑满 duration 秒或 total 个请求（先到者为准）"""
+    rng = random.Random(seed)
+    kinds, weights = list(mix), list(mix.values())
+    samples = []          # (kind, seconds, error, body status)
+    issued = 0
+    end = time.monotonic() + duration
+
+    async def client_loop(client):
+        nonlocal issued
+        while time.monotonic() < end and (not total or issued < total):
+            issued += 1
+            kind = rng.choices(kinds, weights)[0]
+            method, path, body = REQUESTS[kind]
+            t0 = time.perf_counter()
+            error = status = None
+            try:
+                resp = await client.request(method, path, json=body, timeout=request_timeout)
+                if resp.status_code != 200:
+                    error = f"http_{resp.status_code}"
+                else:
+                    status = resp.json().get('status')
+            except httpx.TimeoutException:
+                error = 'timeout'
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            samples.append((kind, time.perf_counter() - t0, error, status))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    return samples, elapsed
+
+
+def report(samples, elapsed):
+    by_kind = defaultdict(list)
+    for sample in samples:
+        by_kind[sample[0]].append(sample)
+
+    def block(rows):
+        errors = Counter(r[2] for r in rows if r[2])
+        ok = [r[1] for r in rows if not r[2]]
+        return {
+            'requests': len(rows),
+            'errors': dict(errors),
+            'error_rate': round(sum(errors.values()) / len(rows), 4) if rows else 0.0,
+            'latency': summarize(ok) if ok else None,
+            'status': dict(Counter(r[3] for r in rows if r[3])),
+        }
+
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(samples) / elapsed, 3) if elapsed else 0.0,
+        **block(samples),
+        'by_kind': {k: block(v) for k, v in sorted(by_kind.items())},
+    }
+
+
+def run_one(workers, args, mix):
+    port = free_port()
+    server, cmd = server_command(workers, port)
+    base_url = f'http://127.0.0.1:{port}'
+    log = open(Path(args.log_dir) / f'server-{workers}.log', 'w') if args.log_dir else subprocess.DEVNULL
+    proc = subprocess.Popen(cmd, env=server_env(args), stdout=log, stderr=subprocess.STDOUT,
+                            start_new_session=True)
+    try:
+        asyncio.run(wait_ready(base_url, proc))
+        samples, elapsed = asyncio.run(load(base_url, mix, args.concurrency, args.duration, args.requests,
+                                            args.request_timeout, args.seed))
+    finally:
+        stop_server(proc)
+        if log is not subprocess.DEVNULL:
+            log.close()
+    return {'workers': workers, 'server': server, **report(samples, elapsed)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=lambda s: [int(x) for x in s.split(',')], default=[1, 2, 4],
+                        help='依次测试的 worker 数')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=30, help='每个 worker 数压测的秒数')
+    parser.add_argument('--requests', type=int, default=0, help='每轮最多请求数，0 表示只按时长')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='请求类型=权重，逗号分隔')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='stub 助手每次调用的模拟延迟（秒）')
+    parser.add_argument('--request-timeout', type=float, default=WORKER_TIMEOUT, help='客户端单请求超时（秒）')
+    parser.add_argument('--keep-cache', action='store_true', help='保留 LLM / 求解结果缓存')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--log-dir', default=None, help='服务端日志目录，默认丢弃')
+    parser.add_argument('--out', default=None, help='JSON 输出路径')
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+    if args.log_dir:
+        Path(args.log_dir).mkdir(parents=True, exist_ok=True)
+
+    runs = []
+    for workers in args.workers:
+        result = run_one(workers, args, mix)
+        print(f"workers={workers}: {result['throughput_rps']} req/s, error_rate={result['error_rate']}, "
+              f"p95={result['latency']['p95_ms'] if result['latency'] else None} ms", file=sys.stderr)
+        runs.append(result)
+
+    text = json.dumps({
+        'meta': {
+            'timestamp': dt.datetime.now().isoformat(timespec='seconds'),
+            'cpu_count': os.cpu_count(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('out', 'log_dir')},
+        },
+        'runs': runs,
+    }, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# synthetic.py
+"""
+合成 DELFOR 数据：列与 shipment_planner 读取的一致（quantity / schedule begin.1 / type），
+行数任意、固定 seed 可复现。
+
+- daily  行：工作日逐日需求（400~600），同一天可能出现多行（compute_shipments 会按天汇总）；
+- weekly / monthly 行：汇总需求，解析时会被过滤掉，只用来让数据形状接近真实文件。
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['type', 'quantity', 'schedule begin.1']
+DATE_FORMAT = '%Y-%m-%d 00:00:00.0'   # 与真实 DELFOR 导出的格式相同
+MAX_DAILY_DAYS = 5000                 # 约 20 年的工作日
+
+
+def make_delfor(rows, start='2025-07-04', seed=0, daily_share=0.6) -> pd.DataFrame:
+    """
+    参数
+    ----
+    rows        : 总行数
+    start       : 第一条需求的日期
+    daily_share : daily 行所占比例
+
+    返回
+    ----
+    DataFrame[type, quantity, schedule begin.1]，schedule begin.1 为字符串（与 Excel 导出一致）
+    """
+    rng = np.random.default_rng(seed)
+    n_daily = int(rows * daily_share)
+    n_other = rows - n_daily
+
+    # daily：约每个工作日 1~2 行；行数很大时天数封顶，每天多行
+    n_days = max(1, min(int(n_daily / 1.5), MAX_DAILY_DAYS))
+    workdays = pd.bdate_range(start, periods=n_days)
+    daily_dates = workdays[np.sort(rng.integers(0, n_days, size=n_daily))]
+    daily_qty = rng.integers(400, 601, size=n_daily)
+
+    # weekly / monthly：从 daily 覆盖范围之后开始
+    other_start = workdays[-1] + pd.Timedelta(days=7)
+    weekly = rng.random(n_other) < 0.7
+    offset_days = np.where(weekly, 7 * rng.integers(0, 52, size=n_other), 30 * rng.integers(0, 24, size=n_other))
+    other_dates = (other_start + pd.to_timedelta(offset_days, unit='D')).to_numpy()
+    other_qty = np.where(weekly, rng.integers(1500, 3001, size=n_other), rng.integers(8000, 13001, size=n_other))
+
+    df = pd.DataFrame({
+        'type': ['daily'] * n_daily + np.where(weekly, 'weekly', 'monthly').tolist(),
+        'quantity': np.concatenate([daily_qty, other_qty]),
+        'schedule begin.1': np.concatenate([daily_dates.to_numpy(), other_dates]),
+    })
+    df['schedule begin.1'] = pd.to_datetime(df['schedule begin.1']).dt.strftime(DATE_FORMAT)
+    return df[COLUMNS]
+
+
+def daily_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """与 shipment_planner._read_daily_demand 相同的过滤"""
+    return df[df['type'].fillna('').str.strip().str.lower() == 'daily']
+
+
+def write_delfor(path, rows, **kwargs) -> Path:
+    """写成 xlsx，供 load_delfor / get_delivery_day_dict 读取"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    make_delfor(rows, **kwargs).to_excel(path, index=False)
+    return path
@@ -0,0 +1,190 @@
+# tiered_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_key(*parts) -> str:
+    """把任意可 JSON 序列化的部分规范化后取 sha256。"""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class TieredCache:
+    """
+    两级缓存：进程内 LRU + 可选 SQLite 文件。
+
+    参数
+    ----
+    name             : 表名 / 统计用名称
+    path             : SQLite 文件路径；None / '' 表示只用内存
+    max_entries      : 内存层最多条目数（LRU 淘汰）
+    max_disk_entries : SQLite 层最多条目数（按最近访问时间淘汰）
+    ttl              : 过期秒数；None 表示不过期
+
+    值需要能被 json 序列化。hits / misses 计数可通过 stats() 读取。
+
+    内存层和 SQLite 层各用一把锁，读写磁盘时不占内存层的锁。
+    SQLite 层每 EVICT_EVERY 次写入才检查一次行数、按 accessed 索引删掉最旧的多余条目；
+    命中时的访问时间先记在内存里，攒够 TOUCH_BATCH 条（或下一次写入时）批量写回。
+    """
+
+    EVICT_EVERY = 64
+    TOUCH_BATCH = 64
+
+    def __init__(self, name, path=None, max_entries=256, max_disk_entries=10000, ttl=None):
+        self.name = name
+        self.path = path or None
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self._mem: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()        # 内存层 + 计数
+        self._db_lock = threading.Lock()     # SQLite 连接 + 待写回的访问时间
+        self._db = None
+        self._touched = {}                   # key -> 最近访问时间，尚未写回
+        self._writes = 0                     # 上次检查行数之后的写入次数
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+    # ---------------- SQLite 层（调用方持有 _db_lock） ----------------
+    def _conn(self):
+        if self.path is None:
+            return None
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.name}" ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL, accessed REAL NOT NULL)')
+            self._db.execute(f'CREATE INDEX IF NOT EXISTS "{self.name}_accessed" ON "{self.name}" (accessed)')
+            self._db.commit()
+        return self._db
+
+    def _flush_touched(self, db):
+        if self._touched:
+            db.executemany(f'UPDATE "{self.name}" SET accessed = ? WHERE key = ?',
+                           [(t, k) for k, t in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self, db):
+        """行数超过 max_disk_entries 时删掉最久未访问的多余条目（走 accessed 索引）"""
+        excess = db.execute(f'SELECT COUNT(*) FROM "{self.name}"').fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            db.execute(
+                f'DELETE FROM "{self.name}" WHERE key IN ('
+                f'SELECT key FROM "{self.name}" ORDER BY accessed LIMIT ?)', (excess,))
+
+    def _touch(self, key, now):
+        if self.path is None:
+            return
+        with self._db_lock:
+            self._touched[key] = now
+            if len(self._touched) >= self.TOUCH_BATCH:
+                db = self._conn()
+                self._flush_touched(db)
+                db.commit()
+
+    def _expires(self):
+        return None if self.ttl is None else time.time() + self.ttl
+
+    # ---------------- 对外接口 ----------------
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                expires, value = item
+                if expires is None or expires > now:
+                    self._mem.move_to_end(key)
+                    self.hits_memory += 1
+                else:
+                    del self._mem[key]
+                    item = None
+        if item is not None:
+            self._touch(key, now)   # 内存命中也算访问，磁盘层按真实使用淘汰
+            return value
+
+        row = None
+        if self.path is not None:
+            with self._db_lock:
+                db = self._conn()
+                row = db.execute(
+                    f'SELECT value, expires FROM "{self.name}" WHERE key = ?', (key,)).fetchone()
+                if row is not None and row[1] is not None and row[1] <= now:
+                    db.execute(f'DELETE FROM "{self.name}" WHERE key = ?', (key,))
+                    db.commit()
+                    self._touched.pop(key, None)
+                    row = None
+        if row is not None:
+            value, expires = json.loads(row[0]), row[1]
+            self._touch(key, now)
+            with self._lock:
+                self._put_mem(key, expires, value)
+                self.hits_disk += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        expires = self._expires()
+        with self._lock:
+            self._put_mem(key, expires, value)
+        if self.path is None:
+            return
+        blob = json.dumps(value, ensure_ascii=False)
+        with self._db_lock:
+            db = self._conn()
+            self._touched.pop(key, None)
+            db.execute(
+                f'INSERT OR REPLACE INTO "{self.name}" (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+                (key, blob, expires, time.time()))
+            self._flush_touched(db)
+            self._writes += 1
+            if self._writes >= self.EVICT_EVERY:
+                self._writes = 0
+                self._evict(db)
+            db.commit()
+
+    def _put_mem(self, key, expires, value):
+        self._mem[key] = (expires, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+        with self._db_lock:
+            self._touched.clear()
+            db = self._conn()
+            if db is not None:
+                db.execute(f'DELETE FROM "{self.name}"')
+                db.commit()
+
+    def reset_connection(self):
+        """fork 之后调用：丢弃继承来的 SQLite 连接和锁，下次访问时重新打开（内存层保留）"""
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._touched = {}
+
+    def stats(self) -> dict:
+        hits = self.hits_memory + self.hits_disk
+        total = hits + self.misses
+        return {
+            'name': self.name,
+            'hits_memory': self.hits_memory,
+            'hits_disk': self.hits_disk,
+            'misses': self.misses,
+            'hit_rate': hits / total if total else 0.0,
+            'entries_memory': len(self._mem),
+        }
@@ -0,0 +1,162 @@
+# enumeration.py
+"""
+14 天开停产计划的精确枚举求解。
+
+x[d] = cap[d] * y[d] 且发货量固定，真正的决策只有 y[d] ∈ {0, 1}，
+14 天最多 2^14 = 16384 种组合，每个组合用一个整数编号（第 i 位 = 第 i 天开不开）。
+force_zero / force_positive 和连续性规则（与 Gurobi 版同一组窗口）先用位运算筛编号，
+剩下的组合展开成 0/1 矩阵，库存轨迹（累计和）用一次上三角矩阵乘法算出，
+min/max 库存、发货保护、逐周工时都是逐行掩码，成本是一个向量，
+取最小值即为精确最优解，不需要求解器；argsort 给出前 k 名。
+"""
+import time
+
+import numpy as np
+
+from calculation_tools.optimize_production import (build_cap, continuity_windows, horizon_weeks, required_weeks,
+                                                   week_days)
+
+MAX_ENUM_DAYS = 20    # 2^20 ≈ 100 万行，再大内存不划算
+TOL = 1e-6            # 与 Gurobi 默认可行性容差一致
+
+
+
+def _bits(codes, n):
+    """组合编号 → (len(codes), n) 的 0/1 浮点矩阵，第 i 列为第 i 天（编号第 i 位）。"""
+    return ((codes[:, None] >> np.arange(n)) & 1).astype(float)
+
+
+def score_all(params):
+    """
+    给全部组合打分。先用整数位运算筛掉违反 force / 连续性的编号，
+    剩下的组合再一次矩阵乘法算出整条库存轨迹。
+
+    返回
+    ----
+    (codes, x, feasible, cost, hours)
+    codes: (P,) 组合编号（第 i 位 = 第 i 天开不开）；x: (P, n) 产量；
+    feasible: (P,) bool；cost / hours: (P,)
+    """
+    days = list(params['days'])
+    n = len(days)
+    if n > MAX_ENUM_DAYS:
+        raise ValueError(f"enumeration supports at most {MAX_ENUM_DAYS} days, got {n}")
+    col = {d: i for i, d in enumerate(days)}
+
+    def mask(ds):
+        return sum(1 << col[d] for d in ds if d in col)
+
+    # 1) 纯开停约束：位运算
+    codes = np.arange(1 << n, dtype=np.int64)
+    force_zero = params.get('force_zero', {})
+    fz = mask(force_zero)
+    fp = mask(d for d in params.get('force_positive', {}) if d not in force_zero)
+    codes = codes[(codes & fz == 0) & (codes & fp == fp)]
+    # 连续性：d 不开，或包含 d 的某个窗口全开；有空间的周至少开一天
+    for _, d, windows in continuity_windows(params):
+        alive = codes & (1 << col[d]) == 0
+        for w in windows:
+            alive |= codes & mask(w) == mask(w)
+        codes = codes[alive]
+    for _, open_days in required_weeks(params):
+        codes = codes[codes & mask(open_days) != 0]
+
+    # 2) 库存 / 发货 / 工时
+    cap_d = build_cap(params)
+    cap = np.array([cap_d[d] for d in days], dtype=float)
+    ship = np.array([params['delivery_day'].get(d, 0) for d in days], dtype=float)
+    keep = 1 - params['defect_rate']
+    init = float(params['initial_inventory'])
+
+    Y = _bits(codes, n)
+    x = Y * cap
+    # I = init + Y @ T - cumsum(S)，T[i, j] = cap[i]·keep（i ≤ j）
+    inv = Y @ np.triu(np.outer(cap * keep, np.ones(n))) + (init - np.cumsum(ship))
+
+    ok = inv.min(axis=1) >= params['min_inventory'] - TOL
+    ok &= inv.max(axis=1) <= params['max_inventory'] + TOL
+
+    # 发货保护：S[d] <= 前一天库存 + 当日合格产量，即 I[d] >= 0
+    ship_cols = [col[d] for d in params['delivery_day']]
+    if ship_cols:
+        ok &= inv[:, ship_cols].min(axis=1) >= -TOL
+
+    total = x.sum(axis=1)
+    weeks = horizon_weeks(params)
+    a = params["CT"] / 3600 / params["OEE"]
+    hours = total * a
+    for _, wd in week_days(params):
+        week_hours = x[:, [col[d] for d in wd]].sum(axis=1) * a
+        ok &= week_hours <= params["max_WD"] + TOL
+        ok &= week_hours >= params["min_WD"] - TOL
+
+    ship_cost = sum(params['delivery_day'].values()) * params['shipping_cost_per_unit']
+    cost = (total * params['unit_cost']
+            + inv.sum(axis=1) * params['storage_cost_per_unit_per_day']
+            + ship_cost
+            + weeks * params['num_workers'] * params['weekly_wage_per_worker'])
+    return codes, x, ok, cost, hours
+
+
+def enumerate_plans(params, top_k=1):
+    """
+    返回
+    ----
+    {'plan', 'cost', 'hours', 'feasible_count', 'top': [{'plan', 'cost', 'hours'}, ...]}
+    无可行组合时 plan / cost / hours 为 None，top 为空。
+    """
+    days = list(params['days'])
+    _, x, ok, cost, hours = score_all(params)
+    idx = np.flatnonzero(ok)
+    ranked = idx[np.argsort(cost[idx], kind='stable')[:top_k]]
+
+    top = [{
+        'plan': {d: float(x[r, i]) for i, d in enumerate(days)},
+        'cost': float(cost[r]),
+        'hours': float(hours[r]),
+    } for r in ranked]
+    best = top[0] if top else {'plan': None, 'cost': None, 'hours': None}
+    return {**best, 'feasible_count': int(len(idx)), 'top': top}
+
+
+class EnumerationModel:
+    """求解后端接口：solve / compute_iis / close。IIS 借用 HiGHS 版的 deletion filter。"""
+
+    def __init__(self):
+        self._params = None
+        self.stage_seconds = {}
+
+    def solve(self, params):
+        self._params = params
+        t0 = time.perf_counter()
+        res = enumerate_plans(params)
+        self.stage_seconds = {'optimize': time.perf_counter() - t0}
+        return res['plan'], res['cost'], res['hours']
+
+    def compute_iis(self):
+        from calculation_tools.highs_model import HighsModel
+        with HighsModel() as m:
+            m.solve(self._params)
+            return m.compute_iis()
+
+    def close(self):
+        self._params = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def cross_check(params, backend='gurobi', rel_tol=1e-4):
+    """用枚举结果核对某个求解后端：可行性一致且目标值在 rel_tol 内。"""
+    from calculation_tools import solver_backends
+
+    exact = enumerate_plans(params)
+    _, cost, _ = solver_backends.solve(params, backend)
+    if exact['cost'] is None or cost is None:
+        agree = exact['cost'] is None and cost is None
+    else:
+        agree = abs(exact['cost'] - cost) <= rel_tol * abs(exact['cost'])
+    return {'agree': agree, 'enumeration_cost': exact['cost'], backend + '_cost': cost}
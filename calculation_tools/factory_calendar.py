@@ -0,0 +1,140 @@
+# factory_calendar.py
+"""
+工厂日历：班次、节假日、计划停机只加载一次，预先算好按日期索引的稠密数组
+
+    working[i] : 第 i 天是否上班（周末 / 节假日为 False）
+    pot[i]     : 第 i 天的可用时间（分钟）= 班次时长合计 − 计划停机，非工作日为 0
+
+日期 ↔ 模型天序号（week_start 为第 1 天）的换算都是 O(1) 的下标运算，
+scheduler（POT / 节假日 / 默认 force_zero）、format_plan、发货量映射和长期计划共用同一份数组。
+
+日历文件（PLANT_CALENDAR，默认 data/plant_calendar.json）
+----
+{
+  "start": "2024-01-01", "end": "2027-12-31",   # 预计算范围，范围外按 weekmask / holidays 现算
+  "weekmask": "1111100",                        # 周一 ~ 周日是否上班
+  "shifts": [{"name": "early", "minutes": 617}, ...],
+  "holidays": ["2025-10-01", ...],
+  "downtime": [{"date": "2025-08-04", "minutes": 600}, ...]
+}
+"""
+import calendar
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+PLANT_CALENDAR = os.getenv("PLANT_CALENDAR", "data/plant_calendar.json")
+
+# 日历文件不存在时的默认值：周一 ~ 周五上班，每天 1234 分钟
+DEFAULT_CALENDAR = {
+    "start": "2024-01-01",
+    "end": "2027-12-31",
+    "weekmask": "1111100",
+    "shifts": [{"name": "day", "minutes": 1234}],
+    "holidays": [],
+    "downtime": [],
+}
+
+WEEKDAY_NAMES = np.array(calendar.day_name)   # Monday … Sunday
+
+
+class FactoryCalendar:
+    def __init__(self, start, end, weekmask="1111100", shifts=(), holidays=(), downtime=()):
+        self.origin = np.datetime64(start, 'D')
+        self.end = np.datetime64(end, 'D')
+        self.weekmask = weekmask
+        self.shift_minutes = float(sum(s["minutes"] for s in shifts))
+        self.busdaycal = np.busdaycalendar(weekmask=weekmask,
+                                           holidays=np.asarray(holidays, dtype='datetime64[D]'))
+
+        dates = np.arange(self.origin, self.end + 1)
+        self.working = np.is_busday(dates, busdaycal=self.busdaycal)
+        self.pot = np.where(self.working, self.shift_minutes, 0.0)
+        self.downtime = np.zeros(len(dates))
+        for item in downtime:
+            i = self.index(item["date"])
+            if 0 <= i < len(dates):
+                self.downtime[i] += item["minutes"]
+        self.pot = np.maximum(self.pot - self.downtime, 0.0)
+
+    @classmethod
+    def from_file(cls, path):
+        path = Path(path)
+        cfg = json.loads(path.read_text(encoding="utf-8")) if path.exists() else DEFAULT_CALENDAR
+        return cls(cfg["start"], cfg["end"], cfg.get("weekmask", "1111100"), cfg.get("shifts", ()),
+                   cfg.get("holidays", ()), cfg.get("downtime", ()))
+
+    # ---------------- 日期 ↔ 下标 ----------------
+    def index(self, date):
+        """日期（或日期数组）在预计算数组里的下标"""
+        return (np.asarray(date, dtype='datetime64[D]') - self.origin).astype(int)
+
+    @staticmethod
+    def day_index(date, week_start):
+        """日期（或数组）→ 模型天序号，week_start 为第 1 天"""
+        return (np.asarray(date, dtype='datetime64[D]') - np.datetime64(week_start, 'D')).astype(int) + 1
+
+    @staticmethod
+    def date_of(day, week_start):
+        """模型天序号（或数组）→ 日期"""
+        return np.datetime64(week_start, 'D') + np.asarray(day, dtype=int) - 1
+
+    # ---------------- 计划窗口 ----------------
+    def window(self, week_start, weeks):
+        """
+        week_start 起 7*weeks 天的 (working, pot) 数组。
+        在预计算范围内直接切片，否则按 weekmask / holidays 现算（不含计划停机）。
+        """
+        i = int(self.index(week_start))
+        n = 7 * weeks
+        if 0 <= i and i + n <= len(self.working):
+            return self.working[i:i + n], self.pot[i:i + n]
+        dates = self.date_of(np.arange(1, n + 1), week_start)
+        working = np.is_busday(dates, busdaycal=self.busdaycal)
+        return working, np.where(working, self.shift_minutes, 0.0)
+
+    def pot_by_day(self, week_start, weeks):
+        """{天序号: POT 分钟}"""
+        _, pot = self.window(week_start, weeks)
+        return {d: int(v) for d, v in enumerate(pot.tolist(), start=1)}
+
+    def off_days(self, week_start, weeks):
+        """非工作日（周末 / 节假日）的天序号"""
+        working, _ = self.window(week_start, weeks)
+        return (np.flatnonzero(~working) + 1).tolist()
+
+    def weekday_names(self, days, week_start):
+        """天序号 → 星期名"""
+        dates = self.date_of(days, week_start)
+        return WEEKDAY_NAMES[(dates.astype(int) + 3) % 7].tolist()   # 1970-01-01 是周四
+
+    # ---------------- 月度统计 ----------------
+    def working_days(self, begin, end):
+        """[begin, end) 之间的工作日数，begin / end 可为数组"""
+        return np.busday_count(np.asarray(begin, dtype='datetime64[D]'),
+                               np.asarray(end, dtype='datetime64[D]'), busdaycal=self.busdaycal)
+
+
+_calendar = None
+_calendar_lock = threading.Lock()
+
+
+def get_calendar():
+    """进程内共享的日历（第一次调用时从 PLANT_CALENDAR 加载）"""
+    global _calendar
+    if _calendar is None:
+        with _calendar_lock:
+            if _calendar is None:
+                _calendar = FactoryCalendar.from_file(PLANT_CALENDAR)
+    return _calendar
+
+
+def reload_calendar(path=None):
+    """日历文件更新后重新加载"""
+    global _calendar
+    with _calendar_lock:
+        _calendar = FactoryCalendar.from_file(path or PLANT_CALENDAR)
+    return _calendar
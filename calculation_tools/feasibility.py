@@ -0,0 +1,123 @@
+# feasibility.py
+"""
+求解前的可行性分析（不调用 Gurobi）。
+
+模型里发货量固定、x[d] = cap[d] * y[d]，所以库存轨迹只取决于哪些天生产：
+    I[d] = initial + Σ_{t≤d} (cap[t]·(1-defect)·y[t] - S[t])
+- 上包络 U[d]：所有能生产的天（reachable_days：非 force_zero，且所在的段排得下
+  weekN_min_consecutive_days 天的连续区间）都满产 → 库存能达到的最高水平；
+- 下包络 L[d]：只有 force_positive 的天生产 → 库存必然达到的最低水平。
+必要条件：
+    U[d] ≥ min_inventory（且 ≥ 0，发货保护），L[d] ≤ max_inventory，
+    每一周的工时区间 [min_WD, max_WD] 与该周 [强制工时, 能生产的天的最大工时] 有交集。
+任何一条不满足即可断定 infeasible，并给出出问题的那天、缺口，
+以及能修复库存条件的最小 min_inventory / max_inventory 调整；工时条件不满足时调库存修不好，fix 为 None。
+全部满足只说明「没有发现问题」，连续性约束的组合因素仍可能导致无解。
+"""
+import math
+
+from calculation_tools.optimize_production import build_cap, continuity_windows, week_days
+
+
+def reachable_days(params):
+    """
+    可能生产的天：非 force_zero，且不是因为所在的段短于 weekN_min_consecutive_days 而开不了工的天
+    （continuity_windows 里窗口为空的天）。force_positive 的天不受连续性限制。
+    """
+    force_zero = params.get('force_zero', {})
+    blocked = {d for _, d, windows in continuity_windows(params) if not windows}
+    return {d for d in params['days'] if d not in force_zero and d not in blocked}
+
+
+def envelopes(params):
+    """返回 (days, U, L)：逐日库存上 / 下包络。"""
+    days = sorted(params['days'])
+    cap = build_cap(params)
+    keep = 1 - params['defect_rate']
+    reachable = reachable_days(params)
+    force_zero = set(params.get('force_zero', {}))
+    force_positive = set(params.get('force_positive', {})) - force_zero
+    ship = params['delivery_day']
+
+    upper, lower = [], []
+    u = l = params['initial_inventory']
+    for d in days:
+        u += (cap[d] * keep if d in reachable else 0) - ship.get(d, 0)
+        l += (cap[d] * keep if d in force_positive else 0) - ship.get(d, 0)
+        upper.append(u)
+        lower.append(l)
+    return days, upper, lower
+
+
+def analyze(params) -> dict:
+    """
+    返回
+    ----
+    {
+      'status': 'infeasible' | 'ok',
+      'violations': [{'check', 'day', 'shortfall', 'reason'}, ...],
+      'binding_day': 第一条违反所在的天（无则 None）,
+      'shortfall': 该条的缺口,
+      'fix': {'min_inventory': .., 'max_inventory': ..} 或 None（库存区间修不好）,
+    }
+    """
+    days, upper, lower = envelopes(params)
+    min_inv, max_inv = params['min_inventory'], params['max_inventory']
+    violations = []
+
+    if min_inv > max_inv:
+        violations.append({'check': 'inventory_bounds', 'day': None, 'shortfall': min_inv - max_inv,
+                           'reason': 'min_inventory is larger than max_inventory'})
+
+    # 最早跌破下限 / 突破上限的那天
+    for d, u in zip(days, upper):
+        if u < max(min_inv, 0):
+            violations.append({
+                'check': 'min_inventory', 'day': d, 'shortfall': max(min_inv, 0) - u,
+                'reason': f'even producing on every day that can run, inventory on day {d} is {u:.0f}, '
+                          f'below min_inventory {min_inv}',
+            })
+            break
+    for d, l in zip(days, lower):
+        if l > max_inv:
+            violations.append({
+                'check': 'max_inventory', 'day': d, 'shortfall': l - max_inv,
+                'reason': f'forced production alone lifts inventory on day {d} to {l:.0f}, '
+                          f'above max_inventory {max_inv}',
+            })
+            break
+
+    # 工时：逐周
+    cap = build_cap(params)
+    a = params['CT'] / 3600 / params['OEE']
+    reachable = reachable_days(params)
+    force_positive = set(params.get('force_positive', {})) - set(params.get('force_zero', {}))
+    for k, wd in week_days(params):
+        max_hours = a * sum(cap[d] for d in wd if d in reachable)
+        forced_hours = a * sum(cap[d] for d in wd if d in force_positive)
+        if max_hours < params['min_WD']:
+            violations.append({'check': 'work_hours_min', 'day': wd[0], 'shortfall': params['min_WD'] - max_hours,
+                               'reason': f'week {k}: available capacity cannot reach the minimum working hours'})
+        if forced_hours > params['max_WD']:
+            violations.append({'check': 'work_hours_max', 'day': wd[0], 'shortfall': forced_hours - params['max_WD'],
+                               'reason': f'week {k}: forced production exceeds the maximum working hours'})
+
+    if not violations:
+        return {'status': 'ok', 'violations': [], 'binding_day': None, 'shortfall': 0, 'fix': None}
+
+    # 只有库存条件的问题才能靠调整库存区间修复
+    fix = None
+    if all(v['check'] in ('min_inventory', 'max_inventory', 'inventory_bounds') for v in violations):
+        new_min = min(min_inv, math.floor(min(upper)))
+        new_max = max(max_inv, math.ceil(max(lower)), new_min)
+        if new_min >= 0:
+            fix = {'min_inventory': new_min, 'max_inventory': new_max}
+
+    first = violations[0]
+    return {
+        'status': 'infeasible',
+        'violations': violations,
+        'binding_day': first['day'],
+        'shortfall': first['shortfall'],
+        'fix': fix,
+    }
@@ -0,0 +1,180 @@
+# highs_model.py
+"""
+WeeklyProduction 模型的开源实现：同样的变量、约束名和目标函数，
+用 scipy.optimize.milp（HiGHS）求解，不占 Gurobi license。
+"""
+import time
+
+import numpy as np
+
+from calculation_tools.optimize_production import (build_cap, continuity_windows, horizon_weeks, required_weeks,
+                                                   week_days)
+
+
+def model_rows(params):
+    """
+    把模型写成矩阵形式。
+
+    返回
+    ----
+    (c, const, integrality, lb, ub, rows)
+    变量顺序为 x[d], y[d], I[d], S[d]（按 days 顺序各一段），之后是连续性窗口变量 z[w]；
+    rows 为 [(约束名, {列号: 系数}, 下界, 上界), ...]，约束名与 Gurobi 版一致。
+    """
+    days = list(params['days'])
+    n = len(days)
+    pos = {d: i for i, d in enumerate(days)}
+    continuity = continuity_windows(params)
+    windows = {}
+    for _, _, ws in continuity:
+        for w in ws:
+            windows.setdefault((w[0], w[-1]), w)
+    zcol = {key: 4 * n + j for j, key in enumerate(windows)}
+    m = 4 * n + len(zcol)
+
+    def X(d): return pos[d]
+    def Y(d): return n + pos[d]
+    def I(d): return 2 * n + pos[d]
+    def S(d): return 3 * n + pos[d]
+
+    cap = build_cap(params)
+    keep = 1 - params['defect_rate']
+    force_zero = params.get('force_zero', {})
+    force_positive = params.get('force_positive', {})
+    init = params['initial_inventory']
+
+    lb = np.zeros(m)
+    ub = np.full(m, np.inf)
+    for d in days:
+        ub[X(d)] = cap[d]
+        ub[Y(d)] = 1
+        lb[I(d)], ub[I(d)] = params['min_inventory'], params['max_inventory']
+    ub[4 * n:] = 1
+    integrality = np.zeros(m)
+    integrality[n:2 * n] = 1
+
+    rows = []
+    for d in days:
+        rows.append((f'cap_link_{d}', {X(d): 1, Y(d): -cap[d]}, 0, 0))
+    for d in force_zero:
+        if d in pos:
+            rows.append((f'force_zero_{d}', {Y(d): 1}, 0, 0))
+    for d in force_positive:
+        if d in pos and d not in force_zero:
+            rows.append((f'force_cap_{d}', {Y(d): 1}, 1, 1))
+
+    # 工作日连续性：z[w] ≤ y[t]（t ∈ w），y[d] ≤ Σ z[w]；有空间的周必须生产
+    for (first, last), w in windows.items():
+        k = (first - 1) // 7 + 1
+        for t in w:
+            rows.append((f"w{k}_block_{first}_{last}_day_{t}", {zcol[first, last]: 1, Y(t): -1}, -np.inf, 0))
+    for k, d, ws in continuity:
+        coeffs = {zcol[w[0], w[-1]]: -1 for w in ws}
+        coeffs[Y(d)] = 1
+        rows.append((f"w{k}_continuity_{d}", coeffs, -np.inf, 0))
+    for k, open_days in required_weeks(params):
+        rows.append((f"w{k}_production", {Y(d): 1 for d in open_days}, 1, np.inf))
+
+    # 库存平衡
+    for d in days:
+        coeffs = {I(d): 1, X(d): -keep, S(d): 1}
+        if d == 1:
+            rows.append((f'inv_balance_{d}', coeffs, init, init))
+        else:
+            coeffs[I(d - 1)] = -1
+            rows.append((f'inv_balance_{d}', coeffs, 0, 0))
+
+    # 固定发货量
+    for d in days:
+        qty = params['delivery_day'].get(d, 0)
+        rows.append((f'fix_ship_{d}', {S(d): 1}, qty, qty))
+
+    # 库存 ≥ 发货保护
+    for d in params['delivery_day']:
+        coeffs = {S(d): 1, X(d): -keep}
+        if d == 1:
+            rows.append((f'ship_capacity_{d}', coeffs, -np.inf, init))
+        else:
+            coeffs[I(d - 1)] = -1
+            rows.append((f'ship_capacity_{d}', coeffs, -np.inf, 0))
+
+    # 工时：逐周
+    a = params["CT"] / 3600 / params["OEE"]
+    weeks = horizon_weeks(params)
+    for k, wd in week_days(params):
+        hours = {X(d): a for d in wd}
+        rows.append((f"work_hours_max_w{k}", hours, -np.inf, params["max_WD"]))
+        rows.append((f"work_hours_min_w{k}", hours, params["min_WD"], np.inf))
+
+    c = np.zeros(m)
+    for d in days:
+        c[X(d)] = params['unit_cost']
+        c[I(d)] = params['storage_cost_per_unit_per_day']
+    for d in params['delivery_day']:
+        c[S(d)] = params['shipping_cost_per_unit']
+    const = weeks * params['num_workers'] * params['weekly_wage_per_worker']
+
+    return c, const, integrality, lb, ub, rows
+
+
+def _milp(c, integrality, lb, ub, rows):
+    from scipy.optimize import Bounds, LinearConstraint, milp
+
+    A = np.zeros((len(rows), len(c)))
+    row_lb = np.empty(len(rows))
+    row_ub = np.empty(len(rows))
+    for r, (_, coeffs, lo, hi) in enumerate(rows):
+        for col, v in coeffs.items():
+            A[r, col] += v
+        row_lb[r], row_ub[r] = lo, hi
+    constraints = LinearConstraint(A, row_lb, row_ub) if rows else ()
+    return milp(c, integrality=integrality, bounds=Bounds(lb, ub), constraints=constraints)
+
+
+class HighsModel:
+    """与 optimize_production.ProductionModel 相同接口：solve / compute_iis / close。"""
+
+    def __init__(self):
+        self._last = None
+        self.stage_seconds = {}
+
+    def solve(self, params):
+        t0 = time.perf_counter()
+        c, const, integrality, lb, ub, rows = model_rows(params)
+        t1 = time.perf_counter()
+        res = _milp(c, integrality, lb, ub, rows)
+        self.stage_seconds = {'model_build': t1 - t0, 'optimize': time.perf_counter() - t1}
+        self._last = (integrality, lb, ub, rows)
+
+        if res.status != 0:
+            print(f"Optimization ended with status {res.status}: {res.message}")
+            return None, None, None
+
+        n = len(params['days'])
+        x = res.x[:n]
+        plan = {d: float(round(x[i], 6)) for i, d in enumerate(params['days'])}
+        hours = float(x.sum()) * params["CT"] / 3600 / params["OEE"]
+        return plan, float(res.fun) + const, hours
+
+    def compute_iis(self):
+        """
+        deletion filter：逐条尝试去掉约束，去掉后仍无解就永久删除，
+        剩下的约束（变量上下界保留）即为一个不可约的不可行子系统。
+        """
+        integrality, lb, ub, rows = self._last
+        zero = np.zeros(len(lb))
+        kept = list(rows)
+        for row in list(rows):
+            trial = [r for r in kept if r is not row]
+            if _milp(zero, integrality, lb, ub, trial).status == 2:   # 2 = infeasible
+                kept = trial
+        return [name for name, *_ in kept]
+
+    def close(self):
+        self._last = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,180 @@
+# horizon.py
+"""
+长周期（一个季度 ~ 一年）的滚动求解。
+
+整段 N 周放进一个 MIP 时，二元变量和逐周连续性约束随周数增加，求解时间增长很快。
+滚动模式每次只解 ROLLING_WINDOW_WEEKS 周的窗口，只采纳前 ROLLING_STEP_WEEKS 周的计划，
+把采纳部分的期末库存作为下一个窗口的期初库存；窗口互相重叠，
+采纳的那几周仍然看得到后面一周的发货。总耗时随周数线性增长。
+enum 后端一次最多解 enumeration.MAX_ENUM_DAYS 天，阈值和窗口都按它收紧。
+"""
+import os
+
+from calculation_tools.enumeration import MAX_ENUM_DAYS
+from calculation_tools.optimize_production import horizon_weeks, week_days
+
+ROLLING_WINDOW_WEEKS = int(os.getenv("ROLLING_WINDOW_WEEKS", "2"))
+ROLLING_STEP_WEEKS = int(os.getenv("ROLLING_STEP_WEEKS", "1"))
+# 超过这个周数才滚动，否则整段一次求解
+ROLLING_THRESHOLD_WEEKS = int(os.getenv("ROLLING_THRESHOLD_WEEKS", "4"))
+
+# 按天序号做 key 的参数
+DAY_KEYED = ('POT', 'force_zero', 'force_positive', 'delivery_day')
+
+
+def window_params(params, first_week, weeks, initial_inventory):
+    """截取从第 first_week 周开始的 weeks 周，天序号、周序号都重新从 1 编号。"""
+    offset = 7 * (first_week - 1)
+    last = min(max(params['days']), offset + 7 * weeks)
+    sub = {k: v for k, v in params.items() if not k.endswith('_min_consecutive_days')}
+    sub['days'] = list(range(1, last - offset + 1))
+    for key in DAY_KEYED:
+        if key in params:
+            sub[key] = {d - offset: v for d, v in params[key].items() if offset < d <= last}
+    for k in range(1, horizon_weeks(sub) + 1):
+        key = f"week{first_week + k - 1}_min_consecutive_days"
+        if key in params:
+            sub[f"week{k}_min_consecutive_days"] = params[key]
+    sub['initial_inventory'] = initial_inventory
+    return sub
+
+
+def inventory_path(params, plan):
+    """按计划推算逐日期末库存：{day: inventory}。"""
+    keep = 1 - params['defect_rate']
+    inv, path = params['initial_inventory'], {}
+    for d in sorted(params['days']):
+        inv += (plan.get(d) or 0) * keep - params['delivery_day'].get(d, 0)
+        path[d] = inv
+    return path
+
+
+def plan_cost(params, plan):
+    """与 ProductionModel 相同的目标函数值。"""
+    inv = inventory_path(params, plan)
+    return (sum((plan.get(d) or 0) for d in params['days']) * params['unit_cost']
+            + sum(inv.values()) * params['storage_cost_per_unit_per_day']
+            + sum(params['delivery_day'].values()) * params['shipping_cost_per_unit']
+            + horizon_weeks(params) * params['num_workers'] * params['weekly_wage_per_worker'])
+
+
+def week_hours_violation(params, plan, tol=1e-6):
+    """
+    拼接后的计划逐周复核工时 [min_WD, max_WD]。
+
+    返回
+    ----
+    (周序号, 越界的约束名 'work_hours_min_w{k}' / 'work_hours_max_w{k}')，都没越界返回 None
+    """
+    a = params["CT"] / 3600 / params["OEE"]
+    for k, wd in week_days(params):
+        hours = sum((plan.get(d) or 0) for d in wd) * a
+        if hours < params["min_WD"] - tol:
+            return k, f"work_hours_min_w{k}"
+        if hours > params["max_WD"] + tol:
+            return k, f"work_hours_max_w{k}"
+    return None
+
+
+def solve_rolling(params, session, window_weeks=None, step_weeks=None):
+    """
+    滚动求解整段计划。
+
+    参数
+    ----
+    session     : 任一求解后端的 session（solve(params) → (plan, cost, hours)），窗口之间复用
+    window_weeks: 每个窗口的周数，默认 ROLLING_WINDOW_WEEKS
+    step_weeks  : 每个窗口采纳的周数，默认 ROLLING_STEP_WEEKS
+
+    返回
+    ----
+    {'plan', 'cost', 'hours', 'status': 'optimal' | 'infeasible', 'windows', 'failed_week', 'iis', 'stage_seconds'}
+    cost / hours 按整段计划重新计算；某个窗口无解（或拼接后某周工时越界）时 plan 为 None，
+    failed_week 为该窗口的起始周（越界的那一周）；拼接后工时越界时 iis 为越界的那条工时约束名
+    （各窗口都可行，没有可求 IIS 的模型），否则为 None；
+    stage_seconds 为各窗口 session.stage_seconds 之和。
+    """
+    window_weeks = window_weeks or ROLLING_WINDOW_WEEKS
+    step_weeks = min(step_weeks or ROLLING_STEP_WEEKS, window_weeks)
+    weeks = horizon_weeks(params)
+
+    plan, inventory, windows, first = {}, params['initial_inventory'], 0, 1
+    stage_seconds = {}
+    while first <= weeks:
+        span = min(window_weeks, weeks - first + 1)
+        sub = window_params(params, first, span, inventory)
+        sub_plan, _, _ = session.solve(sub)
+        windows += 1
+        for stage, sec in (getattr(session, 'stage_seconds', None) or {}).items():
+            stage_seconds[stage] = stage_seconds.get(stage, 0.0) + sec
+        if sub_plan is None:
+            return {'plan': None, 'cost': None, 'hours': None, 'status': 'infeasible',
+                    'windows': windows, 'failed_week': first, 'iis': None, 'stage_seconds': stage_seconds}
+
+        # 最后一个窗口全部采纳
+        commit = span if first + span > weeks else step_weeks
+        offset = 7 * (first - 1)
+        committed = [d for d in sub['days'] if d <= 7 * commit]
+        for d in committed:
+            plan[d + offset] = sub_plan[d]
+        inventory = inventory_path(sub, sub_plan)[committed[-1]]
+        first += commit
+
+    # 每个窗口都带逐周工时约束，采纳的又是整周，这里按整段参数再核一遍
+    violation = week_hours_violation(params, plan)
+    if violation is not None:
+        return {'plan': None, 'cost': None, 'hours': None, 'status': 'infeasible',
+                'windows': windows, 'failed_week': violation[0], 'iis': [violation[1]],
+                'stage_seconds': stage_seconds}
+
+    hours = sum(plan.values()) * params["CT"] / 3600 / params["OEE"]
+    return {'plan': plan, 'cost': plan_cost(params, plan), 'hours': hours, 'status': 'optimal',
+            'windows': windows, 'failed_week': None, 'iis': None, 'stage_seconds': stage_seconds}
+
+
+class RollingSession:
+    """
+    把普通 session 包成滚动求解：接口同样是 solve / compute_iis / close，
+    run_pipeline 在周数超过 ROLLING_THRESHOLD_WEEKS 时用它替换原 session。
+    compute_iis 给出的是最后一个（无解的）窗口里的约束，天序号为窗口内编号；
+    各窗口都可行、只是拼接后某周工时越界时，直接返回那条工时约束（周序号为整段编号）。
+    """
+
+    def __init__(self, session, window_weeks=None, step_weeks=None):
+        self.session = session
+        self.window_weeks = window_weeks
+        self.step_weeks = step_weeks
+        self.last = None
+        self.stage_seconds = {}
+
+    def solve(self, params):
+        self.last = solve_rolling(params, self.session, self.window_weeks, self.step_weeks)
+        self.stage_seconds = self.last['stage_seconds']
+        return self.last['plan'], self.last['cost'], self.last['hours']
+
+    def compute_iis(self):
+        if self.last is not None and self.last['iis'] is not None:
+            return list(self.last['iis'])   # 最后一个窗口是可行的，对它求 IIS 会出错
+        return self.session.compute_iis()
+
+    def close(self):
+        self.session.close()
+
+
+def rolling_limits(backend=None):
+    """
+    (整段求解的最大周数, 窗口周数)：enum 后端一次最多 MAX_ENUM_DAYS 天，
+    3~4 周虽然没到 ROLLING_THRESHOLD_WEEKS 也要滚动。
+    """
+    if backend == "enum":
+        max_weeks = MAX_ENUM_DAYS // 7
+        return min(ROLLING_THRESHOLD_WEEKS, max_weeks), min(ROLLING_WINDOW_WEEKS, max_weeks)
+    return ROLLING_THRESHOLD_WEEKS, ROLLING_WINDOW_WEEKS
+
+
+def wrap_session(session, params, backend=None):
+    """周数超过阈值（按 backend 收紧）时换成滚动求解，否则原样返回。"""
+    threshold, window_weeks = rolling_limits(backend)
+    if horizon_weeks(params) > threshold:
+        return RollingSession(session, window_weeks=window_weeks)
+    return session
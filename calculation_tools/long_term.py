@@ -0,0 +1,182 @@
+# long_term.py
+"""
+长期（12 ~ 24 个月）产能 / 库存推演。
+
+- 每月工作日取自工厂日历（factory_calendar，周末 + 节假日），不再假定 30 / 22 天；
+- 需求、OEE、CT 可以按分布抽样成 (场景数, 月数) 的矩阵，一次向量化算完所有场景，
+  只有库存的逐月截断需要按月循环（每步是长度为场景数的向量运算）；
+- 输出确定性计划（与原 generate_long_term_plan 相同的 columns / data）以及分位数区间。
+
+月度规则与原实现一致：
+    monthly_std = 日产能 × 当月工作日，monthly_min = 0.8 × monthly_std，
+    monthly_max = 日产能 × 当月日历天数，production = clip(demand, monthly_min, monthly_max)，
+    期末库存截断在 [min_inventory, max_inventory]。
+"""
+import datetime as dt
+import os
+
+import numpy as np
+
+from calculation_tools import factory_calendar
+
+# 月度 forecast（Gen2 long-term planning agent 文档示例数据）
+DEFAULT_FORECAST = (
+    12285, 21095, 22545, 22352, 15243, 18203,
+    9263, 9661, 10721, 9264, 10440, 11632,
+)
+INITIAL_INVENTORY = 15000   # 初始库存（可从DB取）
+MIN_PRODUCTION_RATIO = 0.8  # monthly_min = monthly_std × 0.8
+
+# 每次请求附带的场景数（0 = 只给确定性计划）与扰动幅度
+LONG_TERM_SCENARIOS = int(os.getenv("LONG_TERM_SCENARIOS", "1000"))
+DEMAND_CV = float(os.getenv("LONG_TERM_DEMAND_CV", "0.15"))   # 需求变异系数
+OEE_SD = float(os.getenv("LONG_TERM_OEE_SD", "0.03"))         # OEE 标准差（绝对值）
+CT_CV = float(os.getenv("LONG_TERM_CT_CV", "0.05"))           # CT 变异系数
+PERCENTILES = (5, 50, 95)
+
+
+def month_calendar(start, months, cal=None):
+    """
+    参数
+    ----
+    start  : 第一个月任意一天（date / 'YYYY-MM-DD'）
+    months : 月数
+    cal    : FactoryCalendar，默认 factory_calendar.get_calendar()
+
+    返回
+    ----
+    (month_starts, calendar_days, working_days)，均为长度 months 的数组
+    """
+    first = np.datetime64(str(start), 'M')
+    bounds = (first + np.arange(months + 1)).astype('datetime64[D]')
+    begin, end = bounds[:-1], bounds[1:]
+    working = (cal or factory_calendar.get_calendar()).working_days(begin, end)
+    return begin, (end - begin).astype(int), working
+
+
+def daily_capacity(params, oee=None, ct=None, pot=None):
+    """日产能：POT × 60 / CT × OEE，取整。oee / ct 可为数组（按场景）；pot 默认 POT[1]。"""
+    oee = params["OEE"] if oee is None else oee
+    ct = params["CT"] if ct is None else ct
+    pot = params["POT"][1] if pot is None else pot
+    return np.floor(pot * 60 / np.asarray(ct, dtype=float) * np.asarray(oee, dtype=float))
+
+
+def simulate(demand, cap, calendar_days, working_days, min_inventory, max_inventory,
+             initial_inventory=INITIAL_INVENTORY):
+    """
+    一次推演全部场景。
+
+    参数
+    ----
+    demand        : (S, M) 每个场景每月需求
+    cap           : (S,) 或 (S, 1) 每个场景的日产能
+    calendar_days : (M,) 当月日历天数
+    working_days  : (M,) 当月工作日
+
+    返回
+    ----
+    {'production', 'work_days', 'ending_inventory', 'stockout'}，均为 (S, M)；
+    stockout 表示截断前期末库存低于 min_inventory（需求超出可用产能 + 库存）。
+    """
+    demand = np.atleast_2d(np.asarray(demand, dtype=float))
+    cap = np.asarray(cap, dtype=float).reshape(-1, 1)
+
+    monthly_max = cap * calendar_days
+    monthly_min = np.floor(cap * working_days * MIN_PRODUCTION_RATIO)
+    production = np.minimum(np.maximum(demand, monthly_min), monthly_max)
+    work_days = np.divide(production, cap, out=np.zeros_like(production), where=cap > 0)
+
+    # 库存逐月截断，按月循环，每步对所有场景向量化
+    net = production - demand
+    ending = np.empty_like(net)
+    stockout = np.empty(net.shape, dtype=bool)
+    inv = np.full(len(net), float(initial_inventory))
+    for m in range(net.shape[1]):
+        raw = inv + net[:, m]
+        stockout[:, m] = raw < min_inventory
+        inv = np.clip(raw, min_inventory, max_inventory)
+        ending[:, m] = inv
+    return {'production': production, 'work_days': work_days, 'ending_inventory': ending, 'stockout': stockout}
+
+
+def sample_scenarios(params, forecast, n, rng, pot=None, demand_cv=DEMAND_CV, oee_sd=OEE_SD, ct_cv=CT_CV):
+    """抽样 n 个场景：需求按月独立对数正态扰动，OEE / CT 每个场景一个值。返回 (demand, cap)。"""
+    forecast = np.asarray(forecast, dtype=float)
+    sigma = np.sqrt(np.log1p(demand_cv ** 2))
+    demand = forecast * rng.lognormal(-sigma ** 2 / 2, sigma, size=(n, len(forecast)))
+    oee = np.clip(rng.normal(params["OEE"], oee_sd, size=n), 0.05, 1.0)
+    ct = np.maximum(rng.normal(params["CT"], params["CT"] * ct_cv, size=n), 1.0)
+    return np.round(demand), daily_capacity(params, oee, ct, pot)
+
+
+def bands(values, percentiles=PERCENTILES):
+    """(S, M) → 每月各分位数：[{'p5': .., 'p50': .., 'p95': ..}, ...]"""
+    q = np.percentile(values, percentiles, axis=0)
+    return [{f"p{p}": round(float(v), 1) for p, v in zip(percentiles, col)} for col in q.T]
+
+
+def plan(params, months=12, start=None, forecast=None, cal=None, scenarios=LONG_TERM_SCENARIOS, seed=None):
+    """
+    长期计划。
+
+    参数
+    ----
+    params    : run_pipeline 的参数（OEE / CT / POT / min_inventory / max_inventory）
+    months    : 月数（forecast 不够长时按 forecast 长度截断）
+    start     : 第一个月，默认下个月
+    forecast  : 月度需求，默认 DEFAULT_FORECAST
+    cal       : FactoryCalendar，默认进程内共享的工厂日历
+    scenarios : Monte-Carlo 场景数，0 表示不做
+
+    返回
+    ----
+    {"columns": [...], "data": [...]}，scenarios > 0 时另有
+    "scenarios": {"count", "percentiles", "data": [{"month", "production", "work_days",
+                  "ending_inventory", "stockout_risk"}, ...]}
+    """
+    forecast = np.asarray(forecast if forecast is not None else DEFAULT_FORECAST, dtype=float)
+    if months and months < len(forecast):
+        forecast = forecast[:months]
+    if start is None:
+        today = dt.date.today()
+        start = dt.date(today.year + (today.month == 12), today.month % 12 + 1, 1)
+
+    cal = cal or factory_calendar.get_calendar()
+    pot = cal.shift_minutes   # 一个完整工作日的 POT
+    begin, calendar_days, working_days = month_calendar(start, len(forecast), cal)
+    labels = [b.astype(dt.date).strftime("%b %Y") for b in begin]   # e.g. "Oct 2025"
+
+    base = simulate(forecast[None, :], daily_capacity(params, pot=pot), calendar_days, working_days,
+                    params["min_inventory"], params["max_inventory"])
+    data = [{
+        "month": labels[m],
+        "forecast_demand": int(forecast[m]),
+        "production": int(base['production'][0, m]),
+        "work_days": round(float(base['work_days'][0, m]), 1),
+        "ending_inventory": int(base['ending_inventory'][0, m]),
+    } for m in range(len(forecast))]
+    result = {
+        "columns": ["month", "forecast_demand", "production", "work_days", "ending_inventory"],
+        "data": data,
+    }
+
+    if scenarios:
+        rng = np.random.default_rng(seed)
+        demand, cap = sample_scenarios(params, forecast, scenarios, rng, pot)
+        sim = simulate(demand, cap, calendar_days, working_days,
+                       params["min_inventory"], params["max_inventory"])
+        prod, wd, inv = (bands(sim[k]) for k in ('production', 'work_days', 'ending_inventory'))
+        risk = sim['stockout'].mean(axis=0)
+        result["scenarios"] = {
+            "count": scenarios,
+            "percentiles": list(PERCENTILES),
+            "data": [{
+                "month": labels[m],
+                "production": prod[m],
+                "work_days": wd[m],
+                "ending_inventory": inv[m],
+                "stockout_risk": round(float(risk[m]), 3),
+            } for m in range(len(forecast))],
+        }
+    return result
@@ -1,124 +1,536 @@
-import gurobipy as gp
-from gurobipy import GRB
+import contextlib
+import copy
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-last_model = None
+# gurobipy 在第一次建模 / 创建环境时才导入（_gurobi），import app.scheduler 不加载求解器
+gp = None
+GRB = None
 
-def optimize_production(params):
-    days = params['days']
-    model = gp.Model('WeeklyProduction')
-    model.Params.OutputFlag = 0
+# 每个 Gurobi 环境的线程数；同时允许跑 optimize() 的模型数
+SOLVER_THREADS = int(os.getenv("SOLVER_THREADS", "1"))
+SOLVER_CONCURRENCY = int(os.getenv("SOLVER_CONCURRENCY", str(max(1, (os.cpu_count() or 1) // SOLVER_THREADS))))
+ENV_POOL_SIZE = int(os.getenv("SOLVER_ENV_POOL_SIZE", "8"))
+# 多进程求解（并行放宽 / 批量计划）的进程数
+SOLVER_PROCESSES = int(os.getenv("SOLVER_PROCESSES", str(os.cpu_count() or 1)))
 
-    delievery_days = list(params['delivery_day'])
+_solve_slots = threading.BoundedSemaphore(SOLVER_CONCURRENCY)
 
-    # 日产能 cap[d]
-    cap = {d: int(params["OEE"] * params["POT"][d] * 60 / params["CT"]) for d in days} # 转换为整数
 
-    print("cap[2] =", cap.get(2, None))   # 🟢 打印周二的最大产能
-    print("force_positive =", params.get('force_positive', {}))  # 🟢 打印 force_positive
+def _gurobi():
+    """导入 gurobipy 并填充模块级的 gp / GRB"""
+    global gp, GRB
+    if gp is None:
+        import gurobipy
+        gp, GRB = gurobipy, gurobipy.GRB
+    return gp
 
-    # 决策变量
-    x = model.addVars(days, name="prod", lb=0, ub=cap)  # 产量
-    y = model.addVars(days, vtype=GRB.BINARY, name='prod_flag')     # 新增一个决策其，0=停产, 1=满产
-    I = model.addVars(days, name='inv',
-                      lb=params['min_inventory'],
-                      ub=params['max_inventory'])  # 库存
-    S = model.addVars(days, name='ship', lb=0)  # 发货量
 
-    for d in days:
-        model.addConstr(x[d] == cap[d] * y[d], name=f'cap_link_{d}')  # 二者绑定
-
-# ==============新增的必须停产/生产的约束===========================
-    force_zero = params.get('force_zero', {})     # {day: ...}
-    force_positive = params.get('force_positive', {}) # {day: min_qty}
-
-    # 必须停产：x[d] == 0
-    for d in force_zero:                 # 必须停 = y[d] = 0
-        if d in days:
-            model.addConstr(y[d] == 0, name=f'force_zero_{d}')
-
-    # 必须生产（最小量）：x[d] >= min_qty
-    for d in force_positive:             # 必须满产 = y[d] = 1
-        if d in days and d not in force_zero:
-            model.addConstr(y[d] == 1, name = f'force_cap_{d}')
-# ==============================================================
-    # ========== 新增：工作日连续性约束 ==========
-    w1 = [d for d in days if 1 <= d <= 5]
-    w2 = [d for d in days if 8 <= d <= 12]
-
-    week1_min = params.get("week1_min_consecutive_days", 0)
-    week2_min = params.get("week2_min_consecutive_days", 0)
-
-    def add_continuity_constraints(week_days, min_len, week_name):
-        if min_len <= 1:  # 不要求连续，直接跳过
-            return
-        for d in week_days:
-            if d in force_positive:  # 特例：强制产的日子可以单独存在
-                continue
-            # 检查当前天是否违反“最小连续天数”
-            if d <= week_days[-1] - (min_len - 1):
-                # 如果今天生产，那么后面至少要有 (min_len-1) 天生产
-                model.addConstr(
-                    y[d] <= gp.quicksum(y[d+i] for i in range(1, min_len)),
-                    name=f"{week_name}_continuity_start_{d}"
-                )
-            # 末尾的天数要检查往前
-            if d >= week_days[0] + (min_len - 1):
-                model.addConstr(
-                    y[d] <= gp.quicksum(y[d-i] for i in range(1, min_len)),
-                    name=f"{week_name}_continuity_end_{d}"
-                )
-
-    add_continuity_constraints(w1, week1_min, "w1")
-    add_continuity_constraints(w2, week2_min, "w2")
-    # ===========================================================
-
-
-    # 库存平衡
-    for d in days:
-        prev_inv = params['initial_inventory'] if d == 1 else I[d - 1]
-        model.addConstr(
-            I[d] == prev_inv + x[d] * (1 - params['defect_rate']) - S[d],
-            name=f'inv_balance_{d}'
-        )
+class EnvPool:
+    """
+    预先创建好的 gp.Env 池（有上限）。
+
+    每个请求从池里借一个 env 建模，用完归还，避免每次隐式初始化环境；
+    池满时 acquire 阻塞等待。真正占 CPU 的 optimize() 另由 SOLVER_CONCURRENCY
+    控制，所以 env 数可以大于核数而不会超订 CPU。
+    """
+
+    def __init__(self, size=ENV_POOL_SIZE, threads=SOLVER_THREADS):
+        self.size = size
+        self.threads = threads
+        self._free = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_env(self):
+        env = _gurobi().Env(empty=True)
+        env.setParam("OutputFlag", 0)
+        env.setParam("Threads", self.threads)
+        env.start()
+        return env
+
+    def warm_up(self, n=None):
+        """提前创建 n 个（默认全部）环境。"""
+        n = self.size if n is None else min(n, self.size)
+        with self._lock:
+            while self._created < n:
+                self._free.put(self._new_env())
+                self._created += 1
+
+    def acquire(self, timeout=None):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._new_env()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("no Gurobi environment available") from None
+
+    def release(self, env):
+        self._free.put(env)
+
+    def close(self):
+        while True:
+            try:
+                env = self._free.get_nowait()
+            except queue.Empty:
+                break
+            env.dispose()
+            with self._lock:
+                self._created -= 1
+
+
+_env_pool = None
+_env_pool_lock = threading.Lock()
+
+
+def get_env_pool():
+    global _env_pool
+    with _env_pool_lock:
+        if _env_pool is None:
+            _env_pool = EnvPool()
+        return _env_pool
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """
+    进程级求解池（懒加载，全进程共享）。
+    用 spawn：子进程自己初始化 Gurobi 环境，不继承父进程的 env。
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=SOLVER_PROCESSES,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+def reset_pools():
+    """
+    fork 之后调用：丢弃从父进程继承的 env 池和进程池（不关闭，它们属于父进程），
+    下次 get_env_pool / get_process_pool 时在本进程重新创建。
+    """
+    global _env_pool, _process_pool, _env_pool_lock, _process_pool_lock
+    _env_pool_lock = threading.Lock()
+    _process_pool_lock = threading.Lock()
+    _env_pool = None
+    _process_pool = None
+
 
-    # 固定发货量（周二&周五）
+def build_cap(params):
+    # 日产能 cap[d]，转换为整数
+    return {d: int(params["OEE"] * params["POT"][d] * 60 / params["CT"]) for d in params['days']}
+
+
+def horizon_weeks(params):
+    """计划跨几周：days 从 1 开始连续编号，按 7 天一周向上取整。"""
+    return -(-max(params['days']) // 7)
+
+
+def week_blocks(params):
+    """
+    逐周的工作日（周一~周五）及该周最少连续生产天数。
+
+    返回
+    ----
+    [(k, [天序号, ...], params['week{k}_min_consecutive_days']), ...]，k 从 1 开始
+    """
+    days = set(params['days'])
+    return [(k, [d for d in range(7 * k - 6, 7 * k - 1) if d in days],
+             params.get(f"week{k}_min_consecutive_days", 0))
+            for k in range(1, horizon_weeks(params) + 1)]
+
+
+def week_days(params):
+    """
+    逐周的全部天序号（含周末），按周加总的约束（工时）用。
+
+    返回
+    ----
+    [(k, [天序号, ...]), ...]，k 从 1 开始
+    """
+    days = set(params['days'])
+    return [(k, [d for d in range(7 * k - 6, 7 * k + 1) if d in days])
+            for k in range(1, horizon_weeks(params) + 1)]
+
+
+def consecutive_runs(days):
+    """把升序天序号切成连续区间。"""
+    runs, cur = [], []
     for d in days:
-        fixed_qty = params['delivery_day'].get(d, 0)
-        model.addConstr(S[d] == fixed_qty, name=f'fix_ship_{d}')
-
-    # 库存 ≥ 发货保护 -----------------------------
-    for d in params['delivery_day']:
-        # 当日生产完后可用库存（出货前）
-        available = (params['initial_inventory']
-                     if d == 1 else I[d - 1]) \
-                    + x[d] * (1 - params['defect_rate'])
-        model.addConstr(S[d] <= available, name=f'ship_capacity_{d}')
-        # -----------------------------------------------------
-
-    # 每周工时约束
-    weekly_hours = (gp.quicksum(x[d] * params["CT"] / 3600 for d in days)
-                    / params["OEE"])  # CT是秒，转化为小时需要除3600
-    model.addConstr(weekly_hours <= 2 * params["max_WD"], name="work_hours_max")
-    model.addConstr(weekly_hours >= 2 * params["min_WD"], name="work_hours_min")
-
-    # 成本最小化目标
-    prod_cost = gp.quicksum(x[d] * params['unit_cost'] for d in days)
-    wages = 2 * params['num_workers'] * params['weekly_wage_per_worker']
-    storage = gp.quicksum(I[d] * params['storage_cost_per_unit_per_day']
-                          for d in days)
-    ship_cost = gp.quicksum(S[d] * params['shipping_cost_per_unit']
-                            for d in delievery_days)
-    model.setObjective(prod_cost + wages + storage + ship_cost, GRB.MINIMIZE)
-
-    # 求解
-    model.optimize()
-    global last_model
-    last_model = model
-
-    if model.status == GRB.OPTIMAL:
-        prod_plan = {d: x[d].X for d in days}
-        total_cost = model.ObjVal
-        return prod_plan, total_cost, weekly_hours.getValue()
-    else:
-        print(f"Optimization ended with status {model.status}: {model.Status}")
-        return None, None, None
\ No newline at end of file
+        if cur and d != cur[-1] + 1:
+            runs.append(cur)
+            cur = []
+        cur.append(d)
+    if cur:
+        runs.append(cur)
+    return runs
+
+
+def continuity_windows(params):
+    """
+    逐周连续生产规则（plan_auditor 审核的也是这一条）：每周工作日被 force_zero 的日子切成若干段，
+    每个生产区间至少 weekN_min_consecutive_days 天；force_positive 的日子可以连进区间，自身不受限制。
+
+    返回
+    ----
+    [(k, d, [[天序号, ...], ...]), ...]：第 k 周每个非 force_positive 的开放工作日 d，
+    以及同一段内包含 d、长度为 min_len 的所有窗口。d 生产 ⇔ 至少有一个窗口全部生产；
+    窗口为空表示 d 所在的段不够长，d 不能生产。
+    """
+    force_zero = params.get('force_zero', {})
+    force_positive = params.get('force_positive', {})
+    rules = []
+    for k, week_days, min_len in week_blocks(params):
+        if min_len <= 1:
+            continue
+        for seg in consecutive_runs([d for d in week_days if d not in force_zero]):
+            for i, d in enumerate(seg):
+                if d in force_positive:
+                    continue
+                starts = range(max(0, i - min_len + 1), min(i, len(seg) - min_len) + 1)
+                rules.append((k, d, [seg[s:s + min_len] for s in starts]))
+    return rules
+
+
+def required_weeks(params):
+    """
+    [(k, [天序号, ...]), ...]：第 k 周还排得下一个 min_len 天的区间（非 force_zero、非 force_positive
+    的连续工作日足够），这一周的开放工作日里必须有生产。
+    """
+    force_zero = params.get('force_zero', {})
+    force_positive = params.get('force_positive', {})
+    weeks = []
+    for k, week_days, min_len in week_blocks(params):
+        open_days = [d for d in week_days if d not in force_zero]
+        free = [d for d in open_days if d not in force_positive]
+        if min_len > 0 and max(map(len, consecutive_runs(free)), default=0) >= min_len:
+            weeks.append((k, open_days))
+    return weeks
+
+
+class ProductionModel:
+    """
+    可复用的 WeeklyProduction 模型。
+
+    第一次 solve 时完整建模；之后再 solve 只修改与上一次参数不同的
+    上下界、右端项和系数（min/max_inventory、OEE、CT、force_zero/force_positive …），
+    并把上一次的最优解作为 MIP start。
+    days 或发货日集合变化时才整体重建。
+
+    用法
+    ----
+    session = ProductionModel()
+    plan, cost, hours = session.solve(params)
+    ...                                   # 调整 params
+    plan, cost, hours = session.solve(params)
+    iis = session.compute_iis()           # 最近一次 infeasible 时
+    session.stage_seconds                 # 最近一次 solve 的分阶段耗时（model_build / solver_wait / optimize）
+    """
+
+    def __init__(self, env=None):
+        self.env = env
+        self.model = None
+        self._params = None
+        self._start = None
+        self.stage_seconds = {}
+
+    # ---------------- 派生数据 ----------------
+    @staticmethod
+    def _structure(params):
+        return tuple(params['days']), tuple(sorted(params['delivery_day']))
+
+    @staticmethod
+    def _cap(params):
+        return build_cap(params)
+
+    @staticmethod
+    def _hour_coeff(params):
+        # CT是秒，转化为小时需要除3600
+        return params["CT"] / 3600 / params["OEE"]
+
+    @staticmethod
+    def _continuity_key(params):
+        return (tuple(sorted(params.get('force_positive', {}))),
+                tuple(sorted(params.get('force_zero', {}))),
+                tuple(min_len for _, _, min_len in week_blocks(params)))
+
+    # ---------------- 建模 ----------------
+    def _build(self, params):
+        if self.model is not None:
+            self.model.dispose()
+        days = params['days']
+        _gurobi()
+        model = gp.Model('WeeklyProduction', env=self.env) if self.env is not None \
+            else gp.Model('WeeklyProduction')
+        model.Params.OutputFlag = 0
+
+        cap = self._cap(params)
+        keep = 1 - params['defect_rate']
+
+        # 决策变量
+        x = model.addVars(days, name="prod", lb=0, ub=cap)  # 产量
+        y = model.addVars(days, vtype=GRB.BINARY, name='prod_flag')  # 0=停产, 1=满产
+        I = model.addVars(days, name='inv',
+                          lb=params['min_inventory'],
+                          ub=params['max_inventory'])  # 库存
+        S = model.addVars(days, name='ship', lb=0)  # 发货量
+
+        cons = {}
+        for d in days:
+            cons['cap_link', d] = model.addConstr(x[d] - cap[d] * y[d] == 0, name=f'cap_link_{d}')
+
+        # 必须停产 / 必须满产：每天都建一条，靠右端项开关，便于增量修改
+        force_zero = params.get('force_zero', {})
+        force_positive = params.get('force_positive', {})
+        for d in days:
+            cons['force_zero', d] = model.addConstr(
+                y[d] <= (0 if d in force_zero else 1), name=f'force_zero_{d}')
+            cons['force_cap', d] = model.addConstr(
+                y[d] >= (1 if d in force_positive and d not in force_zero else 0), name=f'force_cap_{d}')
+
+        # 库存平衡：I[d] - I[d-1] - x[d]*(1-defect) + S[d] == 0（第 1 天右端为期初库存）
+        for d in days:
+            if d == 1:
+                cons['inv_balance', d] = model.addConstr(
+                    I[d] - keep * x[d] + S[d] == params['initial_inventory'], name=f'inv_balance_{d}')
+            else:
+                cons['inv_balance', d] = model.addConstr(
+                    I[d] - I[d - 1] - keep * x[d] + S[d] == 0, name=f'inv_balance_{d}')
+
+        # 固定发货量（周二&周五）
+        for d in days:
+            cons['fix_ship', d] = model.addConstr(
+                S[d] == params['delivery_day'].get(d, 0), name=f'fix_ship_{d}')
+
+        # 库存 ≥ 发货保护：当日生产完后可用库存（出货前）
+        for d in params['delivery_day']:
+            if d == 1:
+                cons['ship_capacity', d] = model.addConstr(
+                    S[d] - keep * x[d] <= params['initial_inventory'], name=f'ship_capacity_{d}')
+            else:
+                cons['ship_capacity', d] = model.addConstr(
+                    S[d] - I[d - 1] - keep * x[d] <= 0, name=f'ship_capacity_{d}')
+
+        # 工时约束：每一周各自在 [min_WD, max_WD] 内
+        a = self._hour_coeff(params)
+        for k, wd in week_days(params):
+            hours = gp.quicksum(a * x[d] for d in wd)
+            cons['work_hours_max', k] = model.addConstr(hours <= params["max_WD"], name=f"work_hours_max_w{k}")
+            cons['work_hours_min', k] = model.addConstr(hours >= params["min_WD"], name=f"work_hours_min_w{k}")
+
+        self.model, self.x, self.y, self.I, self.S, self.cons = model, x, y, I, S, cons
+        self._continuity, self._continuity_vars = [], []
+        self._add_continuity(params)
+        self._set_objective(params)
+        self._start = None
+
+    def _add_continuity(self, params):
+        """
+        工作日连续性（continuity_windows / required_weeks，与 plan_auditor 同一规则）：
+        窗口变量 z[w] ≤ y[t]（t ∈ w），非 force_positive 的 d：y[d] ≤ Σ z[w]。
+        y 是二元变量，z 取连续值即可。
+        """
+        model, y = self.model, self.y
+        z = {}
+        for k, d, windows in continuity_windows(params):
+            for w in windows:
+                key = (w[0], w[-1])
+                if key not in z:
+                    z[key] = model.addVar(lb=0, ub=1, name=f"w{k}_block_{w[0]}_{w[-1]}")
+                    self._continuity_vars.append(z[key])
+                    for t in w:
+                        self._continuity.append(model.addConstr(
+                            z[key] <= y[t], name=f"w{k}_block_{w[0]}_{w[-1]}_day_{t}"))
+            self._continuity.append(model.addConstr(
+                y[d] <= gp.quicksum(z[w[0], w[-1]] for w in windows), name=f"w{k}_continuity_{d}"))
+        for k, open_days in required_weeks(params):
+            self._continuity.append(model.addConstr(
+                gp.quicksum(y[d] for d in open_days) >= 1, name=f"w{k}_production"))
+
+    def _set_objective(self, params):
+        # 成本最小化目标：生产 + 库存 + 运输，工资为常数项
+        days = params['days']
+        self.model.setObjective(
+            gp.quicksum(self.x[d] * params['unit_cost'] for d in days)
+            + gp.quicksum(self.I[d] * params['storage_cost_per_unit_per_day'] for d in days)
+            + gp.quicksum(self.S[d] * params['shipping_cost_per_unit'] for d in params['delivery_day'])
+            + horizon_weeks(params) * params['num_workers'] * params['weekly_wage_per_worker'],
+            GRB.MINIMIZE)
+
+    # ---------------- 增量修改 ----------------
+    def _update(self, params):
+        old, m, c = self._params, self.model, self.cons
+        days = params['days']
+
+        if (old['min_inventory'], old['max_inventory']) != (params['min_inventory'], params['max_inventory']):
+            for d in days:
+                self.I[d].LB = params['min_inventory']
+                self.I[d].UB = params['max_inventory']
+
+        old_cap, cap = self._cap(old), self._cap(params)
+        for d in days:
+            if old_cap[d] != cap[d]:
+                self.x[d].UB = cap[d]
+                m.chgCoeff(c['cap_link', d], self.y[d], -cap[d])
+
+        if old['defect_rate'] != params['defect_rate']:
+            keep = 1 - params['defect_rate']
+            for d in days:
+                m.chgCoeff(c['inv_balance', d], self.x[d], -keep)
+            for d in params['delivery_day']:
+                m.chgCoeff(c['ship_capacity', d], self.x[d], -keep)
+
+        if old['initial_inventory'] != params['initial_inventory']:
+            c['inv_balance', 1].RHS = params['initial_inventory']
+            if ('ship_capacity', 1) in c:
+                c['ship_capacity', 1].RHS = params['initial_inventory']
+
+        for d in days:
+            qty = params['delivery_day'].get(d, 0)
+            if old['delivery_day'].get(d, 0) != qty:
+                c['fix_ship', d].RHS = qty
+
+        old_fz, old_fp = old.get('force_zero', {}), old.get('force_positive', {})
+        fz, fp = params.get('force_zero', {}), params.get('force_positive', {})
+        for d in days:
+            if (d in old_fz) != (d in fz):
+                c['force_zero', d].RHS = 0 if d in fz else 1
+            if (d in old_fp and d not in old_fz) != (d in fp and d not in fz):
+                c['force_cap', d].RHS = 1 if d in fp and d not in fz else 0
+
+        if self._continuity_key(old) != self._continuity_key(params):
+            for item in self._continuity + self._continuity_vars:
+                m.remove(item)
+            self._continuity, self._continuity_vars = [], []
+            self._add_continuity(params)
+
+        a_old, a = self._hour_coeff(old), self._hour_coeff(params)
+        for k, wd in week_days(params):
+            if a_old != a:
+                for d in wd:
+                    m.chgCoeff(c['work_hours_max', k], self.x[d], a)
+                    m.chgCoeff(c['work_hours_min', k], self.x[d], a)
+            if old['max_WD'] != params['max_WD']:
+                c['work_hours_max', k].RHS = params['max_WD']
+            if old['min_WD'] != params['min_WD']:
+                c['work_hours_min', k].RHS = params['min_WD']
+
+        cost_keys = ('unit_cost', 'storage_cost_per_unit_per_day', 'shipping_cost_per_unit',
+                     'num_workers', 'weekly_wage_per_worker')
+        if any(old[k] != params[k] for k in cost_keys):
+            self._set_objective(params)
+
+    # ---------------- 求解 ----------------
+    def solve(self, params):
+        t0 = time.perf_counter()
+        if self.model is None or self._structure(self._params) != self._structure(params):
+            self._build(params)
+        else:
+            self._update(params)
+        self._params = copy.deepcopy(params)
+
+        print("cap[2] =", self._cap(params).get(2, None))   # 🟢 打印周二的最大产能
+        print("force_positive =", params.get('force_positive', {}))  # 🟢 打印 force_positive
+
+        # 用上一次的最优解热启动
+        if self._start is not None:
+            for d, v in self._start.items():
+                self.y[d].Start = v
+
+        t1 = time.perf_counter()
+        with _solve_slots:
+            t2 = time.perf_counter()
+            self.model.optimize()
+        self.stage_seconds = {'model_build': t1 - t0, 'solver_wait': t2 - t1,
+                              'optimize': time.perf_counter() - t2}
+
+        days = params['days']
+        if self.model.status == GRB.OPTIMAL:
+            self._start = {d: round(self.y[d].X) for d in days}
+            prod_plan = {d: self.x[d].X for d in days}
+            hours = sum(self.x[d].X for d in days) * self._hour_coeff(params)
+            return prod_plan, self.model.ObjVal, hours
+        else:
+            print(f"Optimization ended with status {self.model.status}: {self.model.Status}")
+            return None, None, None
+
+    def compute_iis(self):
+        """对最近一次 infeasible 的模型求 IIS，返回约束名列表。"""
+        self.model.computeIIS()
+        return [c.ConstrName for c in self.model.getConstrs() if c.IISConstr]
+
+    def close(self):
+        if self.model is not None:
+            self.model.dispose()
+            self.model = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextlib.contextmanager
+def solver_session(pool=None, timeout=None):
+    """
+    从环境池借一个 env，返回绑定在它上面的 ProductionModel；退出时释放模型并归还 env。
+    每个请求/线程各用各的 session，互不覆盖。
+    """
+    pool = pool or get_env_pool()
+    env = pool.acquire(timeout=timeout)
+    session = ProductionModel(env=env)
+    try:
+        yield session
+    finally:
+        session.close()
+        pool.release(env)
+
+
+def solve_production(params, compute_iis=True):
+    """
+    一次性求解，结果直接返回给调用方（不再经由模块全局变量）。
+
+    返回
+    ----
+    {'plan', 'cost', 'hours', 'status', 'iis'}
+    infeasible 时 plan/cost/hours 为 None，compute_iis=True 则 iis 为约束名列表。
+    """
+    with solver_session() as session:
+        plan, cost, hours = session.solve(params)
+        iis = session.compute_iis() if plan is None and compute_iis else []
+        return {
+            'plan': plan,
+            'cost': cost,
+            'hours': hours,
+            'status': session.model.Status,
+            'iis': iis,
+        }
+
+
+def optimize_production(params):
+    with solver_session() as session:
+        return session.solve(params)
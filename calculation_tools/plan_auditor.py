@@ -0,0 +1,88 @@
+# plan_auditor.py
+"""
+本地确定性审核：与 assistant3 的审核规则一致，直接由 plan / cap / params 计算结论，
+不再需要 LLM 往返。输出字段与 assistant3 相同：action / valid / violations。
+
+规则（见 assistant3 system prompt 与 scheduler.RULES）
+----
+* 每周只看工作日（周一~周五），周末不参与连续性检查；节假日与 force_zero 的日子把一周切成几段；
+* 每个生产区间必须至少 weekN_min_consecutive_days 天，长度不足的生产日记为违规；
+* 该周还有空间（非 force_zero / 节假日的连续工作日足够）却完全不生产，记为违规；
+* force_positive 的日子永远合法：可以和相邻生产日连成区间，自身不产生违规；
+* 节假日（非 force_positive）有产量、产量超过 cap，记为违规。
+
+连续性规则与求解模型共用 optimize_production.continuity_windows / required_weeks，
+求解器给出的最优计划一定能通过审核。
+"""
+from calculation_tools.optimize_production import (consecutive_runs, continuity_windows, horizon_weeks,
+                                                   required_weeks, week_blocks)
+
+EPS = 1e-6
+
+
+def audit_plan(plan, cap, params, holidays=(), rules=None) -> dict:
+    """
+    参数
+    ----
+    plan     : {day: qty}（key 可为 int 或 str）
+    cap      : build_cap(params) 的结果
+    params   : run_pipeline 的参数（force_zero / force_positive / weekN_min_consecutive_days）
+    holidays : 节假日天序号
+    rules    : scheduler.RULES（params 里没有 weekN_min_consecutive_days 时用 min_consecutive_days）
+
+    返回
+    ----
+    {"action": "accept" | "tweak", "valid": bool, "violations": [{"day", "reason"}]}
+    """
+    rules = rules or {}
+    plan = {int(k): v or 0 for k, v in plan.items()}
+    cap = {int(k): v for k, v in cap.items()}
+    force_positive = {int(k) for k in params.get('force_positive', {})}
+    holidays = {int(d) for d in holidays}
+
+    # 节假日（非 force_positive）与 force_zero 一样不能生产、切断区间
+    rule_params = {
+        **params,
+        'days': sorted(params.get('days') or plan),
+        'force_zero': {**{int(k): v for k, v in params.get('force_zero', {}).items()},
+                       **{d: 0 for d in holidays if d not in force_positive}},
+        'force_positive': {d: 0 for d in force_positive},
+    }
+    for k in range(1, horizon_weeks(rule_params) + 1):
+        rule_params.setdefault(f"week{k}_min_consecutive_days", rules.get("min_consecutive_days", 0))
+
+    violations = []
+    for d in sorted(plan):
+        if d in force_positive:
+            continue
+        if plan[d] > cap.get(d, plan[d]) + EPS:
+            violations.append({"day": d, "reason": f"production {plan[d]:g} exceeds capacity {cap[d]}"})
+        if d in holidays and plan[d] > EPS:
+            violations.append({"day": d, "reason": "production scheduled on a holiday"})
+
+    producing = {d for d, qty in plan.items() if qty > EPS}
+    windows = {d: ws for _, d, ws in continuity_windows(rule_params)}
+    for week, week_days, min_len in week_blocks(rule_params):
+        open_days = [d for d in week_days if d not in rule_params['force_zero']]
+        for run in consecutive_runs([d for d in open_days if d in producing]):
+            for d in run:
+                if d in windows and not any(all(t in producing for t in w) for w in windows[d]):
+                    violations.append({
+                        "day": d,
+                        "reason": f"week {week}: production block of {len(run)} day(s) "
+                                  f"is shorter than the {min_len}-day minimum",
+                    })
+
+    for week, open_days in required_weeks(rule_params):
+        if not producing.intersection(open_days):
+            min_len = rule_params[f"week{week}_min_consecutive_days"]
+            violations.append({
+                "day": next(d for d in open_days if d not in force_positive),
+                "reason": f"week {week}: no continuous production block of at least {min_len} weekdays",
+            })
+
+    return {
+        "action": "tweak" if violations else "accept",
+        "valid": not violations,
+        "violations": violations,
+    }
@@ -0,0 +1,118 @@
+# relaxation.py
+"""
+infeasible 时的投机式并行放宽：围绕当前参数生成一组候选放宽方案，
+在进程池里一次性并行求解，取最便宜的「可行且通过本地审核」的方案，
+代替 assistant2 一轮一轮地串行试 min/max_inventory。
+"""
+import copy
+
+from calculation_tools import optimize_production, plan_auditor, solver_backends
+
+# 库存下限 / 上限的缩放系数
+MIN_INVENTORY_FACTORS = (1.0, 0.75, 0.5, 0.25, 0.0)
+MAX_INVENTORY_FACTORS = (1.0, 1.25, 1.5, 2.0)
+
+def candidate_relaxations(params, holidays=()):
+    """
+    生成候选放宽方案。
+
+    返回
+    ----
+    [(changes, params), ...]，changes 记录相对原参数改了什么：
+    {'min_inventory': (old, new), 'max_inventory': (old, new),
+     'drop_force_zero': day, 'weekN_min_consecutive_days': (old, new)}
+    """
+    base_min, base_max = params['min_inventory'], params['max_inventory']
+    candidates = []
+
+    def add(changes, **updates):
+        cand = copy.deepcopy(params)
+        cand.update(updates)
+        candidates.append((changes, cand))
+
+    # 1) 库存区间网格
+    for f_min in MIN_INVENTORY_FACTORS:
+        for f_max in MAX_INVENTORY_FACTORS:
+            if f_min == 1.0 and f_max == 1.0:
+                continue
+            new_min = int(base_min * f_min)
+            new_max = max(new_min, int(base_max * f_max))
+            changes = {}
+            if new_min != base_min:
+                changes['min_inventory'] = (base_min, new_min)
+            if new_max != base_max:
+                changes['max_inventory'] = (base_max, new_max)
+            if changes:
+                add(changes, min_inventory=new_min, max_inventory=new_max)
+
+    # 2) 逐个取消非节假日的 force_zero
+    for d in sorted(params.get('force_zero', {})):
+        if d in holidays:
+            continue
+        force_zero = {k: v for k, v in params['force_zero'].items() if k != d}
+        add({'drop_force_zero': d}, force_zero=force_zero)
+
+    # 3) 每周最少连续天数减 1
+    for key in sorted(k for k in params if k.endswith('_min_consecutive_days')):
+        if params[key] > 1:
+            add({key: (params[key], params[key] - 1)}, **{key: params[key] - 1})
+
+    return candidates
+
+
+def distance(changes):
+    """放宽幅度：库存按相对变化计，取消一个 force_zero / 连续天数减 1 各计 1。"""
+    total = 0.0
+    for key, change in changes.items():
+        if key in ('min_inventory', 'max_inventory'):
+            old, new = change
+            total += abs(new - old) / max(abs(old), 1)
+        elif key == 'drop_force_zero':
+            total += 1
+        else:
+            total += change[0] - change[1]
+    return round(total, 4)
+
+
+def _solve(params):
+    return solver_backends.solve(params)
+
+
+def explore(params, holidays=(), rules=None, executor=None):
+    """
+    并行求解全部候选，返回最便宜的可行且合规方案（同价取放宽幅度小的）。
+
+    返回
+    ----
+    None（没有可行合规的候选）或
+    {'params', 'plan', 'cost', 'hours', 'changes', 'distance', 'candidates', 'feasible'}
+    """
+    candidates = candidate_relaxations(params, holidays)
+    executor = executor or optimize_production.get_process_pool()
+    results = list(executor.map(_solve, [cand for _, cand in candidates]))
+
+    best, feasible = None, 0
+    for (changes, cand), (plan, cost, hours) in zip(candidates, results):
+        if plan is None:
+            continue
+        feasible += 1
+        cap = optimize_production.build_cap(cand)
+        if not plan_auditor.audit_plan(plan, cap, cand, holidays=holidays, rules=rules)['valid']:
+            continue
+        rank = (cost, distance(changes))
+        if best is None or rank < best[0]:
+            best = (rank, changes, cand, plan, cost, hours)
+
+    if best is None:
+        return None
+    _, changes, cand, plan, cost, hours = best
+    return {
+        'params': cand,
+        'plan': plan,
+        'cost': cost,
+        'hours': hours,
+        'changes': changes,
+        'distance': distance(changes),
+        'candidates': len(candidates),
+        'feasible': feasible,
+    }
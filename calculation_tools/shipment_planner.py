@@ -1,15 +1,37 @@
 # shipment_planner.py
+import hashlib
+import io
+import os
 import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
-import pandas as pd
+from typing import TYPE_CHECKING
+import numpy as np
+
+from calculation_tools.factory_calendar import FactoryCalendar
+
+if TYPE_CHECKING:
+    import pandas as pd   # 运行时在用到的函数里再导入：import app.scheduler 不必付 pandas 的导入开销
 
 SHIP_RULE = {  # weekday: (start_offset, end_offset)
     1: (3, 6),  # Tue -> Fri ~ Mon
     4: (4, 6),  # Fri -> next Tue ~ Thu
 }
 
+# DELFOR 解析缓存：绝对路径 -> ((mtime_ns, size), sha1, {'daily': DataFrame, 'plan': DataFrame})
+DELFOR_CACHE_SIZE = int(os.getenv('DELFOR_CACHE_SIZE', '8'))
+
+_delfor_cache: 'OrderedDict[str, tuple]' = OrderedDict()
+_delfor_lock = threading.Lock()                      # 只保护 _delfor_cache / _parse_locks 本身
+_parse_locks: 'dict[str, threading.Lock]' = {}       # 每个文件一把：同一文件只解析一次，不同文件互不阻塞
+
 
-def compute_shipments(df: pd.DataFrame) -> pd.DataFrame:
+class DelforCoverageError(ValueError):
+    """请求的计划周数超出了 DELFOR 发货数据覆盖的范围（输入问题，不是服务故障）"""
+
+
+def compute_shipments(df: 'pd.DataFrame') -> 'pd.DataFrame':
     """
     参数
     ----
@@ -22,91 +44,218 @@ def compute_shipments(df: pd.DataFrame) -> pd.DataFrame:
     ship_day        : 'Tuesday' / 'Friday'
     covers          : 'YYYY-MM-DD→YYYY-MM-DD'
     shipment_qty    : int
+
+    实现：把每日需求铺到一条连续的日历数组上做 cumsum，
+    每个发货窗口 [start_off, end_off] 的量 = csum[end+1] - csum[start]，
+    一次向量化算完所有周二/周五，不再逐日 reindex。
     """
-    df = df.copy()
-    df['schedule begin.1'] = pd.to_datetime(df['schedule begin.1'], errors='coerce')
-    if df['schedule begin.1'].isna().any():
+    import pandas as pd
+
+    dates = pd.to_datetime(df['schedule begin.1'], errors='coerce')
+    if dates.isna().any():
         raise ValueError('❌ 存在无法解析为日期的 schedule begin 值！')
 
-    daily = (df
-             .groupby('schedule begin.1', as_index=False)['quantity']
+    daily = (df['quantity']
+             .groupby(dates.to_numpy())
              .sum()
-             .set_index('schedule begin.1')
              .sort_index())
+    if daily.empty:
+        return pd.DataFrame({
+            'ship_date': pd.Series(dtype='datetime64[ns]'),
+            'ship_day': pd.Series(dtype=object),
+            'covers': pd.Series(dtype=object),
+            'shipment_qty': pd.Series(dtype=int),
+        })
 
-    shipments = []
-    for ship_date in daily.index:
-        wd = ship_date.weekday()
-        if wd not in SHIP_RULE:
-            continue
+    idx = pd.DatetimeIndex(daily.index)
+    pos = (idx - idx[0]).days.to_numpy()
+    max_end = max(end for _, end in SHIP_RULE.values())
 
-        start_off, end_off = SHIP_RULE[wd]
-        start = ship_date + pd.Timedelta(days=start_off)
-        end = ship_date + pd.Timedelta(days=end_off)
+    dense = np.zeros(pos[-1] + max_end + 1)
+    dense[pos] = daily.to_numpy(dtype=float)
+    csum = np.concatenate(([0.0], np.cumsum(dense)))
 
-        rng = pd.date_range(start, end, freq='D')
-        qty = daily.reindex(rng, fill_value=0)['quantity'].sum()
+    start_of = np.zeros(7, dtype=int)
+    end_of = np.zeros(7, dtype=int)
+    for wd, (start_off, end_off) in SHIP_RULE.items():
+        start_of[wd], end_of[wd] = start_off, end_off
 
-        shipments.append({
-            'ship_date': ship_date,  # Timestamp 保留 dtype
-            'ship_day': ship_date.strftime('%A'),
-            'covers': f'{start.date()}→{end.date()}',
-            'shipment_qty': int(qty)
-        })
+    weekday = idx.weekday.to_numpy()
+    is_ship = np.isin(weekday, list(SHIP_RULE))
+    ship_pos, ship_wd = pos[is_ship], weekday[is_ship]
+    start_off, end_off = start_of[ship_wd], end_of[ship_wd]
+
+    qty = csum[ship_pos + end_off + 1] - csum[ship_pos + start_off]
+    qty = np.trunc(np.round(qty, 6)).astype(int)   # 与逐项求和后 int() 一致
+
+    ship_date = idx[is_ship]
+    start = ship_date + pd.to_timedelta(start_off, unit='D')
+    end = ship_date + pd.to_timedelta(end_off, unit='D')
 
-    return (pd.DataFrame(shipments)
-            .sort_values('ship_date')
-            .reset_index(drop=True))
+    return pd.DataFrame({
+        'ship_date': ship_date,
+        'ship_day': ship_date.day_name(),
+        'covers': start.strftime('%Y-%m-%d') + '→' + end.strftime('%Y-%m-%d'),
+        'shipment_qty': qty,
+    })
 
 
 # ---------------- 辅助聚合 ----------------
-def shipments_to_delivery(plan: pd.DataFrame,
+def delivery_for_horizon(plan: 'pd.DataFrame',
+                         week_start: str,
+                         weeks: int = 1
+                         ) -> dict[int, int]:
+    """
+    把发货计划映射到模型的天序号上。
+
+    参数
+    ----
+    plan       : compute_shipments 的结果
+    week_start : 第 1 天（周一）的日期
+    weeks      : 覆盖的周数，天序号范围 1 … 7*weeks
+
+    返回
+    ----
+    {day_index: qty}，例如 weeks=2 → {2: .., 5: .., 9: .., 12: ..}
+
+    DELFOR 的发货数据在第 weeks 周之前就结束时抛 DelforCoverageError（后面几周没有需求，
+    求解只会因为库存超上限而无解，不如直接说明数据只覆盖到第几周）。
+    """
+    import pandas as pd
+
+    offset = FactoryCalendar.day_index(plan['ship_date'].to_numpy(), week_start) - 1
+    covered = int(offset.max()) // 7 + 1 if len(offset) else 0
+    if covered < weeks:
+        last = f"last shipment {plan['ship_date'].max():%Y-%m-%d}" if len(offset) else "no shipments"
+        raise DelforCoverageError(f"DELFOR demand data ends at week {max(covered, 0)} of the horizon ({last}); "
+                         f"cannot plan {weeks} week(s) from {week_start}")
+    weekday = pd.DatetimeIndex(plan['ship_date']).weekday.to_numpy()
+    keep = (offset >= 0) & (offset < 7 * weeks) & np.isin(weekday, (1, 4))  # 只关心周二 / 周五
+
+    offset = offset[keep]
+    qty = plan['shipment_qty'].to_numpy()[keep]
+    totals = np.bincount(offset, weights=qty, minlength=7 * weeks)
+    return {int(d) + 1: int(totals[d]) for d in np.unique(offset)}
+
+
+def shipments_to_delivery(plan: 'pd.DataFrame',
                           week_start: str
                           ) -> dict[int, int]:
     """
     若指定 week_start（该周周一的日期），仅统计那一周的周二/周五发货量；
     返回格式 unchanged: {2: qty_on_tue, 5: qty_on_fri}
     """
+    import pandas as pd
+
     if week_start is not None:
-        week_start = pd.to_datetime(week_start).normalize()
-        week_end = week_start + pd.Timedelta(days=6)
-        plan = plan[(plan['ship_date'] >= week_start) &
-                    (plan['ship_date'] <= week_end)]
-
-    weekday_map = {0: 1, 1: 2, 2: 3, 3: 4, 4: 5, 5: 6, 6: 7}
-    g = (plan.groupby('ship_date')['shipment_qty']
-         .sum()
-         .reset_index())
-
-    delivery: dict[int, int] = {}
-    for _, row in g.iterrows():
-        wd = weekday_map[row['ship_date'].weekday()]
-        if wd in (2, 5):  # 只关心周二 / 周五
-            delivery[wd] = delivery.get(wd, 0) + int(row['shipment_qty'])
+        delivery = delivery_for_horizon(plan, week_start, weeks=1)
+    else:
+        weekday = pd.DatetimeIndex(plan['ship_date']).weekday.to_numpy()
+        keep = np.isin(weekday, (1, 4))
+        g = plan['shipment_qty'][keep].groupby(weekday[keep] + 1).sum()
+        delivery = {int(wd): int(q) for wd, q in g.items()}
     print(delivery)
 
     return delivery
 
 
+# ---------------- DELFOR 缓存 ----------------
+def _read_daily_demand(raw: bytes) -> 'pd.DataFrame':
+    import pandas as pd
+
+    df = pd.read_excel(
+        io.BytesIO(raw),
+        usecols=['quantity', 'schedule begin.1', 'type'],
+        parse_dates=['schedule begin.1']
+    )
+    return df[df['type'].fillna('').str.strip().str.lower() == 'daily']
+
+
+def _cached(path: str, stat: tuple):
+    with _delfor_lock:
+        hit = _delfor_cache.get(path)
+        if hit is not None and hit[0] == stat:
+            _delfor_cache.move_to_end(path)
+            return hit[2]
+    return None
+
+
+def load_delfor(src: Path) -> dict:
+    """
+    读取并缓存 DELFOR 文件（解析 + 过滤 daily + compute_shipments）。
+
+    命中只看 (绝对路径, mtime_ns, size)，一次 stat，不读文件；
+    两者变了才读文件算 sha1，内容没变（touch / 原样覆盖）只更新键，内容变了才重新解析。
+    解析在该文件自己的锁里进行：并发请求同一文件时只解析一次，其它文件的解析和命中不受影响。
+    超过 DELFOR_CACHE_SIZE 个文件时按 LRU 淘汰。
+
+    返回
+    ----
+    {'daily': 过滤后的 daily 需求 DataFrame, 'plan': compute_shipments 结果}
+    调用方只读，不要原地修改。
+    """
+    src = Path(src)
+    if not src.exists():
+        raise FileNotFoundError(f'❌ {src} 不存在')
+
+    path = str(src.resolve())
+    st = src.stat()
+    stat = (st.st_mtime_ns, st.st_size)
+    entry = _cached(path, stat)
+    if entry is not None:
+        return entry
+
+    with _delfor_lock:
+        lock = _parse_locks.setdefault(path, threading.Lock())
+    with lock:
+        entry = _cached(path, stat)      # 等锁期间可能已被别的线程解析好
+        if entry is not None:
+            return entry
+
+        raw = src.read_bytes()
+        sha1 = hashlib.sha1(raw).hexdigest()
+        with _delfor_lock:
+            old = _delfor_cache.get(path)
+        if old is not None and old[1] == sha1:
+            entry = old[2]
+        else:
+            daily = _read_daily_demand(raw)
+            entry = {'daily': daily, 'plan': compute_shipments(daily)}
+
+        with _delfor_lock:
+            # 同一路径只保留最新版本
+            _delfor_cache[path] = (stat, sha1, entry)
+            _delfor_cache.move_to_end(path)
+            while len(_delfor_cache) > DELFOR_CACHE_SIZE:
+                evicted, _ = _delfor_cache.popitem(last=False)
+                _parse_locks.pop(evicted, None)
+        return entry
+
+
+def clear_delfor_cache() -> None:
+    with _delfor_lock:
+        _delfor_cache.clear()
+
+
 # ---------------- 对外接口 ----------------
 def get_delivery_day_dict(xls_name: str = 'DELFOR 6.27 Gen2.0.xlsx',
                           data_dir: str = 'data',
                           *,
                           week_start: str
                           ) -> dict[int, int]:
-    src = Path(data_dir) / xls_name
-    if not src.exists():
-        raise FileNotFoundError(f'❌ {src} 不存在')
+    plan = load_delfor(Path(data_dir) / xls_name)['plan']
+    return shipments_to_delivery(plan, week_start=week_start)
 
-    df = pd.read_excel(
-        src,
-        usecols=['quantity', 'schedule begin.1', 'type'],
-        parse_dates=['schedule begin.1']
-    )
-    df = df[df['type'].fillna('').str.strip().str.lower() == 'daily']
 
-    plan = compute_shipments(df)
-    return shipments_to_delivery(plan, week_start=week_start)
+def get_delivery_horizon(xls_name: str = 'DELFOR 6.27 Gen2.0.xlsx',
+                         data_dir: str = 'data',
+                         *,
+                         week_start: str,
+                         weeks: int = 2
+                         ) -> dict[int, int]:
+    """一次返回 week_start 起连续 weeks 周的 {天序号: 发货量}。"""
+    plan = load_delfor(Path(data_dir) / xls_name)['plan']
+    return delivery_for_horizon(plan, week_start, weeks=weeks)
 
 
 # ---------------- CLI 自检 ----------------
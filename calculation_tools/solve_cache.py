@@ -0,0 +1,144 @@
+# solve_cache.py
+"""
+求解结果缓存：同一组参数（不同用户的相同问题、各轮收敛到相同参数、批量里的重复项）只解一次。
+
+键 = sha256(缓存版本, 后端名, 规范化后的 params)：
+- 天序号 key 不论 int 还是 str 都统一成 str(int)；
+- force_zero / force_positive 只有 key 有意义，规范成排好序的天序号列表；
+- 浮点按求解器容差（1e-6）取整，整数值的浮点（4000.0）与整数（4000）视为相同。
+值 = plan / cost / hours / status，以及（infeasible 时，算过的话）IIS。
+内存 LRU + SQLite（TieredCache），进程重启后仍可命中。
+"""
+import contextlib
+import os
+
+from cache_tools.tiered_cache import TieredCache, make_key
+
+SOLVE_CACHE = os.getenv("SOLVE_CACHE", "on").lower() not in ("off", "0", "false")
+# SOLVE_CACHE_PATH 为空字符串时只用内存层
+SOLVE_CACHE_PATH = os.getenv("SOLVE_CACHE_PATH", ".cache/solver_results.sqlite")
+SOLVE_CACHE_SIZE = int(os.getenv("SOLVE_CACHE_SIZE", "1024"))
+SOLVE_CACHE_DISK_SIZE = int(os.getenv("SOLVE_CACHE_DISK_SIZE", "50000"))
+# 模型写法变化（约束 / 目标）后加 1，旧结果自动失效
+SOLVE_CACHE_VERSION = 2
+DECIMALS = 6   # 与求解器可行性容差 1e-6 对应
+
+cache = TieredCache(
+    "solver_results",
+    path=SOLVE_CACHE_PATH,
+    max_entries=SOLVE_CACHE_SIZE,
+    max_disk_entries=SOLVE_CACHE_DISK_SIZE,
+)
+
+# 只有天序号有意义、取值无关的参数
+_DAY_SETS = ('force_zero', 'force_positive')
+
+
+def _number(v):
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, float):
+        v = round(v, DECIMALS)
+        return int(v) if v.is_integer() else v
+    return v
+
+
+def _day_key(k):
+    try:
+        return str(int(k))
+    except (TypeError, ValueError):
+        return str(k)
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {_day_key(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return _number(value)
+
+
+def canonical_params(params) -> dict:
+    """规范化后的参数（可 JSON 序列化，key 有序由 make_key 负责）"""
+    out = {}
+    for key, value in params.items():
+        if key in _DAY_SETS:
+            out[key] = sorted(int(d) for d in value)
+        else:
+            out[key] = _canonical(value)
+    return out
+
+
+def params_key(params, backend) -> str:
+    return make_key(SOLVE_CACHE_VERSION, backend, canonical_params(params))
+
+
+def _load(entry):
+    plan = entry['plan']
+    if plan is not None:
+        plan = {int(d): q for d, q in plan.items()}
+    return plan, entry['cost'], entry['hours']
+
+
+class CachedSession:
+    """
+    包在任一后端 session 外面：solve 先查缓存，未命中才真正求解并写回。
+    compute_iis 优先返回缓存的 IIS；上一次 solve 是缓存命中时，底层模型还没见过这组参数，先补解一次。
+    """
+
+    def __init__(self, session, backend):
+        self.session = session
+        self.backend = backend
+        self._key = None
+        self._params = None
+        self._solved = False
+        self.hit = False
+        self.stage_seconds = {}
+
+    def solve(self, params):
+        key = params_key(params, self.backend)
+        self._key, self._params = key, params
+        entry = cache.get(key)
+        self.hit = entry is not None
+        if self.hit:
+            self._solved = False
+            self.stage_seconds = {}
+            return _load(entry)
+
+        plan, cost, hours = self.session.solve(params)
+        self._solved = True
+        self.stage_seconds = dict(getattr(self.session, 'stage_seconds', None) or {})
+        cache.set(key, {
+            'plan': dict(plan) if plan is not None else None,
+            'cost': cost,
+            'hours': hours,
+            'status': 'optimal' if plan is not None else 'infeasible',
+            'iis': None,
+        })
+        return plan, cost, hours
+
+    def compute_iis(self):
+        entry = cache.get(self._key) or {}
+        if entry.get('iis') is not None:
+            return list(entry['iis'])
+        if not self._solved:
+            self.session.solve(self._params)
+            self._solved = True
+        iis = self.session.compute_iis()
+        if entry:
+            cache.set(self._key, {**entry, 'iis': iis})
+        return iis
+
+    def close(self):
+        self.session.close()
+
+
+@contextlib.contextmanager
+def cached_session(session_cm, backend):
+    """with cached_session(backend.session(), name) as session: …"""
+    with session_cm as session:
+        yield CachedSession(session, backend)
+
+
+def stats() -> dict:
+    return cache.stats()
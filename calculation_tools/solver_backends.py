@@ -0,0 +1,92 @@
+# solver_backends.py
+"""
+求解后端选择。每个后端提供 session()：返回带 solve(params) / compute_iis() / close() 的模型对象，
+返回值格式一致：solve → (plan, cost, hours)，infeasible 时为 (None, None, None)。
+
+- gurobi : optimize_production.ProductionModel（增量修改 + 热启动，需要 license）
+- highs  : highs_model.HighsModel（scipy.optimize.milp，开源，可按核数任意扩进程）
+- enum   : enumeration.EnumerationModel（2^n 开停组合整体打分，精确且不需要求解器，限 20 天以内）
+
+默认后端由环境变量 SOLVER_BACKEND 决定。
+SOLVE_CACHE 打开时（默认）session 外面包一层 solve_cache.CachedSession，相同参数直接返回缓存结果。
+"""
+import os
+
+from calculation_tools import enumeration, highs_model, optimize_production, solve_cache
+
+SOLVER_BACKEND = os.getenv("SOLVER_BACKEND", "gurobi").lower()
+
+
+class GurobiBackend:
+    name = "gurobi"
+
+    def session(self, timeout=None):
+        return optimize_production.solver_session(timeout=timeout)
+
+
+class HighsBackend:
+    name = "highs"
+
+    def session(self, timeout=None):
+        return highs_model.HighsModel()
+
+
+class EnumerationBackend:
+    name = "enum"
+
+    def session(self, timeout=None):
+        return enumeration.EnumerationModel()
+
+
+BACKENDS = {
+    "gurobi": GurobiBackend(),
+    "highs": HighsBackend(),
+    "enum": EnumerationBackend(),
+}
+
+
+def get_backend(name=None):
+    name = (name or SOLVER_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"unknown solver backend: {name}")
+    return BACKENDS[name]
+
+
+def solver_session(name=None, timeout=None, cache=None):
+    """
+    with solver_session() as session: session.solve(params) …
+    timeout 为等待 Gurobi env 的上限；cache 默认跟随 SOLVE_CACHE
+    """
+    be = get_backend(name)
+    session_cm = be.session(timeout=timeout)
+    if solve_cache.SOLVE_CACHE if cache is None else cache:
+        return solve_cache.cached_session(session_cm, be.name)
+    return session_cm
+
+
+def solve_production(params, compute_iis=True, backend=None):
+    """
+    一次性求解。
+
+    返回
+    ----
+    {'plan', 'cost', 'hours', 'status': 'optimal' | 'infeasible', 'iis', 'backend'}
+    """
+    be = get_backend(backend)
+    with solver_session(be.name) as session:
+        plan, cost, hours = session.solve(params)
+        iis = session.compute_iis() if plan is None and compute_iis else []
+    return {
+        'plan': plan,
+        'cost': cost,
+        'hours': hours,
+        'status': 'optimal' if plan is not None else 'infeasible',
+        'iis': iis,
+        'backend': be.name,
+    }
+
+
+def solve(params, backend=None, cache=None):
+    """与 optimize_production.optimize_production 相同的返回值，按后端分派。"""
+    with solver_session(backend, cache=cache) as session:
+        return session.solve(params)
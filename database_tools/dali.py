@@ -0,0 +1,331 @@
+# dali.py
+"""
+DALI（Oracle）数据访问层：库存与计划订单。
+
+- 会话池：Oracle 用 cx_Oracle.SessionPool，进程内只建一次，按需借还；
+- 批量：多个 matnr 拼成一个 IN 列表（每批最多 DB_BATCH_SIZE 个绑定变量），一次往返取回；
+- 抓取：cursor.arraysize / prefetchrows = DB_ARRAYSIZE，按 fetchmany 块读取；
+- 结果按列返回 {列名(小写): numpy 数组}，不逐行构造 Python 对象。
+
+SQLite 后端（DB_BACKEND=sqlite）用同样的表结构和 SQL：数据库文件以 MARD_DALI_BBM 的名字 ATTACH，
+schema 限定的表名原样可用，用于本地压测 / 开发。init_sqlite() 生成合成数据。
+
+DB_BACKEND 为空（默认）时不查库，调用方继续使用各自的默认期初库存。
+cx_Oracle 只在 DB_BACKEND=oracle 时导入。
+"""
+import argparse
+import contextlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+
+import numpy as np
+
+DB_BACKEND = os.getenv("DB_BACKEND", "").lower()            # "" | oracle | sqlite
+DALI_USER = os.getenv("DALI_USER", "")
+DALI_PASSWORD = os.getenv("DALI_PASSWORD", "")
+DALI_HOST = os.getenv("DALI_HOST", "SI0EXARAC05.de.bosch.com")
+DALI_PORT = os.getenv("DALI_PORT", "38000")
+DALI_SERVICE = os.getenv("DALI_SERVICE", "RLDP01_CON_3.BOSCH.COM")
+DB_SQLITE_PATH = os.getenv("DB_SQLITE_PATH", ".cache/dali.sqlite")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "4"))
+DB_ARRAYSIZE = int(os.getenv("DB_ARRAYSIZE", "1000"))       # 每次网络往返抓取的行数
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "500"))      # IN 列表长度上限（Oracle 最多 1000）
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # 借连接最长等待（秒）
+
+PLANT = '05C0'
+MRP_CONTROLLER = '6QU'
+PLAN_ROWS = 14
+DEFAULT_MATERIAL = '04420050962Y8'   # data/*_sql.txt 里的物料
+
+SCHEMA = 'MARD_DALI_BBM'
+
+# data/stock_sql.txt 的批量版本：按 matnr 分组，一次查多个物料
+STOCK_SQL = f"""
+select matnr, sum(VERME) as STOCK
+from {SCHEMA}.LQUA_POE
+where WERKS = :werks
+and matnr in ({{matnr_binds}})
+and bestq != 'S'
+group by matnr
+"""
+
+# data/production_plan_sql.txt 的批量版本：每个 matnr 取 psttr 最早的 :rows 条
+PLAN_SQL = f"""
+select matnr, PSTTR, GSMNG from (
+    select matnr, PSTTR, GSMNG,
+           row_number() over (partition by matnr order by PSTTR) as rn
+    from {SCHEMA}.PLAF_POE
+    where PLWRK = :plwrk
+    and dispo = :dispo
+    and matnr in ({{matnr_binds}})
+)
+where rn <= :rows
+order by matnr, PSTTR
+"""
+
+SQLITE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {SCHEMA}.LQUA_POE (MATNR TEXT, WERKS TEXT, VERME REAL, BESTQ TEXT);
+CREATE INDEX IF NOT EXISTS {SCHEMA}.LQUA_POE_MATNR ON LQUA_POE (MATNR, WERKS);
+CREATE TABLE IF NOT EXISTS {SCHEMA}.PLAF_POE (MATNR TEXT, PLWRK TEXT, DISPO TEXT, PSTTR TEXT, GSMNG REAL);
+CREATE INDEX IF NOT EXISTS {SCHEMA}.PLAF_POE_MATNR ON PLAF_POE (MATNR, PLWRK, DISPO, PSTTR);
+"""
+
+
+class DataAccessError(RuntimeError):
+    pass
+
+
+# ---------------- 连接池 ----------------
+class OraclePool:
+    def __init__(self):
+        import cx_Oracle   # 只有真正连 Oracle 时才需要客户端库
+
+        dsn = cx_Oracle.makedsn(DALI_HOST, DALI_PORT, service_name=DALI_SERVICE)
+        self.pool = cx_Oracle.SessionPool(
+            user=DALI_USER, password=DALI_PASSWORD, dsn=dsn,
+            min=DB_POOL_MIN, max=DB_POOL_MAX, increment=1,
+            threaded=True, getmode=cx_Oracle.SPOOL_ATTRVAL_TIMEDWAIT,
+            waitTimeout=int(DB_POOL_TIMEOUT * 1000),
+        )
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.pool.acquire()
+        try:
+            yield conn
+        finally:
+            self.pool.release(conn)
+
+    def cursor(self, conn):
+        cur = conn.cursor()
+        cur.arraysize = DB_ARRAYSIZE
+        cur.prefetchrows = DB_ARRAYSIZE
+        return cur
+
+    def translate(self, sql):
+        return sql
+
+    def close(self):
+        self.pool.close(force=True)
+
+
+_FETCH_FIRST = re.compile(r"fetch\s+first\s+(\d+)\s+rows\s+only", re.IGNORECASE)
+
+
+class SQLitePool:
+    """固定大小的连接队列；每个连接都把数据库文件 ATTACH 成 MARD_DALI_BBM"""
+
+    def __init__(self, path=None, size=None):
+        self.path = path or DB_SQLITE_PATH
+        self._idle = queue.Queue()
+        for _ in range(size or DB_POOL_MAX):
+            self._idle.put(self._connect())
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(':memory:', check_same_thread=False, timeout=DB_POOL_TIMEOUT)
+        conn.execute(f"ATTACH DATABASE ? AS {SCHEMA}", (self.path,))
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get(timeout=DB_POOL_TIMEOUT)
+        except queue.Empty:
+            raise DataAccessError(f"no database connection free after {DB_POOL_TIMEOUT:g} s") from None
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def cursor(self, conn):
+        cur = conn.cursor()
+        cur.arraysize = DB_ARRAYSIZE
+        return cur
+
+    def translate(self, sql):
+        """Oracle 的 fetch first n rows only → limit n（data/*_sql.txt 原样可跑）"""
+        return _FETCH_FIRST.sub(r"limit \1", sql)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return DB_BACKEND in ("oracle", "sqlite")
+
+
+def get_pool():
+    """进程内共享的连接池（第一次调用时按 DB_BACKEND 创建）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if DB_BACKEND == "oracle":
+                    _pool = OraclePool()
+                elif DB_BACKEND == "sqlite":
+                    _pool = SQLitePool()
+                else:
+                    raise DataAccessError(f"DB_BACKEND={DB_BACKEND!r} is not a database backend")
+    return _pool
+
+
+def reset_pool():
+    """
+    fork 之后调用：丢弃从父进程继承的连接池（不关闭，关闭会注销父进程仍在用的会话），
+    下次 get_pool 时在本进程重新创建。
+    """
+    global _pool, _pool_lock
+    _pool_lock = threading.Lock()
+    _pool = None
+
+
+# ---------------- 查询 ----------------
+def _columns(cursor):
+    """按 arraysize 分块抓取，转成 {列名: 数组}"""
+    names = [d[0].lower() for d in cursor.description]
+    chunks = []
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            break
+        chunks.extend(rows)
+    if not chunks:
+        return {n: np.array([]) for n in names}
+    return {n: np.asarray(col) for n, col in zip(names, zip(*chunks))}
+
+
+def query(sql, params=None):
+    """执行一条 SQL，返回 {列名(小写): numpy 数组}"""
+    pool = get_pool()
+    with pool.connection() as conn:
+        cur = pool.cursor(conn)
+        try:
+            cur.execute(pool.translate(sql), params or {})
+            return _columns(cur)
+        finally:
+            cur.close()
+
+
+def query_rows(sql, params=None):
+    """执行一条 SQL，返回行列表（与原 get_from_dali 相同的形式）"""
+    pool = get_pool()
+    with pool.connection() as conn:
+        cur = pool.cursor(conn)
+        try:
+            cur.execute(pool.translate(sql), params or {})
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+
+def query_in(sql_template, matnrs, params=None):
+    """
+    sql_template 里的 {matnr_binds} 展开成 :m0, :m1 …，matnrs 按 DB_BATCH_SIZE 分批，
+    同一连接上顺序执行，各批结果按列拼接。
+    """
+    matnrs = sorted(set(matnrs))
+    parts = []
+    pool = get_pool()
+    with pool.connection() as conn:
+        cur = pool.cursor(conn)
+        try:
+            for i in range(0, len(matnrs), DB_BATCH_SIZE):
+                batch = matnrs[i:i + DB_BATCH_SIZE]
+                binds = {f"m{j}": m for j, m in enumerate(batch)}
+                sql = sql_template.format(matnr_binds=", ".join(f":{k}" for k in binds))
+                cur.execute(pool.translate(sql), {**(params or {}), **binds})
+                parts.append(_columns(cur))
+        finally:
+            cur.close()
+    if not parts:
+        return {}
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def stock(matnrs, werks=PLANT):
+    """
+    各物料非冻结库存（bestq != 'S'）之和。
+
+    返回
+    ----
+    {matnr: 库存}，库里没有记录的物料为 0
+    """
+    matnrs = list(matnrs)
+    cols = query_in(STOCK_SQL, matnrs, {"werks": werks})
+    found = dict(zip(cols.get("matnr", []).tolist(), cols.get("stock", []).tolist())) if cols else {}
+    return {m: float(found.get(m) or 0) for m in matnrs}
+
+
+def planned_orders(matnrs, rows=PLAN_ROWS, plwrk=PLANT, dispo=MRP_CONTROLLER):
+    """
+    各物料最早 rows 条计划订单。
+
+    返回
+    ----
+    {'matnr': str 数组, 'psttr': datetime64[D] 数组, 'gsmng': float 数组}，按 (matnr, psttr) 排序
+    """
+    cols = query_in(PLAN_SQL, matnrs, {"plwrk": plwrk, "dispo": dispo, "rows": rows})
+    if not cols:
+        return {"matnr": np.array([], dtype=str), "psttr": np.array([], dtype='datetime64[D]'),
+                "gsmng": np.array([], dtype=float)}
+    return {
+        "matnr": cols["matnr"].astype(str),
+        "psttr": cols["psttr"].astype('datetime64[D]'),
+        "gsmng": cols["gsmng"].astype(float),
+    }
+
+
+# ---------------- SQLite 合成数据 ----------------
+def init_sqlite(path=None, materials=100, seed=0, start='2025-07-07'):
+    """
+    生成与 DALI 同结构的 SQLite 库：每个物料若干库位库存（含冻结库存 S）和 30 条日计划订单。
+    物料号从 DEFAULT_MATERIAL 开始连续编号，返回物料号列表。
+    """
+    path = path or DB_SQLITE_PATH
+    rng = np.random.default_rng(seed)
+    first = int(DEFAULT_MATERIAL[7:11])
+    matnrs = [f"{DEFAULT_MATERIAL[:7]}{first + i:04d}{DEFAULT_MATERIAL[11:]}" for i in range(materials)]
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    conn = sqlite3.connect(':memory:')
+    conn.execute(f"ATTACH DATABASE ? AS {SCHEMA}", (path,))
+    conn.executescript(SQLITE_SCHEMA)
+
+    lots = rng.integers(1, 6, size=materials)
+    stock_rows = [(m, PLANT, float(rng.integers(100, 2000)), rng.choice(['', 'Q', 'S'], p=[0.8, 0.1, 0.1]))
+                  for m, n in zip(matnrs, lots) for _ in range(n)]
+    conn.executemany(f"INSERT INTO {SCHEMA}.LQUA_POE VALUES (?, ?, ?, ?)", stock_rows)
+
+    days = np.datetime64(start, 'D') + np.arange(30)
+    plan_rows = [(m, PLANT, MRP_CONTROLLER, str(d), float(rng.integers(300, 700)))
+                 for m in matnrs for d in days]
+    conn.executemany(f"INSERT INTO {SCHEMA}.PLAF_POE VALUES (?, ?, ?, ?, ?)", plan_rows)
+    conn.commit()
+    conn.close()
+    return matnrs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="生成本地 SQLite 版 DALI 数据")
+    parser.add_argument('--path', default=DB_SQLITE_PATH)
+    parser.add_argument('--materials', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    matnrs = init_sqlite(args.path, args.materials, args.seed)
+    print(f"{args.path}: {len(matnrs)} materials, e.g. {matnrs[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-import cx_Oracle
+from database_tools import dali
 
 '''
 def get_from_dali(sql):
@@ -16,7 +16,10 @@ def get_from_dali(sql):
     return output
 '''
 
-def get_from_dali(sql: str):
+def get_from_dali(sql: str, params=None):
+    # DB_BACKEND=oracle / sqlite 时走 dali 的会话池；批量 / 按列查询请直接用 dali.stock / dali.planned_orders
+    if dali.enabled():
+        return dali.query_rows(sql, params)
     # 🔧 暂时不用 Oracle，直接返回一个常量库存
     # 模拟数据库查询结果，保持返回格式 [[value]]
     return [[5000]]
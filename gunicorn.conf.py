@@ -0,0 +1,26 @@
+# gunicorn.conf.py
+"""
+gunicorn 配置（start.sh 用 -c 加载）。
+
+preload_app：master 先导入 app.api 并执行 warmup.warm_up()（导入求解库 / pandas、构建日历、解析 DELFOR），
+再 fork 出 worker，worker 以写时复制方式继承；post_fork 里重置不能跨 fork 沿用的连接和 Gurobi 环境。
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('SERVICE_PORT', '8000')}"
+workers = int(os.getenv("WORK_COUNT", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 600
+preload_app = True
+
+
+def when_ready(server):
+    from app import warmup
+
+    warmup.warm_up()
+
+
+def post_fork(server, worker):
+    from app import warmup
+
+    warmup.after_fork()
@@ -1,6 +1,4 @@
 #/bin/bash
 
-gunicorn -w ${WORK_COUNT} \
-    -b 0.0.0.0:${SERVICE_PORT} \
-    -k uvicorn.workers.UvicornWorker app.api:app \
-    -t 600
\ No newline at end of file
+# 监听地址、worker 数、-t 600 和 --preload 见 gunicorn.conf.py
+gunicorn -c gunicorn.conf.py app.api:app
@@ -0,0 +1,86 @@
+import contextlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import batch
+from benchmarks.synthetic import write_delfor
+from calculation_tools import shipment_planner, solve_cache, solver_backends
+
+
+@pytest.fixture(autouse=True)
+def setup(tmp_path, monkeypatch):
+    pytest.importorskip("scipy.optimize")
+    write_delfor(tmp_path / batch.DEFAULT_DELFOR, 400)
+    (tmp_path / "broken.xlsx").write_bytes(b"not an excel file")
+    monkeypatch.setattr(batch, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(batch, "load_initial_inventory", lambda materials: {"M1": 4000})
+    monkeypatch.setattr(solver_backends, "SOLVER_BACKEND", "highs")
+    monkeypatch.setattr(solve_cache, "SOLVE_CACHE", False)
+    shipment_planner.clear_delfor_cache()
+    yield
+    shipment_planner.clear_delfor_cache()
+
+
+def _run(items):
+    with ThreadPoolExecutor(2) as pool, contextlib.redirect_stdout(io.StringIO()):
+        return batch.run_batch(items, executor=pool)
+
+
+def _item(**kw):
+    return {"material": "M1", "week_start": "2025-07-07", **kw}
+
+
+@pytest.mark.parametrize("name", ["../secret.xlsx", "/etc/passwd", "sub/x.xlsx", "..\\x.xlsx", ".", ".."])
+def test_delfor_path_rejects_directories(name):
+    with pytest.raises(ValueError, match="invalid delfor file name"):
+        batch.delfor_path(name)
+
+
+def test_delfor_path_default(tmp_path):
+    assert batch.delfor_path() == tmp_path / batch.DEFAULT_DELFOR
+    assert batch.delfor_path("other.xlsx") == tmp_path / "other.xlsx"
+
+
+def test_bad_items_do_not_affect_the_others():
+    results = _run([
+        _item(),
+        _item(delfor="../DELFOR 6.27 Gen2.0.xlsx"),
+        _item(delfor="missing.xlsx"),
+        _item(delfor="broken.xlsx"),
+        _item(material="M2"),
+        _item(week_start="2040-01-01"),
+        _item(overrides={"min_inventory": 2500}),
+    ])
+    assert [r["index"] for r in results] == list(range(7))
+    ok = [r for r in results if r["status"] != "error"]
+    assert [r["index"] for r in ok] == [0, 6]
+    assert all({"plan", "cost", "hours", "violations"} <= set(r) for r in ok)
+    errors = {r["index"]: r["msg"] for r in results if r["status"] == "error"}
+    assert "invalid delfor file name" in errors[1]
+    assert "missing.xlsx" in errors[2]
+    assert "M2" in errors[4]
+    assert "DELFOR demand data ends" in errors[5]
+
+
+def test_solver_failure_is_reported_per_item(monkeypatch):
+    solve = batch._solve_and_audit
+
+    def flaky(params, holidays):
+        if params["min_inventory"] == 2500:
+            raise RuntimeError("solver crashed")
+        return solve(params, holidays)
+
+    monkeypatch.setattr(batch, "_solve_and_audit", flaky)
+    results = _run([_item(), _item(overrides={"min_inventory": 2500})])
+    assert results[0]["status"] != "error"
+    assert results[1] == {"index": 1, "material": "M1", "week_start": "2025-07-07",
+                          "status": "error", "msg": "solver crashed"}
+
+
+def test_overrides_reach_the_solver_params():
+    (params, exc), = batch.build_batch_params([_item(overrides={"defect_rate": 0.05, "force_zero": {"3": None}})])
+    assert exc is None
+    assert params["defect_rate"] == 0.05
+    assert params["force_zero"] == {3: None}
@@ -0,0 +1,89 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from database_tools import dali
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "dali.sqlite")
+    monkeypatch.setattr(dali, "DB_BACKEND", "sqlite")
+    monkeypatch.setattr(dali, "DB_SQLITE_PATH", path)
+    dali.reset_pool()
+    matnrs = dali.init_sqlite(path, materials=30, seed=1)
+    yield path, matnrs
+    if dali._pool is not None:
+        dali._pool.close()
+    dali.reset_pool()
+
+
+def _reference_stock(path, matnr):
+    with sqlite3.connect(path) as conn:
+        row = conn.execute("SELECT SUM(VERME) FROM LQUA_POE WHERE MATNR = ? AND WERKS = ? AND BESTQ != 'S'",
+                           (matnr, dali.PLANT)).fetchone()
+    return float(row[0] or 0)
+
+
+def test_stock_matches_per_material_query(db):
+    path, matnrs = db
+    got = dali.stock(matnrs + ["UNKNOWN"])
+    assert got["UNKNOWN"] == 0
+    assert all(got[m] == pytest.approx(_reference_stock(path, m)) for m in matnrs)
+
+
+def test_batches_give_the_same_result(db, monkeypatch):
+    _, matnrs = db
+    whole = dali.stock(matnrs)
+    monkeypatch.setattr(dali, "DB_BATCH_SIZE", 7)
+    monkeypatch.setattr(dali, "DB_ARRAYSIZE", 3)
+    assert dali.stock(matnrs) == whole
+
+
+def test_planned_orders(db):
+    _, matnrs = db
+    orders = dali.planned_orders(matnrs[:3], rows=5)
+    assert len(orders["matnr"]) == 15
+    assert orders["psttr"].dtype == np.dtype("datetime64[D]") and orders["gsmng"].dtype == float
+    for m in matnrs[:3]:
+        dates = orders["psttr"][orders["matnr"] == m]
+        assert len(dates) == 5 and (np.diff(dates) > np.timedelta64(0, "D")).all()
+        assert dates[0] == np.datetime64("2025-07-07")
+
+
+def test_fetch_first_is_translated(db):
+    _, matnrs = db
+    rows = dali.query_rows(f"select MATNR from {dali.SCHEMA}.PLAF_POE where MATNR = :m "
+                           "order by PSTTR fetch first 4 rows only", {"m": matnrs[0]})
+    assert len(rows) == 4
+
+
+def test_pool_timeout(db, monkeypatch):
+    monkeypatch.setattr(dali, "DB_POOL_TIMEOUT", 0.05)
+    pool = dali.SQLitePool(db[0], size=1)
+    with pool.connection():
+        with pytest.raises(dali.DataAccessError, match="no database connection free"):
+            with pool.connection():
+                pass
+    pool.close()
+
+
+def test_reset_pool_does_not_close_the_inherited_pool(db):
+    _, matnrs = db
+    old = dali.get_pool()
+    dali.reset_pool()
+    new = dali.get_pool()
+    assert new is not old
+    with old.connection() as conn:                       # 父进程的连接仍然可用
+        assert conn.execute(f"select count(*) from {dali.SCHEMA}.LQUA_POE").fetchone()[0] > 0
+    old.close()
+    assert dali.stock(matnrs[:1])
+
+
+def test_disabled_backend(monkeypatch):
+    monkeypatch.setattr(dali, "DB_BACKEND", "")
+    dali.reset_pool()
+    assert not dali.enabled()
+    with pytest.raises(dali.DataAccessError):
+        dali.get_pool()
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from benchmarks.bench_solvers import base_params, random_params
+from calculation_tools import feasibility, solver_backends
+
+CASES = [base_params()] + [random_params(random.Random(seed)) for seed in range(60)]
+
+
+def _solve(params):
+    pytest.importorskip("scipy.optimize")
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solver_backends.solve(params, "highs", cache=False)
+
+
+@pytest.mark.parametrize("params", CASES)
+def test_never_rejects_a_feasible_problem(params):
+    diagnosis = feasibility.analyze(params)
+    if diagnosis["status"] == "infeasible":
+        assert _solve(params)[0] is None, diagnosis
+
+
+def test_detects_most_random_infeasible_cases():
+    infeasible = [p for p in CASES if _solve(p)[0] is None]
+    detected = [p for p in infeasible if feasibility.analyze(p)["status"] == "infeasible"]
+    assert infeasible and len(detected) >= len(infeasible) // 2
+
+
+def test_min_inventory_fix_is_minimal_and_sufficient():
+    params = base_params()
+    params['delivery_day'][2] = 4600          # 前两天满产也补不上
+    diagnosis = feasibility.analyze(params)
+    assert diagnosis["status"] == "infeasible"
+    assert [v["check"] for v in diagnosis["violations"]] == ["min_inventory"]
+    assert diagnosis["binding_day"] == 2
+    fix = diagnosis["fix"]
+    assert fix["min_inventory"] < 2000 and fix["max_inventory"] == 5000
+    params.update(fix)
+    assert feasibility.analyze(params)["status"] == "ok"
+    params['min_inventory'] += 1
+    assert feasibility.analyze(params)["status"] == "infeasible"
+
+
+def test_inverted_bounds():
+    params = base_params()
+    params['min_inventory'], params['max_inventory'] = 3000, 2000
+    diagnosis = feasibility.analyze(params)
+    assert diagnosis["violations"][0]["check"] == "inventory_bounds"
+
+
+def test_continuity_blocks_days_and_hours():
+    # 第 3 天停产、第 1 天必须开工、每周至少连续 3 天：第 1 周只剩第 1 天能开工
+    params = base_params()
+    params['force_zero'] = {3: None}
+    params['POT'] = {d: 1234 for d in params['days']}
+    assert feasibility.reachable_days(params) >= {1, 6, 7, 8}
+    assert not feasibility.reachable_days(params) & {2, 3, 4, 5}
+    params['POT'] = base_params()['POT']
+    diagnosis = feasibility.analyze(params)
+    assert diagnosis["status"] == "infeasible"
+    assert "work_hours_min" in {v["check"] for v in diagnosis["violations"]}
+    assert diagnosis["fix"] is None
+    assert _solve(params)[0] is None
+
+
+def test_forced_hours_above_max():
+    params = base_params()
+    params['force_positive'] = {d: 0 for d in range(1, 6)}
+    params['max_WD'] = 60
+    diagnosis = feasibility.analyze(params)
+    assert {v["check"] for v in diagnosis["violations"]} >= {"work_hours_max"}
+    assert diagnosis["fix"] is None
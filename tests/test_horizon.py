@@ -0,0 +1,140 @@
+import contextlib
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.bench_solvers import base_params
+from calculation_tools import horizon, solver_backends
+from calculation_tools.enumeration import MAX_ENUM_DAYS
+from calculation_tools.optimize_production import week_days
+from calculation_tools.shipment_planner import DelforCoverageError
+
+
+def weeks_params(weeks):
+    """base_params 按周重复成 weeks 周：周末停产，每周二 / 周五发货"""
+    p = base_params()
+    p['days'] = list(range(1, 7 * weeks + 1))
+    p['POT'] = {d: 0 if d % 7 in (6, 0) else 1234 for d in p['days']}
+    p['force_zero'] = {d: 0 for d in p['days'] if d % 7 in (6, 0)}
+    p['delivery_day'] = {d: 1300 for d in p['days'] if d % 7 in (2, 5)}
+    for k in range(1, weeks + 1):
+        p[f'week{k}_min_consecutive_days'] = 3
+    return p
+
+
+def _solve(params, backend="highs", rolling=False):
+    pytest.importorskip("scipy.optimize")
+    with contextlib.redirect_stdout(io.StringIO()), \
+            solver_backends.solver_session(backend, cache=False) as session:
+        if rolling:
+            session = horizon.RollingSession(session)
+            return session.solve(params), session.last
+        return session.solve(params), None
+
+
+def test_window_params_renumbers_days_and_weeks():
+    params = weeks_params(4)
+    params['week3_min_consecutive_days'] = 2
+    sub = horizon.window_params(params, 3, 2, initial_inventory=1234)
+    assert sub['days'] == list(range(1, 15))
+    assert sub['delivery_day'] == {2: 1300, 5: 1300, 9: 1300, 12: 1300}
+    assert set(sub['force_zero']) == {6, 7, 13, 14}
+    assert (sub['week1_min_consecutive_days'], sub['week2_min_consecutive_days']) == (2, 3)
+    assert 'week3_min_consecutive_days' not in sub
+    assert sub['initial_inventory'] == 1234
+
+
+@pytest.mark.parametrize("weeks", [3, 6, 8])
+def test_rolling_is_feasible_and_close_to_full_horizon(weeks):
+    params = weeks_params(weeks)
+    (full_plan, full_cost, _), _ = _solve(params)
+    (plan, cost, hours), last = _solve(params, rolling=True)
+    assert full_plan is not None and plan is not None
+    assert last['windows'] == weeks - 1
+    assert sorted(plan) == params['days']
+    assert cost == pytest.approx(horizon.plan_cost(params, plan))
+    assert full_cost <= cost + 1e-6 and cost <= full_cost * 1.01
+    assert horizon.week_hours_violation(params, plan) is None
+    inventory = horizon.inventory_path(params, plan)
+    assert all(params['min_inventory'] - 1e-6 <= v <= params['max_inventory'] + 1e-6 for v in inventory.values())
+
+
+def test_rolling_reports_the_failing_window():
+    params = weeks_params(6)
+    params['delivery_day'][30] = 100000
+    (plan, _, _), last = _solve(params, rolling=True)
+    assert plan is None and last['failed_week'] == 4 and last['iis'] is None
+
+
+class StitchSession:
+    """每个窗口都给出可行的整段满产计划，但从不对这个（可行的）模型求 IIS"""
+    stage_seconds = {}
+
+    def solve(self, params):
+        return {d: params['POT'][d] * 0.95 for d in params['days']}, 0.0, 0.0
+
+    def compute_iis(self):
+        raise AssertionError("compute_iis on a feasible window")
+
+    def close(self):
+        pass
+
+
+def test_compute_iis_after_stitched_week_hours_violation():
+    params = weeks_params(6)
+    params['max_WD'] = 100
+    session = horizon.RollingSession(StitchSession())
+    assert session.solve(params) == (None, None, None)
+    assert session.last['failed_week'] == 1
+    assert session.compute_iis() == ['work_hours_max_w1']
+
+
+def test_enum_backend_rolls_before_max_enum_days():
+    params = weeks_params(3)
+    assert 7 * 3 > MAX_ENUM_DAYS
+    assert horizon.wrap_session(object(), params, "gurobi").__class__ is object
+    wrapped = horizon.wrap_session(object(), params, "enum")
+    assert isinstance(wrapped, horizon.RollingSession)
+    assert 7 * wrapped.window_weeks <= MAX_ENUM_DAYS
+    assert horizon.wrap_session(object(), weeks_params(2), "enum").__class__ is object
+
+
+def test_enum_backend_solves_four_weeks():
+    params = weeks_params(4)
+    (ref, _, _), _ = _solve(params, "highs", rolling=True)
+    with contextlib.redirect_stdout(io.StringIO()), solver_backends.solver_session("enum", cache=False) as session:
+        plan, cost, _ = horizon.wrap_session(session, params, "enum").solve(params)
+    assert plan is not None
+    assert cost == pytest.approx(horizon.plan_cost(params, ref), rel=1e-6)
+
+
+def test_week_days_cover_the_horizon():
+    params = weeks_params(5)
+    assert sum(len(wd) for _, wd in week_days(params)) == len(params['days'])
+
+
+# ---------------- /optimize 的 weeks ----------------
+@pytest.fixture
+def client(monkeypatch):
+    from app import api
+
+    async def fake_pipeline(llm_input, weeks=None, timings=False):
+        if weeks and weeks > 2:
+            raise DelforCoverageError("DELFOR demand data ends at week 2 of the horizon")
+        return {"status": "accept", "weeks": weeks}
+
+    monkeypatch.setattr(api, "run_pipeline_async", fake_pipeline)
+    return TestClient(api.app)
+
+
+@pytest.mark.parametrize("weeks", [0, -1, 10**6])
+def test_weeks_out_of_bounds_is_422(client, weeks):
+    assert client.post("/optimize", json={"llm_input": "x", "weeks": weeks}).status_code == 422
+
+
+def test_weeks_past_delfor_data_is_422(client):
+    res = client.post("/optimize", json={"llm_input": "x", "weeks": 8})
+    assert res.status_code == 422
+    assert "DELFOR demand data ends" in res.json()["detail"]
+    assert client.post("/optimize", json={"llm_input": "x", "weeks": 2}).json() == {"status": "accept", "weeks": 2}
@@ -0,0 +1,133 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import jobs
+
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.sqlite")
+    monkeypatch.setattr(jobs, "JOBS_DB", path)
+    monkeypatch.setattr(jobs, "JOB_POLL", 0.05)
+    return path
+
+
+def _status(job_id):
+    return jobs.get(job_id)["status"]
+
+
+def test_claim_is_fifo_and_marks_running():
+    a, b = jobs.submit({"llm_input": "a"}), jobs.submit({"llm_input": "b"})
+    assert jobs._claim(111) == (a["id"], {"llm_input": "a"})
+    assert jobs._claim(222) == (b["id"], {"llm_input": "b"})
+    assert jobs._claim(333) is None
+    with jobs._db() as conn:
+        rows = {r["id"]: (r["status"], r["pid"], r["attempts"]) for r in conn.execute("SELECT * FROM jobs")}
+    assert rows == {a["id"]: ("running", 111, 1), b["id"]: ("running", 222, 1)}
+
+
+def test_concurrent_claims_take_each_job_once():
+    ids = {jobs.submit({"llm_input": str(i)})["id"] for i in range(40)}
+    claimed, lock = [], threading.Lock()
+
+    def worker(pid):
+        while (job := jobs._claim(pid)) is not None:
+            with lock:
+                claimed.append(job[0])
+
+    threads = [threading.Thread(target=worker, args=(pid,)) for pid in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(ids)
+
+
+def test_cancel_reports_whether_it_changed_the_job():
+    job = jobs.submit({"llm_input": "x"})
+    cancelled, changed = jobs.cancel(job["id"])
+    assert changed and cancelled["status"] == "cancelled"
+    again, changed = jobs.cancel(job["id"])
+    assert not changed and again["status"] == "cancelled"
+    assert jobs.cancel("missing") == (None, False)
+
+
+def test_finish_does_not_overwrite_a_cancel():
+    job = jobs.submit({"llm_input": "x"})
+    jobs._claim(111)
+    jobs.cancel(job["id"])
+    jobs._finish(job["id"], "done", result={"status": "accept"})
+    assert _status(job["id"]) == "cancelled"
+    assert jobs.cancel(job["id"])[1] is False
+
+
+def test_recover_requeues_then_fails(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_RETRIES", 1)
+    job = jobs.submit({"llm_input": "x"})
+    jobs._claim(111)
+    jobs._recover([111])
+    assert _status(job["id"]) == "queued"
+    jobs._claim(222)
+    jobs._recover([222])
+    assert _status(job["id"]) == "failed" and jobs.get(job["id"])["error"] == "worker exited"
+
+
+def test_purge_removes_only_old_finished_jobs():
+    old_done, queued = jobs.submit({"llm_input": "a"}), jobs.submit({"llm_input": "b"})
+    jobs._claim(111)
+    jobs._finish(old_done["id"], "done", result={})
+    jobs.purge(older_than=3600)
+    assert jobs.get(old_done["id"]) is not None            # 还没过保留期
+    jobs.purge(older_than=-1)
+    assert jobs.get(old_done["id"]) is None
+    assert jobs.get(queued["id"]) is not None              # 未结束的任务不删
+
+
+def _slow_job(request):
+    time.sleep(request["seconds"])
+    return {"slept": request["seconds"]}
+
+
+def test_running_job_is_cancelled_by_its_own_worker(monkeypatch):
+    monkeypatch.setattr(jobs, "run_job", _slow_job)
+    slow, quick = jobs.submit({"seconds": 30}), jobs.submit({"seconds": 0.1})
+    ctx = multiprocessing.get_context("fork")
+    worker = ctx.Process(target=jobs._worker_main, args=(None,))
+    worker.start()
+    try:
+        deadline = time.time() + 10
+        while _status(slow["id"]) != "running" and time.time() < deadline:
+            time.sleep(0.02)
+        assert jobs.cancel(slow["id"])[1]
+        worker.join(5)
+        assert worker.exitcode == 0                         # worker 发现自己手上的任务被取消，自行退出
+        assert _status(quick["id"]) == "queued"             # 下一个任务没被认领，更没被误杀
+
+        worker = ctx.Process(target=jobs._worker_main, args=(None,))
+        worker.start()
+        deadline = time.time() + 10
+        while _status(quick["id"]) != "done" and time.time() < deadline:
+            time.sleep(0.02)
+        assert jobs.get(quick["id"])["result"] == {"slept": 0.1}
+        assert _status(slow["id"]) == "cancelled"
+    finally:
+        worker.kill()
+        worker.join()
+
+
+def test_api_cancel_returns_409_on_repeat():
+    from app import api
+
+    client = TestClient(api.app)
+    job = client.post("/jobs", json={"llm_input": "x"})
+    assert job.status_code == 202
+    job_id = job.json()["id"]
+    assert client.delete(f"/jobs/{job_id}").json()["status"] == "cancelled"
+    repeat = client.delete(f"/jobs/{job_id}")
+    assert repeat.status_code == 409 and repeat.json()["detail"] == "job already cancelled"
+    assert client.delete("/jobs/missing").status_code == 404
+    assert client.get(f"/jobs/{job_id}").json()["status"] == "cancelled"
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from ai_tools import assistant, local_parser
+from ai_tools.local_parser import DEFAULTS, parse
+
+THRESHOLD = assistant.LOCAL_PARSER_THRESHOLD
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("set OEE to 0.9 and min inventory 2500", {"OEE": 0.9, "min_inventory": 2500}),
+    ("OEE 92%", {"OEE": 0.92}),
+    ("cycle time 110 seconds", {"CT": 110}),
+    ("max stock 12,000", {"max_inventory": 12000}),
+    ("inventory between 2000 and 6000", {"min_inventory": 2000, "max_inventory": 6000}),
+    ("don't work on friday", {"force_zero": {"5": None}}),
+    ("must work on days 3-5", {"force_positive": {"3": None, "4": None, "5": None}}),
+    ("next monday is a holiday", {"force_zero": {"8": None}}),
+    ("at least 2 consecutive days in week 2", {"week2_min_consecutive_days": 2}),
+    ("give me the long-term forecast", {"long_term": True}),
+])
+def test_common_phrasings(text, expected):
+    values, confidence = parse(text)
+    assert confidence >= THRESHOLD
+    assert {k: values[k] for k in expected} == expected
+
+
+@pytest.mark.parametrize("text", [
+    "we can't work on monday",
+    "so we won't work on monday",
+    "we cannot work on monday",
+    "we shouldn't work on monday",
+    "we mustn't work on monday",
+    "we can not work on monday",
+])
+def test_negated_modals_are_force_zero(text):
+    values, confidence = parse(text)
+    assert "force_positive" not in values
+    assert values["force_zero"] == {"1": None} and confidence >= THRESHOLD
+
+
+@pytest.mark.parametrize("text", [
+    "don't make us work on monday",
+    "it isn't ok to work on monday",
+    "please never ask us to work on monday",
+    "we aren't able to work on monday",
+])
+def test_leftover_negation_falls_back_to_the_llm(text):
+    assert parse(text)[1] == 0.0
+
+
+def test_filler_does_not_dilute_unparsed_content():
+    _, confidence = parse("set oee to 0.9 and reorganize the staffing roster")
+    assert confidence < THRESHOLD
+    assert parse("ok so please set the oee to 0.9 for us now thanks")[1] == 1.0
+
+
+@pytest.mark.parametrize("text", ["min inventory 2.500", "max stock 12.000"])
+def test_dotted_thousands_are_ambiguous(text):
+    assert parse(text)[1] < THRESHOLD
+
+
+def test_leading_zero_decimal_is_not_ambiguous():
+    values, confidence = parse("set OEE to 0.950")
+    assert values["OEE"] == 0.95 and confidence == 1.0
+
+
+def test_relative_changes_start_from_the_prompt_defaults():
+    assert "3000, 9000, 0.95, 105" in assistant.SYSTEM_PROMPT
+    values, _ = parse("halve the inventory")
+    assert (values["min_inventory"], values["max_inventory"]) == (1500, 4500)
+    values, _ = parse("reduce the max inventory by 20%")
+    assert values["max_inventory"] == 7200 and values["min_inventory"] == DEFAULTS["min_inventory"]
+
+
+def test_unmentioned_scalars_match_the_llm_output():
+    values, _ = parse("don't work on friday")
+    assert {k: values[k] for k in DEFAULTS} == DEFAULTS
+
+
+def test_no_match_and_json_go_to_the_llm():
+    assert parse("Plan production for the next two weeks.")[1] == 0.0
+    assert parse(json.dumps({"min_inventory": 3000, "violations": []}))[1] == 0.0
+
+
+def test_inconsistent_values_are_rejected():
+    assert parse("min inventory 9500")[1] < THRESHOLD          # 超过默认上限 9000
+
+
+def test_days_are_bounded_by_weeks():
+    assert parse("don't work on day 20", weeks=2)[1] == 0.0
+    assert parse("don't work on day 20", weeks=3)[0]["force_zero"] == {"20": None}
+    values, _ = parse("at least 2 consecutive days", weeks=3)
+    assert [values[f"week{k}_min_consecutive_days"] for k in (1, 2, 3)] == [2, 2, 2]
+
+
+def test_local_answer_respects_the_switch(monkeypatch):
+    assert json.loads(assistant.local_answer("OEE 0.9"))["OEE"] == 0.9
+    assert assistant.local_answer("we can't work unless it is monday") is None
+    monkeypatch.setattr(assistant, "LOCAL_PARSER", False)
+    assert assistant.local_answer("OEE 0.9") is None
+    assert local_parser.parse("OEE 0.9")[1] == 1.0
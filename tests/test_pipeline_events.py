@@ -0,0 +1,61 @@
+import asyncio
+import contextlib
+import io
+
+import pytest
+
+from ai_tools import llm_cache, llm_client
+from app import scheduler
+from cache_tools.tiered_cache import TieredCache
+from calculation_tools import solve_cache, solver_backends
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """stub 助手 + HiGHS；记录每个求解 session 是否已经退出（归还）"""
+    pytest.importorskip("scipy.optimize")
+    monkeypatch.setattr(llm_client, "LLM_BACKEND", "stub")
+    monkeypatch.setattr(llm_cache, "cache", TieredCache("llm_test"))
+    monkeypatch.setattr(solve_cache, "SOLVE_CACHE", False)
+    monkeypatch.setattr(scheduler, "LLM_ANALYSIS", False)
+    opened = []
+
+    @contextlib.contextmanager
+    def session(timeout=None):
+        state = {"closed": False}
+        opened.append(state)
+        with solver_backends.get_backend("highs").session() as s:
+            try:
+                yield s
+            finally:
+                state["closed"] = True
+
+    monkeypatch.setattr(solver_backends, "solver_session", session)
+    return opened
+
+
+def _run(coro):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(coro)
+
+
+def test_events_end_with_result(sessions):
+    async def collect():
+        return [e async for e in scheduler.run_pipeline_events("Plan production for the next two weeks.")]
+
+    events = _run(collect())
+    assert events[0] == {"event": "attempt", "attempt": 1}
+    assert events[-1]["event"] == "result" and events[-1]["result"]["status"] == "accept"
+    assert [s["closed"] for s in sessions] == [True]
+
+
+def test_aclose_returns_the_session_immediately(sessions):
+    async def abandon():
+        events = scheduler.run_pipeline_events("Plan production for the next two weeks.")
+        async for event in events:
+            if event["event"] == "solve":
+                break
+        await events.aclose()
+        return [s["closed"] for s in sessions]   # 不让出事件循环，垃圾回收的 aclose 任务还没机会跑
+
+    assert _run(abandon()) == [True]
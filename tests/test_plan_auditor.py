@@ -0,0 +1,38 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from benchmarks.bench_solvers import base_params, random_params
+from calculation_tools import plan_auditor, solver_backends
+from calculation_tools.optimize_production import build_cap
+
+CASES = [base_params()] + [random_params(random.Random(seed)) for seed in range(20)]
+
+
+def _solve(params, backend):
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return solver_backends.solve(params, backend, cache=False)
+    except ImportError as exc:
+        pytest.skip(f"{backend} backend unavailable: {exc}")
+
+
+@pytest.mark.parametrize("backend", sorted(solver_backends.BACKENDS))
+@pytest.mark.parametrize("params", CASES)
+def test_solver_plans_pass_audit(params, backend):
+    plan, _, _ = _solve(params, backend)
+    if plan is None:
+        return
+    audit = plan_auditor.audit_plan(plan, build_cap(params), params, holidays=(6, 7, 13, 14))
+    assert audit["action"] == "accept", audit["violations"]
+
+
+def test_short_block_is_rejected():
+    params = base_params()
+    plan = {d: 0 for d in params['days']}
+    plan.update({1: 600, 3: 600, 5: 600, 8: 600, 9: 600, 10: 600})   # 周一 / 三 / 五各开一天
+    audit = plan_auditor.audit_plan(plan, build_cap(params), params, holidays=(6, 7, 13, 14))
+    assert audit["action"] == "tweak"
+    assert {v["day"] for v in audit["violations"]} == {3, 5}   # 第 1 天是 force_positive
@@ -0,0 +1,54 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from benchmarks.bench_solvers import base_params, random_params
+from calculation_tools.optimize_production import ProductionModel
+
+pytest.importorskip("gurobipy")
+
+
+def _tweaks(rng, n):
+    """random_params 之外，再改动 _update 处理的其余参数"""
+    for _ in range(n):
+        p = random_params(rng)
+        p['defect_rate'] = rng.choice([0.0, 0.01, 0.03])
+        p['initial_inventory'] = rng.choice([3500, 4000, 4500])
+        p['delivery_day'] = {d: q + rng.choice([-200, 0, 200]) for d, q in p['delivery_day'].items()}
+        p['min_WD'], p['max_WD'] = rng.choice([(0, 120), (40, 120), (20, 100)])
+        p['unit_cost'] = rng.choice([4000, 4200])
+        yield p
+
+
+def _fresh(params):
+    with ProductionModel() as m:
+        return m.solve(params)
+
+
+def test_incremental_updates_match_fresh_builds():
+    rng = random.Random(7)
+    with contextlib.redirect_stdout(io.StringIO()), ProductionModel() as session:
+        session.solve(base_params())
+        model, feasible = session.model, 0
+        for params in _tweaks(rng, 80):
+            plan, cost, _ = session.solve(params)
+            assert session.model is model            # 结构不变：原模型上增量修改
+            want_plan, want_cost, _ = _fresh(params)
+            assert (plan is None) == (want_plan is None), params
+            if plan is not None:
+                feasible += 1
+                assert cost == pytest.approx(want_cost, rel=1e-6), params
+    assert feasible >= 10     # 可行 / 不可行之间来回切换都要覆盖到
+
+
+def test_structure_change_rebuilds():
+    params = base_params()
+    with contextlib.redirect_stdout(io.StringIO()), ProductionModel() as session:
+        session.solve(params)
+        model = session.model
+        params['delivery_day'] = {2: 1026, 5: 1566, 9: 1566}
+        plan, cost, _ = session.solve(params)
+        assert session.model is not model
+        assert cost == pytest.approx(_fresh(params)[1], rel=1e-6)
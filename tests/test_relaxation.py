@@ -0,0 +1,88 @@
+import contextlib
+import copy
+import io
+
+import pytest
+
+from benchmarks.bench_solvers import base_params
+from calculation_tools import optimize_production, plan_auditor, relaxation, solve_cache, solver_backends
+
+HOLIDAYS = (6, 7, 13, 14)
+
+
+class Serial:
+    """代替进程池：在当前进程里依次求解"""
+    map = staticmethod(map)
+
+
+@pytest.fixture(autouse=True)
+def highs(monkeypatch):
+    pytest.importorskip("scipy.optimize")
+    monkeypatch.setattr(solver_backends, "SOLVER_BACKEND", "highs")
+    monkeypatch.setattr(solve_cache, "SOLVE_CACHE", False)
+
+
+def _solve(params):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solver_backends.solve(params)
+
+
+def _explore(params):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return relaxation.explore(params, holidays=HOLIDAYS, executor=Serial())
+
+
+def test_candidates():
+    params = base_params()
+    params['force_zero'][3] = 0
+    before = copy.deepcopy(params)
+    candidates = relaxation.candidate_relaxations(params, holidays=HOLIDAYS)
+    assert params == before
+    assert {'drop_force_zero': 3} in [changes for changes, _ in candidates]
+    assert not any(changes.get('drop_force_zero') in HOLIDAYS for changes, _ in candidates)
+    for changes, cand in candidates:
+        assert changes
+        for key, change in changes.items():
+            if key == 'drop_force_zero':
+                assert change not in cand['force_zero']
+            else:
+                assert (params[key], cand[key]) == change
+        assert cand['min_inventory'] <= cand['max_inventory']
+
+
+def test_distance():
+    assert relaxation.distance({'min_inventory': (2000, 1000), 'max_inventory': (5000, 10000)}) == 1.5
+    assert relaxation.distance({'drop_force_zero': 3}) == 1
+    assert relaxation.distance({'week1_min_consecutive_days': (3, 2)}) == 1
+
+
+@pytest.mark.parametrize("updates", [
+    {'min_inventory': 3800, 'max_inventory': 4200},
+    {'force_zero': {3: 0, 4: 0, 5: 0, 6: 0, 7: 0, 13: 0, 14: 0}},
+])
+def test_explore_picks_cheapest_valid_candidate(updates):
+    params = {**base_params(), **updates}
+    assert _solve(params)[0] is None
+    result = _explore(params)
+    assert result is not None
+
+    plan, cost, _ = _solve(result['params'])
+    assert plan is not None and cost == pytest.approx(result['cost'])
+    audit = plan_auditor.audit_plan(result['plan'], optimize_production.build_cap(result['params']),
+                                    result['params'], holidays=HOLIDAYS)
+    assert audit['valid']
+
+    valid_costs = []
+    for _, cand in relaxation.candidate_relaxations(params, HOLIDAYS):
+        plan, cost, _ = _solve(cand)
+        if plan is not None and plan_auditor.audit_plan(
+                plan, optimize_production.build_cap(cand), cand, holidays=HOLIDAYS)['valid']:
+            valid_costs.append(cost)
+    assert result['cost'] == pytest.approx(min(valid_costs))
+    assert result['feasible'] >= len(valid_costs)
+
+
+def test_explore_returns_none_when_nothing_helps():
+    params = base_params()
+    params['delivery_day'] = {2: 100000, 5: 1566, 9: 1566, 12: 1566}
+    assert _explore(params) is None
@@ -0,0 +1,122 @@
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import daily_rows, make_delfor, write_delfor
+from calculation_tools import shipment_planner
+
+
+@pytest.fixture(autouse=True)
+def parses(monkeypatch):
+    """清空 DELFOR 缓存，并记录真正解析 Excel 的次数"""
+    shipment_planner.clear_delfor_cache()
+    calls = []
+    read = shipment_planner._read_daily_demand
+
+    def counted(raw):
+        calls.append(len(raw))
+        return read(raw)
+
+    monkeypatch.setattr(shipment_planner, "_read_daily_demand", counted)
+    yield calls
+    shipment_planner.clear_delfor_cache()
+
+
+def _bump_mtime(path, seconds=10):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 10**9))
+
+
+def test_unchanged_file_is_parsed_once(tmp_path, parses):
+    src = write_delfor(tmp_path / "a.xlsx", 60)
+    first = shipment_planner.load_delfor(src)
+    assert shipment_planner.load_delfor(src) is first
+    assert len(parses) == 1
+
+
+def test_touch_without_content_change_keeps_entry(tmp_path, parses):
+    src = write_delfor(tmp_path / "a.xlsx", 60)
+    first = shipment_planner.load_delfor(src)
+    _bump_mtime(src)
+    assert shipment_planner.load_delfor(src) is first   # mtime 变了，sha1 没变 → 不重新解析
+    assert len(parses) == 1
+
+
+def test_content_change_reparses(tmp_path, parses):
+    src = write_delfor(tmp_path / "a.xlsx", 60, seed=0)
+    first = shipment_planner.load_delfor(src)
+    write_delfor(src, 60, seed=1)
+    _bump_mtime(src)
+    second = shipment_planner.load_delfor(src)
+    assert second is not first
+    assert len(parses) == 2
+    assert not first["plan"]["shipment_qty"].equals(second["plan"]["shipment_qty"])
+
+
+def test_lru_eviction(tmp_path, parses, monkeypatch):
+    monkeypatch.setattr(shipment_planner, "DELFOR_CACHE_SIZE", 2)
+    a, b, c = (write_delfor(tmp_path / f"{name}.xlsx", 60, seed=i) for i, name in enumerate("abc"))
+    shipment_planner.load_delfor(a)
+    shipment_planner.load_delfor(b)
+    shipment_planner.load_delfor(a)          # a 变成最近使用，b 最旧
+    shipment_planner.load_delfor(c)          # 淘汰 b
+    assert len(parses) == 3
+    shipment_planner.load_delfor(a)
+    assert len(parses) == 3
+    shipment_planner.load_delfor(b)
+    assert len(parses) == 4
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        shipment_planner.load_delfor(tmp_path / "missing.xlsx")
+
+
+# ---------------- compute_shipments ----------------
+def _loop_shipments(df):
+    """向量化之前的逐日实现，作为对照"""
+    df = df.copy()
+    df['schedule begin.1'] = pd.to_datetime(df['schedule begin.1'])
+    daily = df.groupby('schedule begin.1')['quantity'].sum().sort_index()
+    rows = []
+    for ship_date in daily.index:
+        if ship_date.weekday() not in shipment_planner.SHIP_RULE:
+            continue
+        start_off, end_off = shipment_planner.SHIP_RULE[ship_date.weekday()]
+        start, end = ship_date + pd.Timedelta(days=start_off), ship_date + pd.Timedelta(days=end_off)
+        qty = daily.reindex(pd.date_range(start, end, freq='D'), fill_value=0).sum()
+        rows.append({'ship_date': ship_date, 'ship_day': ship_date.strftime('%A'),
+                     'covers': f'{start.date()}→{end.date()}', 'shipment_qty': int(qty)})
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize("rows,seed", [(30, 0), (400, 1), (3000, 2)])
+def test_compute_shipments_matches_loop(rows, seed):
+    df = daily_rows(make_delfor(rows, seed=seed))
+    got = shipment_planner.compute_shipments(df)
+    want = _loop_shipments(df)
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), want, check_dtype=False)
+
+
+def test_compute_shipments_fractional_quantities():
+    dates = pd.date_range('2025-07-07', periods=21).strftime('%Y-%m-%d')
+    df = pd.DataFrame({'schedule begin.1': dates, 'quantity': [100.4, 0.3, 0.3] * 7})
+    got = shipment_planner.compute_shipments(df)
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), _loop_shipments(df), check_dtype=False)
+
+
+def test_compute_shipments_empty_and_bad_dates():
+    empty = shipment_planner.compute_shipments(pd.DataFrame({'schedule begin.1': [], 'quantity': []}))
+    assert empty.empty and list(empty.columns) == ['ship_date', 'ship_day', 'covers', 'shipment_qty']
+    with pytest.raises(ValueError):
+        shipment_planner.compute_shipments(pd.DataFrame({'schedule begin.1': ['nope'], 'quantity': [1]}))
+
+
+def test_delivery_for_horizon():
+    plan = shipment_planner.compute_shipments(daily_rows(make_delfor(400, seed=3)))
+    two = shipment_planner.delivery_for_horizon(plan, '2025-07-07', weeks=2)
+    assert set(two) <= {2, 5, 9, 12}
+    assert shipment_planner.delivery_for_horizon(plan, '2025-07-07', weeks=1) == {d: q for d, q in two.items() if d <= 7}
+    with pytest.raises(ValueError, match="DELFOR demand data ends"):
+        shipment_planner.delivery_for_horizon(plan, '2025-07-07', weeks=500)
@@ -0,0 +1,98 @@
+import contextlib
+import io
+
+import pytest
+
+from benchmarks.bench_solvers import base_params
+from cache_tools.tiered_cache import TieredCache
+from calculation_tools import solve_cache, solver_backends
+
+
+def test_key_ignores_day_key_types_and_order():
+    a = base_params()
+    b = base_params()
+    b['delivery_day'] = {str(d): q for d, q in reversed(list(a['delivery_day'].items()))}
+    b['POT'] = {str(d): v for d, v in a['POT'].items()}
+    b['force_zero'] = {str(d): None for d in reversed(list(a['force_zero']))}   # 取值无关
+    b['force_positive'] = {'1': None}
+    assert solve_cache.params_key(a, 'gurobi') == solve_cache.params_key(b, 'gurobi')
+
+
+def test_key_normalizes_numbers():
+    a, b = base_params(), base_params()
+    b['initial_inventory'] = 4000.0
+    b['OEE'] = 0.95 + 1e-9
+    assert solve_cache.params_key(a, 'gurobi') == solve_cache.params_key(b, 'gurobi')
+    b['OEE'] = 0.951
+    assert solve_cache.params_key(a, 'gurobi') != solve_cache.params_key(b, 'gurobi')
+
+
+@pytest.mark.parametrize("change", [
+    {'min_inventory': 2001},
+    {'force_zero': {6: 0, 7: 0, 13: 0}},
+    {'week1_min_consecutive_days': 2},
+    {'delivery_day': {2: 1026, 5: 1566, 9: 1566, 12: 1567}},
+])
+def test_key_changes_with_the_problem(change):
+    assert solve_cache.params_key(base_params(), 'gurobi') != solve_cache.params_key({**base_params(), **change}, 'gurobi')
+
+
+def test_key_depends_on_backend_and_version(monkeypatch):
+    params = base_params()
+    key = solve_cache.params_key(params, 'gurobi')
+    assert key != solve_cache.params_key(params, 'highs')
+    monkeypatch.setattr(solve_cache, "SOLVE_CACHE_VERSION", solve_cache.SOLVE_CACHE_VERSION + 1)
+    assert key != solve_cache.params_key(params, 'gurobi')
+
+
+class CountingSession:
+    def __init__(self, result):
+        self.result, self.calls, self.iis_calls = result, 0, 0
+
+    def solve(self, params):
+        self.calls += 1
+        return self.result
+
+    def compute_iis(self):
+        self.iis_calls += 1
+        return ['fix_ship_2']
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(solve_cache, "cache", TieredCache("solver_results_test"))
+
+
+def test_cached_session_solves_once(memory_cache):
+    inner = CountingSession(({1: 100.0, 2: 0.0}, 123.0, 4.5))
+    session = solve_cache.CachedSession(inner, 'gurobi')
+    params = base_params()
+    assert session.solve(params) == ({1: 100.0, 2: 0.0}, 123.0, 4.5)
+    assert not session.hit
+    same = {**params, 'initial_inventory': 4000.0}
+    assert session.solve(same) == ({1: 100.0, 2: 0.0}, 123.0, 4.5)
+    assert session.hit and inner.calls == 1
+
+
+def test_cached_iis(memory_cache):
+    inner = CountingSession((None, None, None))
+    session = solve_cache.CachedSession(inner, 'gurobi')
+    params = base_params()
+    session.solve(params)
+    assert session.compute_iis() == ['fix_ship_2']
+    again = solve_cache.CachedSession(CountingSession((None, None, None)), 'gurobi')
+    assert again.solve(params) == (None, None, None)
+    assert again.compute_iis() == ['fix_ship_2']
+    assert again.session.calls == 0 and again.session.iis_calls == 0
+
+
+def test_cache_hit_returns_int_days(memory_cache):
+    pytest.importorskip("scipy.optimize")
+    with contextlib.redirect_stdout(io.StringIO()):
+        first = solver_backends.solve(base_params(), 'highs', cache=True)
+        second = solver_backends.solve(base_params(), 'highs', cache=True)
+    assert solve_cache.stats()['hits_memory'] == 1
+    assert second == first and all(isinstance(d, int) for d in second[0])
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from benchmarks.bench_solvers import base_params, random_params
+from calculation_tools import enumeration, solver_backends
+from calculation_tools.optimize_production import build_cap
+
+CASES = [base_params()] + [random_params(random.Random(seed)) for seed in range(40)]
+
+
+def _solve(params, backend):
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return solver_backends.solve(params, backend, cache=False)
+    except ImportError as exc:
+        pytest.skip(f"{backend} backend unavailable: {exc}")
+
+
+def _check_plan(plan, hours, params):
+    cap = build_cap(params)
+    for d, q in plan.items():
+        assert q == pytest.approx(0, abs=1e-6) or q == pytest.approx(cap[d], rel=1e-6)   # 开工即满产
+        if d in params['force_zero']:
+            assert q == pytest.approx(0, abs=1e-6)
+    assert hours == pytest.approx(sum(plan.values()) * params['CT'] / 3600 / params['OEE'], rel=1e-6)
+
+
+@pytest.mark.parametrize("params", CASES)
+def test_highs_matches_gurobi(params):
+    plan, cost, hours = _solve(params, "highs")
+    ref_plan, ref_cost, _ = _solve(params, "gurobi")
+    assert (plan is None) == (ref_plan is None)
+    if plan is not None:
+        assert cost == pytest.approx(ref_cost, rel=1e-6)
+        _check_plan(plan, hours, params)
+
+
+def test_highs_iis_names_model_rows():
+    pytest.importorskip("scipy.optimize")
+    params = base_params()
+    params['delivery_day'][2] = 100000
+    with contextlib.redirect_stdout(io.StringIO()), solver_backends.solver_session("highs", cache=False) as session:
+        assert session.solve(params) == (None, None, None)
+        iis = session.compute_iis()
+    assert iis and all(isinstance(name, str) for name in iis)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="unknown solver backend"):
+        solver_backends.get_backend("cplex")
+
+
+@pytest.mark.parametrize("params", CASES)
+def test_enumeration_matches_gurobi(params):
+    plan, cost, hours = _solve(params, "enum")
+    ref_plan, ref_cost, _ = _solve(params, "gurobi")
+    assert (plan is None) == (ref_plan is None)
+    if plan is not None:
+        assert cost == pytest.approx(ref_cost, rel=1e-6)
+        _check_plan(plan, hours, params)
+
+
+def test_enumeration_top_k_is_ranked():
+    res = enumeration.enumerate_plans(base_params(), top_k=5)
+    costs = [t['cost'] for t in res['top']]
+    assert len(costs) == min(5, res['feasible_count']) and costs == sorted(costs)
+    assert (res['plan'], res['cost']) == (res['top'][0]['plan'], costs[0])
+
+
+def test_enumeration_day_limit():
+    params = base_params()
+    params['days'] = list(range(1, enumeration.MAX_ENUM_DAYS + 2))
+    with pytest.raises(ValueError, match="at most"):
+        enumeration.enumerate_plans(params)
@@ -0,0 +1,103 @@
+import sqlite3
+
+import pytest
+
+from cache_tools import tiered_cache
+from cache_tools.tiered_cache import TieredCache, make_key
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(tiered_cache.time, "time", c)
+    return c
+
+
+def _rows(path, name):
+    with sqlite3.connect(path) as db:
+        return {k for (k,) in db.execute(f'SELECT key FROM "{name}"')}
+
+
+def test_make_key_is_order_insensitive():
+    assert make_key({"a": 1, "b": [1, 2]}) == make_key({"b": [1, 2], "a": 1})
+    assert make_key({"a": 1}) != make_key({"a": 2})
+
+
+def test_memory_lru():
+    cache = TieredCache("t", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1          # a 变成最近使用
+    cache.set("c", 3)                   # 淘汰 b
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["entries_memory"] == 2
+
+
+def test_ttl_expires_in_both_tiers(tmp_path, clock):
+    path = str(tmp_path / "c.sqlite")
+    cache = TieredCache("t", path=path, ttl=10)
+    cache.set("k", {"v": 1})
+    clock.now += 5
+    assert cache.get("k") == {"v": 1}
+    clock.now += 6
+    assert cache.get("k", "gone") == "gone"
+    assert "k" not in _rows(path, "t")                        # 过期的行在读到时删除
+    assert TieredCache("t", path=path, ttl=10).get("k") is None
+
+
+def test_sqlite_promotion(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    TieredCache("t", path=path).set("k", [1, 2, 3])
+    fresh = TieredCache("t", path=path)                       # 新进程：内存层为空
+    assert fresh.get("k") == [1, 2, 3]
+    assert fresh.get("k") == [1, 2, 3]
+    stats = fresh.stats()
+    assert (stats["hits_disk"], stats["hits_memory"], stats["misses"]) == (1, 1, 0)
+
+
+def test_disk_eviction_keeps_recently_accessed(tmp_path, clock):
+    path = str(tmp_path / "c.sqlite")
+    cache = TieredCache("t", path=path, max_entries=1, max_disk_entries=5)
+    cache.EVICT_EVERY = 3
+    cache.TOUCH_BATCH = 1
+    for i in range(5):
+        clock.now += 1
+        cache.set(f"k{i}", i)
+    clock.now += 1
+    assert cache.get("k0") == 0          # k0 刚被访问，不再是最旧的
+    for i in range(5, 9):
+        clock.now += 1
+        cache.set(f"k{i}", i)
+    # 9 次写入 → 第 3/6/9 次写入时检查行数，保留最近访问的 5 条
+    assert _rows(path, "t") == {"k0", "k5", "k6", "k7", "k8"}
+
+
+def test_eviction_only_every_n_writes(tmp_path, clock):
+    path = str(tmp_path / "c.sqlite")
+    cache = TieredCache("t", path=path, max_disk_entries=2)
+    cache.EVICT_EVERY = 4
+    for i in range(3):
+        clock.now += 1
+        cache.set(f"k{i}", i)
+    assert len(_rows(path, "t")) == 3    # 还没到检查点
+    clock.now += 1
+    cache.set("k3", 3)
+    assert _rows(path, "t") == {"k2", "k3"}
+
+
+def test_clear(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    cache = TieredCache("t", path=path)
+    cache.set("k", 1)
+    cache.clear()
+    assert cache.get("k") is None
+    assert _rows(path, "t") == set()